@@ -1,27 +1,70 @@
 # app.py
-from flask import Flask, render_template, request, redirect, url_for, flash, session
-from models.collections import games_db, sellers_db, consoles_db
+from flask import Flask, Response, render_template, request, redirect, url_for, flash, session, g, stream_with_context
+from markupsafe import Markup, escape
+from werkzeug.middleware.proxy_fix import ProxyFix
+from models.collections import (games_db, sellers_db, consoles_db, listing_view_db, seller_stats_db, home_feed_db,
+                                listing_counts_db, price_rollups_db, cache_stats, CONDITIONS, RARITIES)
 from models import init_sample_data
-from utils.image_utils import image_handler
+from models.database import db_instance
+from models.async_collections import (async_db, async_games_db, async_sellers_db, async_consoles_db,
+                                      async_price_rollups_db, resolved)
+from models.change_watcher import change_watcher
+from models.indexes import ensure_indexes
+from utils.image_utils import image_handler, IMAGE_SIZES, UploadBudget
+from utils.image_pipeline import image_pipeline
+from utils.page_cache import page_cache
+from utils.assets import asset_pipeline
+from utils.sessions import session_store
+from utils.scheduler import PeriodicTask
+from utils.credentials import CredentialsBusy
+from utils.rate_limit import login_limiter
+from utils.listing_import import ListingImporter, validate_listing, detect_format, export_rows
+from utils.db_metrics import db_metrics
+from config import Config
 from bson.objectid import ObjectId
 from datetime import datetime
 import os
+import threading
+import time
 from functools import wraps
 
-app = Flask(__name__)
+app = Flask(__name__, static_folder=None)
 app.secret_key = os.getenv('SECRET_KEY', 'dev-secret-key')
+# Werkzeug rejects larger bodies before parsing and spools file parts to disk
+app.config['MAX_CONTENT_LENGTH'] = Config.MAX_CONTENT_LENGTH
+# Behind nginx, remote_addr is the proxy's: take the client address (and scheme) it forwards
+if Config.PROXY_FIX_HOPS:
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=Config.PROXY_FIX_HOPS, x_proto=Config.PROXY_FIX_HOPS)
+# /static with fingerprinted URLs and far-future caching
+asset_pipeline.init_app(app)
+# Sessions live server-side; the cookie only carries a signed session id
+app.session_interface = session_store
 
 # Authentication helpers - FIXED
 def get_current_seller():
+    """The logged-in seller's principal (_id, username, rating), or None.
+
+    Read from the session while its version stamp is current, so identity
+    costs no database read; use sellers_db for the full profile.
+    """
+    # Memoized per request: login_required and the view share one lookup
+    if 'current_seller' in g:
+        return g.current_seller
+    seller = None
     seller_id = session.get('seller_id')
     if seller_id:
         try:
-            seller = sellers_db.get_seller_by_id(seller_id)
-            return seller
+            seller = session_store.principal(session)
+            if seller is None:
+                with db_instance.primary_reads():
+                    full_seller = sellers_db.get_seller_by_id(seller_id)
+                if full_seller:
+                    seller = session_store.set_principal(session, full_seller)
         except Exception as e:
             print(f"❌ Error getting seller: {e}")
             session.pop('seller_id', None)
-    return None
+    g.current_seller = seller
+    return seller
 
 def login_required(f):
     @wraps(f)
@@ -33,22 +76,150 @@ def login_required(f):
         return f(*args, **kwargs)
     return decorated_function
 
-# Initialize database
-with app.app_context():
-    init_sample_data()
+@app.template_global()
+def responsive_image(filename, alt, sizes='card', **attrs):
+    """Render an uploaded image as a <picture> with srcset variants when they exist"""
+    attributes = ''.join(f' {name.rstrip("_")}="{escape(value)}"' for name, value in attrs.items())
+    img = (f'<img src="{escape(url_for("static", filename="uploads/games/" + filename))}"'
+           f' alt="{escape(alt)}" loading="lazy"{attributes}>')
+    widths = image_handler.available_widths(filename)
+    if not widths:
+        return Markup(img)
+    sources = []
+    for fmt in image_handler.variant_formats:
+        srcset = ', '.join(
+            f'{url_for("static", filename="uploads/variants/" + image_handler.variant_path(filename, width, fmt))} {width}w'
+            for width in widths
+        )
+        sources.append(f'<source type="image/{fmt}" srcset="{escape(srcset)}" sizes="{IMAGE_SIZES[sizes]}">')
+    return Markup(f'<picture>{"".join(sources)}{img}</picture>')
+
+# Periods the /market page offers, in days
+MARKET_PERIODS = (7, 30, 90, 365)
+
+# Initialize database on the first request of each worker, after any pre-fork
+_bootstrap_lock = threading.Lock()
+_bootstrapped = False
+_bootstrap_failed_at = None
+seller_stats_task = PeriodicTask('seller-stats-reconcile', Config.SELLER_STATS_RECONCILE_SECONDS,
+                                 seller_stats_db.reconcile_if_due)
+session_purge_task = PeriodicTask('session-purge', Config.SESSION_PURGE_SECONDS,
+                                 session_store.purge_expired)
+
+def bootstrap():
+    """Seed (outside production), ensure indexes and resume image jobs once per process.
+
+    After a failed attempt, calls return False without retrying for
+    BOOTSTRAP_RETRY_SECONDS, so a database outage does not queue every
+    request behind another ping.
+    """
+    global _bootstrapped, _bootstrap_failed_at
+    if _bootstrapped:
+        return True
+    if _bootstrap_backing_off():
+        return False
+    with _bootstrap_lock:
+        if _bootstrapped:
+            return True
+        if _bootstrap_backing_off():
+            return False
+        ok, error = db_instance.ping()
+        if not ok:
+            _bootstrap_failed_at = time.monotonic()
+            print(f"❌ MongoDB unavailable, startup deferred for {Config.BOOTSTRAP_RETRY_SECONDS}s: {error}")
+            return False
+        _bootstrap_failed_at = None
+        if Config.SEED_SAMPLE_DATA:
+            init_sample_data()
+        else:
+            listing_view_db.ensure_built()
+        ensure_indexes()
+        seller_stats_db.ensure_built()
+        listing_counts_db.ensure_built()
+        price_rollups_db.ensure_built()
+        seller_stats_task.start()
+        home_feed_db.refresher.start()
+        session_purge_task.start()
+        if Config.CHANGE_WATCHER_ENABLED:
+            change_watcher.start()
+        image_pipeline.resume_pending()
+        _bootstrapped = True
+        return True
+
+def _bootstrap_backing_off():
+    failed_at = _bootstrap_failed_at
+    return failed_at is not None and time.monotonic() - failed_at < Config.BOOTSTRAP_RETRY_SECONDS
+
+@app.before_request
+def bootstrap_on_first_request():
+    if request.endpoint not in ('healthz', 'readyz', 'static'):
+        bootstrap()
+
+@app.before_request
+def route_reads():
+    # Set on every request: gunicorn threads are reused and would carry the last one's choice
+    if request.endpoint == 'static':
+        return
+    wrote_at = session.get('wrote_at')
+    db_instance.pin_primary(wrote_at is not None and time.time() - wrote_at < Config.STICKY_PRIMARY_SECONDS)
+
+@app.after_request
+def remember_writes(response):
+    """A seller who just posted reads from the primary for a while, so they see their own change"""
+    if request.method == 'POST' and session.get('seller_id'):
+        session['wrote_at'] = time.time()
+    return response
+
+@app.before_request
+def start_db_metrics():
+    if Config.DB_METRICS_ENABLED:
+        g.db_metrics_token = db_metrics.start_request()
+
+@app.after_request
+def add_server_timing(response):
+    token = g.pop('db_metrics_token', None)
+    if token is None:
+        return response
+    result = db_metrics.finish_request(token, request.endpoint)
+    if result:
+        stats, elapsed = result
+        response.headers.add('Server-Timing',
+                             f'db;dur={stats.db_seconds * 1000:.1f};desc="{stats.commands} queries, {stats.documents} docs"')
+        response.headers.add('Server-Timing', f'app;dur={elapsed * 1000:.1f}')
+    return response
+
+@app.route('/metrics')
+def metrics():
+    return Response(db_metrics.render_prometheus(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/healthz')
+def healthz():
+    """Liveness: the process is up; never touches the database"""
+    return {'status': 'ok'}
+
+@app.route('/readyz')
+def readyz():
+    """Readiness: the database answers and startup work has finished"""
+    ok, error = db_instance.ping()
+    if ok:
+        ok = bootstrap()
+    return {
+        'status': 'ready' if ok else 'unavailable',
+        'database': 'ok' if error is None else error,
+        'bootstrapped': _bootstrapped,
+        'change_watcher': change_watcher.mode,
+        'read_routing': db_instance.read_routing()
+    }, 200 if ok else 503
 
 @app.route('/')
+@page_cache.cached
 def index():
-    try:
-        games = games_db.get_all_games()
-        featured_games = games[:6]
-        current_seller = get_current_seller()
-        return render_template('index.html', 
-                             featured_games=featured_games,
-                             current_seller=current_seller)
-    except Exception as e:
-        flash(f"Error loading games: {str(e)}", "error")
-        return render_template('index.html', featured_games=[], current_seller=None)
+    # Precomputed by home_feed_db: served from this worker's copy of one document
+    feed = home_feed_db.get()
+    return render_template('index.html', 
+                         feed=feed,
+                         featured_games=feed['featured'],
+                         current_seller=get_current_seller())
 
 @app.route('/login', methods=['GET', 'POST'])
 def login():
@@ -60,13 +231,23 @@ def login():
             flash('Please enter both username and password', 'error')
             return render_template('login.html')
         
-        seller = sellers_db.get_seller_by_username(username)
-        if seller and sellers_db.verify_password(seller['_id'], password):
-            session['seller_id'] = str(seller['_id'])
-            flash(f'Welcome back, {seller["username"]}!', 'success')
-            return redirect(url_for('seller_dashboard'))
-        else:
-            flash('Invalid username or password', 'error')
+        wait = login_limiter.check(username, request.remote_addr)
+        if wait:
+            flash(f'Too many login attempts. Try again in {wait} seconds.', 'error')
+            return render_template('login.html'), 429, {'Retry-After': str(wait)}
+        
+        try:
+            seller = sellers_db.get_seller_by_username(username)
+            if seller and sellers_db.verify_password(seller['_id'], password):
+                session_store.regenerate(session)
+                session['seller_id'] = str(seller['_id'])
+                flash(f'Welcome back, {seller["username"]}!', 'success')
+                return redirect(url_for('seller_dashboard'))
+            else:
+                flash('Invalid username or password', 'error')
+        except CredentialsBusy:
+            flash('The server is busy, please try again in a moment', 'error')
+            return render_template('login.html'), 503, {'Retry-After': '5'}
     
     if session.get('seller_id'):
         return redirect(url_for('seller_dashboard'))
@@ -110,6 +291,7 @@ def register():
         
         seller_id = sellers_db.create_seller(seller_data)
         if seller_id:
+            session_store.regenerate(session)
             session['seller_id'] = str(seller_id)
             flash('Account created successfully!', 'success')
             return redirect(url_for('seller_dashboard'))
@@ -120,18 +302,28 @@ def register():
 
 @app.route('/logout')
 def logout():
-    session.pop('seller_id', None)
+    # Clearing the session deletes it server-side, not just the cookie
+    session.clear()
     flash('You have been logged out', 'info')
     return redirect(url_for('index'))
 
+@app.route('/logout/all', methods=['POST'])
+@login_required
+def logout_everywhere():
+    ended = session_store.revoke_seller(get_current_seller()['_id'])
+    session.clear()
+    flash(f'Logged out of {ended} session(s) on all devices', 'info')
+    return redirect(url_for('index'))
+
 @app.route('/seller/dashboard')
 @login_required
 def seller_dashboard():
     current_seller = get_current_seller()
-    seller_games = sellers_db.get_seller_games(str(current_seller['_id']))
+    seller = sellers_db.get_seller_by_id(current_seller['_id'])
+    seller_games = sellers_db.get_seller_cards(current_seller['_id'])
     
     return render_template('seller_dashboard.html',
-                         seller=current_seller,
+                         seller=seller,
                          games=seller_games,
                          current_seller=current_seller)
 
@@ -150,12 +342,9 @@ def edit_seller_profile():
                 "contact_number": request.form.get('contact_number', '')
             }
             
-            result = sellers_db.collection.update_one(
-                {"_id": ObjectId(current_seller['_id'])},
-                {"$set": update_data}
-            )
-            
-            if result.modified_count > 0:
+            updated = sellers_db.update_seller_profile(current_seller['_id'], update_data)
+            g.pop('current_seller', None)
+            if updated:
                 flash('Profile updated successfully!', 'success')
             else:
                 flash('No changes made to your profile', 'info')
@@ -166,57 +355,69 @@ def edit_seller_profile():
             flash(f'Error updating profile: {str(e)}', 'error')
     
     return render_template('edit_seller_profile.html', 
-                         seller=current_seller,
+                         seller=sellers_db.get_seller_by_id(current_seller['_id']),
                          current_seller=current_seller)
 
 @app.route('/games')
-def games():
+@page_cache.cached
+async def games():
     try:
-        console_filter = request.args.get('console')
-        condition_filter = request.args.get('condition')
-        rarity_filter = request.args.get('rarity')
-        
         filters = {}
-        if console_filter:
-            filters['console'] = console_filter
-        if condition_filter:
-            filters['condition'] = condition_filter
-        if rarity_filter:
-            filters['rarity'] = rarity_filter
+        for key in ('q', 'console', 'condition', 'rarity', 'sort'):
+            value = request.args.get(key, '').strip()
+            if value:
+                filters[key] = value
+        for key in ('min_price', 'max_price'):
+            value = request.args.get(key, '').strip()
+            try:
+                if value and float(value) >= 0:
+                    filters[key] = value
+            except ValueError:
+                pass
         
-        if filters:
-            games_list = games_db.search_games(filters)
-        else:
-            games_list = games_db.get_all_games()
-        
-        consoles = consoles_db.get_all_consoles()
-        conditions = ["Mint", "Excellent", "Good", "Fair", "Poor"]
-        rarities = ["Common", "Uncommon", "Rare", "Very Rare", "Ultra Rare"]
+        # The page and sidebar lookups are independent, so they run concurrently
         current_seller = get_current_seller()
+        page, consoles, facets = await async_db.gather(
+            async_games_db.get_card_page(filters,
+                                          limit=Config.GAMES_PER_PAGE,
+                                          after=request.args.get('after'),
+                                          before=request.args.get('before')),
+            async_consoles_db.get_all_consoles(),
+            async_games_db.get_facets(filters)
+        )
         
         return render_template('games.html', 
-                             games=games_list, 
+                             games=page['games'], 
+                             next_cursor=page['next_cursor'],
+                             prev_cursor=page['prev_cursor'],
                              consoles=consoles,
-                             conditions=conditions,
-                             rarities=rarities,
+                             conditions=CONDITIONS,
+                             rarities=RARITIES,
+                             facets=facets,
+                             current_sort=games_db.resolve_sort(filters),
                              current_filters=filters,
                              current_seller=current_seller)
     except Exception as e:
         flash(f"Error loading games: {str(e)}", "error")
-        return render_template('games.html', games=[], consoles=[], conditions=[], rarities=[], current_filters={}, current_seller=None)
+        return render_template('games.html', games=[], next_cursor=None, prev_cursor=None, consoles=[], conditions=[], rarities=[], facets={}, current_sort='newest', current_filters={}, current_seller=None)
 
 @app.route('/game/<game_id>')
-def game_detail(game_id):
-    game = games_db.get_game_by_id(game_id)
+async def game_detail(game_id):
+    # Ownership is checked against the session's seller, alongside the listing lookup
+    current_seller = get_current_seller()
+    game, is_owner = await async_db.gather(
+        async_games_db.get_game_by_id(game_id),
+        async_games_db.is_game_owner(game_id, current_seller['_id']) if current_seller else resolved(False)
+    )
     if not game:
         flash('Game not found', 'error')
         return redirect(url_for('games'))
-    
-    current_seller = get_current_seller()
-    is_owner = current_seller and games_db.is_game_owner(game_id, current_seller['_id'])
+    # Needs the listing's title and console, so it follows the lookup above
+    (price_guide,) = await async_db.gather(async_price_rollups_db.get_price_guide(game))
     
     return render_template('game_detail.html', 
                          game=game, 
+                         price_guide=price_guide,
                          current_seller=current_seller,
                          is_owner=is_owner)
 
@@ -226,83 +427,129 @@ def add_game():
     current_seller = get_current_seller()
     
     if request.method == 'POST':
-        try:
+        # Parsed outside the try so an oversized body reaches the 413 handler
+        images = request.files.getlist('images')
+        game_data, errors = validate_listing(request.form)
+        for error in errors:
+            flash(f'Invalid listing: {error}', 'error')
+        if not errors:
             image_filenames = []
-            if 'images' in request.files:
-                images = request.files.getlist('images')
-                for image in images:
-                    if image and image.filename:
-                        filename, error = image_handler.save_image(image)
-                        if error:
-                            flash(f'Image upload error: {error}', 'warning')
-                        elif filename:
-                            image_filenames.append(filename)
+            try:
+                if images:
+                    budget = UploadBudget()
+                    for image in images:
+                        if image and image.filename:
+                            filename, error = image_pipeline.accept_upload(image, budget)
+                            if error:
+                                flash(f'Image upload error: {error}', 'warning')
+                            elif filename in image_filenames:
+                                image_pipeline.release([filename])
+                            elif filename:
+                                image_filenames.append(filename)
             
-            game_data = {
-                "title": request.form['title'],
-                "console_id": ObjectId(request.form['console_id']),
-                "condition": request.form['condition'],
-                "rarity": request.form['rarity'],
-                "price": float(request.form['price']),
-                "description": request.form['description'],
-                "seller_id": ObjectId(current_seller['_id']),
-                "date_listed": datetime.now(),
-                "images": image_filenames
-            }
+                game_data.update({
+                    "seller_id": ObjectId(current_seller['_id']),
+                    "date_listed": datetime.now(),
+                    "images": image_filenames,
+                    "pending_images": image_pipeline.pending(image_filenames)
+                })
             
-            result = games_db.add_game(game_data)
-            if result.inserted_id:
-                flash('Game added successfully!', 'success')
-                return redirect(url_for('seller_dashboard'))
-            else:
-                flash('Failed to add game to database', 'error')
+                result = games_db.add_game(game_data)
+                if result is not None:
+                    if image_filenames:
+                        image_pipeline.submit(image_filenames)
+                    flash('Game added successfully!', 'success')
+                    return redirect(url_for('seller_dashboard'))
+                else:
+                    image_pipeline.release(image_filenames)
+                    flash('Failed to add game to database', 'error')
                 
-        except Exception as e:
-            flash(f'Error adding game: {str(e)}', 'error')
+            except Exception as e:
+                image_pipeline.release(image_filenames)
+                flash(f'Error adding game: {str(e)}', 'error')
     
     consoles = consoles_db.get_all_consoles()
-    conditions = ["Mint", "Excellent", "Good", "Fair", "Poor"]
-    rarities = ["Common", "Uncommon", "Rare", "Very Rare", "Ultra Rare"]
     
     return render_template('add_game.html', 
                          consoles=consoles,
-                         conditions=conditions,
-                         rarities=rarities,
+                         conditions=CONDITIONS,
+                         rarities=RARITIES,
                          current_seller=current_seller)
 
+@app.route('/game/<game_id>/delete', methods=['POST'])
+@login_required
+def delete_game(game_id):
+    current_seller = get_current_seller()
+    if games_db.remove_game(game_id, current_seller['_id']):
+        flash('Listing removed', 'success')
+    else:
+        flash('You can only remove your own listings', 'error')
+    return redirect(url_for('seller_dashboard'))
+
+@app.route('/seller/import', methods=['POST'])
+@login_required
+def import_listings():
+    """Bulk-create listings from a CSV or JSON Lines file, with an optional zip of images"""
+    current_seller = get_current_seller()
+    listings = request.files.get('listings')
+    fmt = request.form.get('format') or detect_format(listings.filename if listings else None)
+    if not listings or fmt not in ('csv', 'jsonl'):
+        return {'error': 'Upload a .csv or .jsonl file as "listings"'}, 400
+    images_zip = request.files.get('images_zip')
+    try:
+        report = ListingImporter(current_seller['_id']).run(
+            listings.stream, fmt, images_zip.stream if images_zip and images_zip.filename else None)
+    except Exception as e:
+        return {'error': f'Import failed: {str(e)}'}, 400
+    return report
+
+@app.route('/seller/export')
+@login_required
+def export_listings():
+    """Stream the current seller's listings as CSV or JSON Lines"""
+    current_seller = get_current_seller()
+    fmt = 'jsonl' if request.args.get('format') == 'jsonl' else 'csv'
+    mimetype = 'text/csv' if fmt == 'csv' else 'application/x-ndjson'
+    return Response(stream_with_context(export_rows(current_seller['_id'], fmt)), mimetype=mimetype,
+                    headers={'Content-Disposition': f'attachment; filename=listings.{fmt}'})
+
 @app.route('/game/<game_id>/add-images', methods=['POST'])
 @login_required
 def add_game_images(game_id):
     current_seller = get_current_seller()
     
-    if not games_db.is_game_owner(game_id, current_seller['_id']):
+    # Existence and ownership in one lookup
+    game = games_db.get_owned_game(game_id, current_seller['_id'])
+    if not game:
         flash('You can only add images to your own games', 'error')
         return redirect(url_for('game_detail', game_id=game_id))
     
+    # Parsed outside the try so an oversized body reaches the 413 handler
+    images = request.files.getlist('images')
     try:
-        game = games_db.get_game_by_id(game_id)
-        if not game:
-            flash('Game not found', 'error')
-            return redirect(url_for('games'))
-        
         image_filenames = []
-        if 'images' in request.files:
-            images = request.files.getlist('images')
+        if images:
+            budget = UploadBudget()
             for image in images:
                 if image and image.filename:
-                    filename, error = image_handler.save_image(image)
+                    filename, error = image_pipeline.accept_upload(image, budget)
                     if error:
                         flash(f'Image error: {error}', 'warning')
+                    elif filename in image_filenames or filename in game.get('images', []):
+                        # Already on this game: keep a single reference
+                        image_pipeline.release([filename])
                     elif filename:
                         image_filenames.append(filename)
         
         if image_filenames:
-            success_count = 0
-            for filename in image_filenames:
-                if games_db.add_game_image(game_id, filename):
-                    success_count += 1
+            added = games_db.add_game_images(game_id, image_filenames, image_pipeline.pending(image_filenames))
+            image_pipeline.release([filename for filename in image_filenames if filename not in added])
+            image_pipeline.submit(added)
             
-            flash(f'Added {success_count} image(s) successfully!', 'success')
+            if added:
+                flash(f'Added {len(added)} image(s), they will appear once processed', 'success')
+            else:
+                flash('Images could not be added, please try again', 'warning')
         else:
             flash('No valid images were uploaded', 'warning')
             
@@ -311,31 +558,94 @@ def add_game_images(game_id):
     
     return redirect(url_for('game_detail', game_id=game_id))
 
+@app.route('/game/<game_id>/images', methods=['POST'])
+@login_required
+def manage_game_images(game_id):
+    """Remove images and/or pick the primary image and order, each as one write"""
+    current_seller = get_current_seller()
+    remove = request.form.getlist('remove')
+    primary = request.form.get('primary') or None
+    order = request.form.getlist('order')
+    
+    if remove:
+        removed = games_db.remove_game_images(game_id, remove, seller_id=current_seller['_id'])
+        if removed:
+            flash(f'Removed {len(removed)} image(s)', 'success')
+        else:
+            flash('Game not found or images already removed', 'error')
+        order = [filename for filename in order if filename not in removed]
+        if primary in removed:
+            primary = None
+    
+    if order or primary:
+        if games_db.arrange_images(game_id, order=order or None, primary=primary, seller_id=current_seller['_id']):
+            flash('Images updated', 'success')
+        elif not remove:
+            flash('Could not update images; reload the page and try again', 'error')
+    
+    return redirect(url_for('game_detail', game_id=game_id))
+
+@app.route('/game/<game_id>/images/status')
+def game_image_status(game_id):
+    images = games_db.get_image_status(game_id)
+    if images is None:
+        return {'error': 'Game not found'}, 404
+    return {
+        'images': images,
+        'pending': sum(1 for image in images if image['status'] == 'pending')
+    }
+
 @app.route('/sellers')
-def sellers():
-    sellers_list = sellers_db.get_all_sellers()
+@page_cache.cached
+async def sellers():
     current_seller = get_current_seller()
+    (sellers_list,) = await async_db.gather(async_sellers_db.get_all_sellers())
     return render_template('sellers.html', 
                          sellers=sellers_list, 
                          current_seller=current_seller)
 
 @app.route('/seller/<seller_id>')
-def seller_detail(seller_id):
-    seller = sellers_db.get_seller_by_id(seller_id)
+@page_cache.cached
+async def seller_detail(seller_id):
+    current_seller = get_current_seller()
+    seller, seller_games, stats, consoles = await async_db.gather(
+        async_sellers_db.get_seller_by_id(seller_id),
+        async_sellers_db.get_seller_cards(seller_id),
+        async_sellers_db.get_stats(seller_id),
+        async_consoles_db.get_all_consoles()
+    )
     if not seller:
         flash('Seller not found', 'error')
         return redirect(url_for('sellers'))
     
-    seller_games = sellers_db.get_seller_games(seller_id)
-    current_seller = get_current_seller()
     is_own_profile = current_seller and str(current_seller['_id']) == seller_id
+    console_names = {str(console['_id']): console['name'] for console in consoles}
     
     return render_template('seller_detail.html', 
                          seller=seller, 
+                         stats=stats,
+                         console_names=console_names,
                          games=seller_games,
                          current_seller=current_seller,
                          is_own_profile=is_own_profile)
 
+@app.route('/market')
+@page_cache.cached
+def market():
+    """Asking prices by console and for the most listed titles, from the daily price rollups"""
+    console = request.args.get('console') or None
+    days = request.args.get('days', type=int)
+    if days not in MARKET_PERIODS:
+        days = Config.MARKET_DAYS
+    consoles = consoles_db.get_all_consoles()
+    return render_template('market.html',
+                         market=price_rollups_db.get_market(console, days),
+                         consoles=consoles,
+                         console_names={console['_id']: console['name'] for console in consoles},
+                         periods=MARKET_PERIODS,
+                         current_console=console,
+                         current_seller=get_current_seller())
+
 @app.route('/contact-seller/<seller_id>', methods=['GET', 'POST'])
 def contact_seller(seller_id):
     seller = sellers_db.get_seller_by_id(seller_id)
@@ -361,6 +671,11 @@ def contact_seller(seller_id):
                          seller=seller,
                          current_seller=get_current_seller())
 
+@app.errorhandler(413)
+def request_too_large(e):
+    flash(f'Upload too large: at most {Config.MAX_UPLOAD_REQUEST_SIZE // (1024 * 1024)} MB of images per request', 'error')
+    return redirect(request.referrer or url_for('index'))
+
 # Debug routes
 @app.route('/debug/session')
 def debug_session():
@@ -369,6 +684,10 @@ def debug_session():
         'current_seller': get_current_seller()
     }
 
+@app.route('/debug/cache')
+def debug_cache():
+    return cache_stats()
+
 @app.route('/debug/sellers')
 def debug_sellers():
     sellers = list(sellers_db.collection.find({}, {'username': 1, 'email': 1, '_id': 1}))
@@ -380,4 +699,6 @@ if __name__ == '__main__':
     print("\n🌐 Retro Games Marketplace starting...")
     print("📍 Local:   http://127.0.0.1:5000")
     print("📍 Network: http://0.0.0.0:5000")
-    app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
+    if Config.APP_ENV == 'production':
+        print("⚠️  This is the development server; run production with: gunicorn -c gunicorn.conf.py app:app")
+    app.run(debug=Config.APP_ENV != 'production', host='0.0.0.0', port=5000)
\ No newline at end of file
@@ -0,0 +1,324 @@
+# benchmarks/run.py - load-test the marketplace routes and compare runs
+#
+#   python -m benchmarks.run run --size 1000 --clients 8 --requests 200 --output before.json
+#   python -m benchmarks.run compare before.json after.json --threshold 10
+import argparse
+import io
+import itertools
+import json
+import math
+import os
+import platform
+import random
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from http.cookiejar import CookieJar
+from urllib import error as urlerror, parse, request as urlrequest
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BENCHMARK_DATABASE = 'retro_games_benchmark'
+FILTER_NAMES = ('console', 'condition', 'rarity')
+DEFAULT_SCENARIOS = ['index', 'games', 'game_detail', 'seller_detail', 'upload']
+
+class InProcessClient:
+    """Drives the Flask app through its test client; one per benchmark thread"""
+    def __init__(self, app):
+        self.client = app.test_client()
+
+    def get(self, path):
+        return self.client.get(path).status_code
+
+    def post(self, path, data, files=None):
+        data = dict(data)
+        for name, (filename, content) in (files or {}).items():
+            data[name] = (io.BytesIO(content), filename)
+        return self.client.post(path, data=data, content_type='multipart/form-data').status_code
+
+class HttpClient:
+    """Drives a running server over HTTP, keeping its own session cookie"""
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip('/')
+        self.opener = urlrequest.build_opener(urlrequest.HTTPCookieProcessor(CookieJar()), _NoRedirect())
+
+    def _send(self, req):
+        try:
+            with self.opener.open(req, timeout=30) as response:
+                response.read()
+                return response.status
+        except urlerror.HTTPError as e:
+            return e.code
+
+    def get(self, path):
+        return self._send(urlrequest.Request(self.base_url + path))
+
+    def post(self, path, data, files=None):
+        boundary = uuid.uuid4().hex
+        body = io.BytesIO()
+        for name, value in data.items():
+            body.write(f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode())
+        for name, (filename, content) in (files or {}).items():
+            body.write(f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"; '
+                       f'filename="{filename}"\r\nContent-Type: application/octet-stream\r\n\r\n'.encode())
+            body.write(content + b'\r\n')
+        body.write(f'--{boundary}--\r\n'.encode())
+        req = urlrequest.Request(self.base_url + path, data=body.getvalue(), method='POST',
+                                 headers={'Content-Type': f'multipart/form-data; boundary={boundary}'})
+        return self._send(req)
+
+class _NoRedirect(urlrequest.HTTPRedirectHandler):
+    # A redirect is the response being measured, not a second request
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+def random_png(rng):
+    from PIL import Image
+    pixels = bytes(rng.getrandbits(8) for _ in range(64 * 64 * 3))
+    buffer = io.BytesIO()
+    Image.frombytes('RGB', (64, 64), pixels).save(buffer, 'PNG')
+    return buffer.getvalue()
+
+def load_context(sample_size=500):
+    """Ids the scenarios pick from, read once before the clock starts"""
+    from models.database import db_instance
+    db = db_instance.db
+    games = list(db.games.aggregate([{'$sample': {'size': sample_size}},
+                                     {'$project': {'seller_id': 1}}]))
+    sellers = {seller['_id']: seller['username'] for seller in db.sellers.find(
+        {'_id': {'$in': [game['seller_id'] for game in games]}}, {'username': 1})}
+    return {
+        'game_ids': [str(game['_id']) for game in games],
+        'seller_ids': [str(seller_id) for seller_id in sellers],
+        'owned_games': [(str(game['_id']), sellers[game['seller_id']]) for game in games
+                        if game['seller_id'] in sellers],
+        'console_ids': [str(console['_id']) for console in db.consoles.find({}, {'_id': 1})],
+    }
+
+def build_scenarios(names, context):
+    """name -> function(client, rng) returning the response status"""
+    from models.collections import CONDITIONS, RARITIES
+    values = {'console': context['console_ids'], 'condition': CONDITIONS, 'rarity': RARITIES}
+    scenarios = {}
+    if 'index' in names:
+        scenarios['index'] = lambda client, rng: client.get('/')
+    if 'games' in names:
+        # Every combination of filters, with random values for the ones present
+        for count in range(len(FILTER_NAMES) + 1):
+            for combo in itertools.combinations(FILTER_NAMES, count):
+                def run(client, rng, combo=combo):
+                    query = parse.urlencode({name: rng.choice(values[name]) for name in combo})
+                    return client.get('/games' + (f'?{query}' if query else ''))
+                scenarios[f"games[{'+'.join(combo) or 'all'}]"] = run
+    if 'game_detail' in names:
+        scenarios['game_detail'] = lambda client, rng: client.get(f"/game/{rng.choice(context['game_ids'])}")
+    if 'seller_detail' in names:
+        scenarios['seller_detail'] = lambda client, rng: client.get(f"/seller/{rng.choice(context['seller_ids'])}")
+    if 'upload' in names:
+        def upload(client, rng):
+            return client.post(f'/game/{client.owned_game}/add-images', {},
+                               {'images': (f'bench-{rng.getrandbits(32)}.png', random_png(rng))})
+        scenarios['upload'] = upload
+    return scenarios
+
+def run_scenario(name, action, make_client, clients, requests_per_scenario, context, seed):
+    per_client = max(1, requests_per_scenario // clients)
+
+    def worker(index):
+        rng = random.Random(f'{seed}-{name}-{index}')
+        client = make_client()
+        if name == 'upload':
+            client.owned_game, username = context['owned_games'][index % len(context['owned_games'])]
+            from benchmarks.seed import SELLER_PASSWORD
+            client.post('/login', {'username': username, 'password': SELLER_PASSWORD})
+        action(client, rng)  # warm-up, not measured
+        latencies, errors = [], 0
+        for _ in range(per_client):
+            started = time.perf_counter()
+            status = action(client, rng)
+            latencies.append(time.perf_counter() - started)
+            if status >= 400:
+                errors += 1
+        return latencies, errors
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        results = list(pool.map(worker, range(clients)))
+    wall = time.perf_counter() - started
+
+    latencies = sorted(latency for result in results for latency in result[0])
+    return {
+        'requests': len(latencies),
+        'errors': sum(result[1] for result in results),
+        'throughput_rps': round(len(latencies) / wall, 2),
+        'mean_ms': round(sum(latencies) / len(latencies) * 1000, 3),
+        'p50_ms': round(percentile(latencies, 50) * 1000, 3),
+        'p95_ms': round(percentile(latencies, 95) * 1000, 3),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 3),
+    }
+
+def peak_rss_mb():
+    # ru_maxrss is KiB on Linux and bytes on macOS
+    scale = 1024 * 1024 if sys.platform == 'darwin' else 1024
+    return {
+        'self': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale, 1),
+        'children': round(resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / scale, 1),
+    }
+
+def git_revision():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=PROJECT_DIR,
+                                       stderr=subprocess.DEVNULL).decode().strip()
+    except Exception:
+        return None
+
+def run(args):
+    sys.path.insert(0, PROJECT_DIR)
+    if args.url and args.backend == 'mongomock':
+        sys.exit("❌ --url needs --backend mongodb: the server must read the catalog seeded here")
+    if args.backend == 'mongomock':
+        try:
+            import mongomock
+        except ImportError:
+            sys.exit("❌ mongomock is not installed: pip install mongomock, or use --backend mongodb")
+        import pymongo
+        pymongo.MongoClient = mongomock.MongoClient
+        os.environ['MONGODB_URI'] = 'mongodb://localhost'
+    elif args.mongo_uri:
+        os.environ['MONGODB_URI'] = args.mongo_uri
+
+    from config import Config
+    # Never seed over the real catalog
+    Config.DATABASE_NAME = args.database
+
+    # Uploads and disk caches land in a scratch directory, not the checkout
+    workdir = tempfile.mkdtemp(prefix='retro-bench-') if not args.url else None
+    if workdir:
+        os.chdir(workdir)
+
+    try:
+        if not args.skip_seed:
+            from benchmarks.seed import seed_catalog
+            seed_catalog(args.size, seed=args.seed)
+        context = load_context()
+
+        if args.url:
+            make_client = lambda: HttpClient(args.url)
+        else:
+            from app import app, bootstrap
+            from utils.page_cache import page_cache
+            if args.no_page_cache:
+                page_cache.backend = None
+            bootstrap()
+            make_client = lambda: InProcessClient(app)
+
+        scenarios = build_scenarios(args.scenarios.split(','), context)
+        results = {}
+        for name, action in scenarios.items():
+            results[name] = run_scenario(name, action, make_client, args.clients, args.requests, context, args.seed)
+            print(f"✅ {name}: p50 {results[name]['p50_ms']} ms, p95 {results[name]['p95_ms']} ms, "
+                  f"{results[name]['throughput_rps']} req/s")
+    finally:
+        if workdir:
+            from utils.image_pipeline import image_pipeline
+            image_pipeline.shutdown()
+            os.chdir(PROJECT_DIR)
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {
+        'meta': {
+            'revision': git_revision(),
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'backend': args.backend,
+            'target': args.url or 'in-process',
+            'size': args.size,
+            'clients': args.clients,
+            'requests_per_scenario': args.requests,
+            'page_cache': not args.no_page_cache,
+        },
+        'peak_rss_mb': peak_rss_mb(),
+        'scenarios': results,
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+        print(f"📊 Results written to {args.output}")
+    else:
+        print(output)
+
+def compare(args):
+    """Flag scenarios whose p95 latency rose or throughput fell by more than the threshold"""
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.candidate) as f:
+        candidate = json.load(f)
+
+    def change(old, new):
+        return (new - old) / old * 100 if old else 0.0
+
+    regressions = []
+    print(f"{'scenario':32} {'p50 %':>8} {'p95 %':>8} {'p99 %':>8} {'req/s %':>8}")
+    for name, new in candidate['scenarios'].items():
+        old = baseline['scenarios'].get(name)
+        if old is None:
+            print(f"{name:32} (new)")
+            continue
+        deltas = {key: change(old[key], new[key]) for key in ('p50_ms', 'p95_ms', 'p99_ms', 'throughput_rps')}
+        regressed = deltas['p95_ms'] > args.threshold or -deltas['throughput_rps'] > args.threshold
+        if regressed:
+            regressions.append(name)
+        print(f"{name:32} {deltas['p50_ms']:8.1f} {deltas['p95_ms']:8.1f} {deltas['p99_ms']:8.1f} "
+              f"{deltas['throughput_rps']:8.1f}{'  ❌ REGRESSION' if regressed else ''}")
+
+    old_rss, new_rss = baseline['peak_rss_mb']['self'], candidate['peak_rss_mb']['self']
+    print(f"peak RSS: {old_rss} MB -> {new_rss} MB ({change(old_rss, new_rss):+.1f}%)")
+    if regressions:
+        print(f"❌ {len(regressions)} regression(s) over {args.threshold}%: {', '.join(regressions)}")
+        return 1
+    print("✅ No regressions")
+    return 0
+
+def main():
+    parser = argparse.ArgumentParser(description='Retro Games Marketplace benchmarks')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = commands.add_parser('run', help='seed a catalog and load-test the routes')
+    run_parser.add_argument('--size', type=int, default=1000, help='games to seed (e.g. 1000, 100000, 1000000)')
+    run_parser.add_argument('--clients', type=int, default=8, help='concurrent clients')
+    run_parser.add_argument('--requests', type=int, default=200, help='requests per scenario')
+    run_parser.add_argument('--backend', choices=('mongomock', 'mongodb'), default='mongomock')
+    run_parser.add_argument('--mongo-uri', help='MongoDB to seed when --backend mongodb (default: MONGODB_URI)')
+    run_parser.add_argument('--database', default=BENCHMARK_DATABASE, help='database to seed and query')
+    run_parser.add_argument('--url', help='benchmark a running server instead of the in-process app')
+    run_parser.add_argument('--scenarios', default=','.join(DEFAULT_SCENARIOS))
+    run_parser.add_argument('--no-page-cache', action='store_true', help='measure uncached rendering')
+    run_parser.add_argument('--skip-seed', action='store_true', help='reuse the catalog from a previous run')
+    run_parser.add_argument('--seed', type=int, default=42, help='random seed for data and request mix')
+    run_parser.add_argument('--output', help='write the JSON report here instead of stdout')
+
+    compare_parser = commands.add_parser('compare', help='compare two JSON reports')
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('candidate')
+    compare_parser.add_argument('--threshold', type=float, default=10.0, help='allowed change in percent')
+
+    args = parser.parse_args()
+    if args.command == 'run':
+        run(args)
+    else:
+        sys.exit(compare(args))
+
+if __name__ == '__main__':
+    main()
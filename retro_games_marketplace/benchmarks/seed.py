@@ -0,0 +1,84 @@
+# benchmarks/seed.py - synthetic catalogs shaped like init_sample_data
+import hashlib
+import random
+from datetime import datetime, timedelta
+from models.collections import (CONDITIONS, RARITIES, home_feed_db, listing_counts_db, listing_view_db,
+                                price_rollups_db, seller_stats_db)
+from models.database import db_instance
+
+CONSOLES = [
+    "Nintendo Entertainment System", "Super Nintendo", "Nintendo 64", "GameCube",
+    "Sega Genesis", "Sega Saturn", "Sega Dreamcast", "PlayStation", "PlayStation 2",
+    "Game Boy", "Game Boy Advance"
+]
+CITIES = ["Mumbai", "Delhi", "Pune", "Solapur", "Kolhapur", "Nagpur", "Bengaluru", "Chennai"]
+TITLE_WORDS = [
+    "Super", "Mario", "Zelda", "Sonic", "Metal", "Gear", "Final", "Fantasy", "Street",
+    "Fighter", "Kart", "Quest", "Legend", "Castle", "Star", "Racing", "Kong", "Crash"
+]
+
+# Every seeded seller logs in with this password
+SELLER_PASSWORD = "benchmark"
+GAMES_PER_SELLER = 20
+BATCH_SIZE = 10000
+
+def _seller(index, salt, password_hash, now):
+    return {
+        "username": f"bench_seller_{index}",
+        "email": f"bench{index}@example.com",
+        "password_hash": password_hash,
+        "password_salt": salt,
+        "rating": round(random.uniform(3.5, 5.0), 1),
+        "total_sales": random.randint(0, 500),
+        "member_since": now - timedelta(days=random.randint(0, 2000)),
+        "location": f"{random.choice(CITIES)}, India",
+        "bio": "Synthetic benchmark seller.",
+        "shipping_info": "Ships India-wide",
+        "response_time": "Within 2 hours",
+        "contact_number": "+91 90000 00000"
+    }
+
+def _game(console_ids, seller_ids, now):
+    title = " ".join(random.sample(TITLE_WORDS, 3))
+    return {
+        "title": title,
+        "console_id": random.choice(console_ids),
+        "condition": random.choice(CONDITIONS),
+        "rarity": random.choice(RARITIES),
+        "price": random.randint(199, 19999),
+        "description": f"{title} - tested and working, synthetic benchmark listing.",
+        "seller_id": random.choice(seller_ids),
+        "date_listed": now - timedelta(seconds=random.randint(0, 365 * 24 * 3600)),
+        "images": []
+    }
+
+def seed_catalog(size, seed=42):
+    """Replace the catalog with `size` synthetic games. Deterministic for a given seed."""
+    random.seed(seed)
+    db = db_instance.db
+    for name in ("games", "sellers", "consoles", "listing_view", "image_blobs", "seller_stats",
+                 "listing_counts", "price_rollups", "home_feed"):
+        db[name].delete_many({})
+
+    now = datetime.now()
+    console_ids = db.consoles.insert_many([{"name": name} for name in CONSOLES]).inserted_ids
+
+    salt = "benchmark-salt"
+    password_hash = hashlib.sha256((SELLER_PASSWORD + salt).encode()).hexdigest()
+    seller_count = max(1, size // GAMES_PER_SELLER)
+    seller_ids = []
+    for start in range(0, seller_count, BATCH_SIZE):
+        batch = [_seller(i, salt, password_hash, now) for i in range(start, min(seller_count, start + BATCH_SIZE))]
+        seller_ids += db.sellers.insert_many(batch).inserted_ids
+
+    for start in range(0, size, BATCH_SIZE):
+        batch = [_game(console_ids, seller_ids, now) for _ in range(min(BATCH_SIZE, size - start))]
+        db.games.insert_many(batch, ordered=False)
+        print(f"🔄 Seeded {start + len(batch)}/{size} games")
+
+    listing_view_db.rebuild()
+    seller_stats_db.reconcile()
+    listing_counts_db.rebuild()
+    price_rollups_db.rebuild()
+    home_feed_db.refresh()
+    print(f"✅ Seeded {size} games, {seller_count} sellers, {len(console_ids)} consoles")
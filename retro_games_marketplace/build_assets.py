@@ -0,0 +1,6 @@
+# build_assets.py - fingerprint and precompress static files; run on every deploy
+from utils.assets import build_assets
+
+if __name__ == "__main__":
+    manifest = build_assets()
+    print(f"✅ Fingerprinted {len(manifest)} static files into static/dist")
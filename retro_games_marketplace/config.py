@@ -1,5 +1,6 @@
 # config.py
 import os
+import socket
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -9,7 +10,126 @@ class Config:
     SECRET_KEY = os.getenv('SECRET_KEY', 'dev-secret-key')
     DATABASE_NAME = 'retro_games_marketplace'
     
+    # 'production' skips sample data seeding unless SEED_SAMPLE_DATA is set
+    APP_ENV = os.getenv('APP_ENV', 'development')
+    SEED_SAMPLE_DATA = os.getenv('SEED_SAMPLE_DATA', '1' if APP_ENV != 'production' else '0').lower() in ('1', 'true', 'yes')
+    
+    # MongoClient connection pool, created lazily in each worker process
+    MONGO_MAX_POOL_SIZE = int(os.getenv('MONGO_MAX_POOL_SIZE', 50))
+    MONGO_MIN_POOL_SIZE = int(os.getenv('MONGO_MIN_POOL_SIZE', 0))
+    MONGO_MAX_IDLE_TIME_MS = int(os.getenv('MONGO_MAX_IDLE_TIME_MS', 60000))
+    MONGO_WAIT_QUEUE_TIMEOUT_MS = int(os.getenv('MONGO_WAIT_QUEUE_TIMEOUT_MS', 2000))
+    MONGO_SERVER_SELECTION_TIMEOUT_MS = int(os.getenv('MONGO_SERVER_SELECTION_TIMEOUT_MS', 5000))
+    MONGO_READ_PREFERENCE = os.getenv('MONGO_READ_PREFERENCE', 'primary')
+    MONGO_COMPRESSORS = os.getenv('MONGO_COMPRESSORS', 'zlib')  # e.g. 'zstd,snappy,zlib'
+    
+    # Browse reads (catalog, seller pages, consoles) may go to secondaries; 'primary' turns this off.
+    # The server rejects a max staleness under 90 seconds.
+    CATALOG_READ_PREFERENCE = os.getenv('CATALOG_READ_PREFERENCE', 'secondaryPreferred')
+    CATALOG_MAX_STALENESS_SECONDS = int(os.getenv('CATALOG_MAX_STALENESS_SECONDS', 90))
+    # A seller who just wrote reads from the primary for this long, so they see their own changes
+    STICKY_PRIMARY_SECONDS = int(os.getenv('STICKY_PRIMARY_SECONDS', 15))
+    # How long after a write a catalog read may still miss it; caches refilled in that window expire at its end
+    CATALOG_LAG_SECONDS = 0 if CATALOG_READ_PREFERENCE == 'primary' else CATALOG_MAX_STALENESS_SECONDS
+    
+    # Server-side sessions: 'sqlite' (shared by a host's workers) or 'memory' (single process)
+    SESSION_BACKEND = os.getenv('SESSION_BACKEND', 'sqlite')
+    SESSION_SQLITE_PATH = os.getenv('SESSION_SQLITE_PATH', 'cache/sessions.sqlite3')
+    SESSION_TTL_SECONDS = int(os.getenv('SESSION_TTL_SECONDS', 7 * 24 * 3600))  # sliding, renewed on use
+    # Sessions without a login only carry flash messages across a redirect
+    SESSION_ANONYMOUS_TTL_SECONDS = int(os.getenv('SESSION_ANONYMOUS_TTL_SECONDS', 600))
+    SESSION_PURGE_SECONDS = int(os.getenv('SESSION_PURGE_SECONDS', 3600))
+    
+    # Change watcher: invalidates caches on writes from any process or script
+    CHANGE_WATCHER_ENABLED = os.getenv('CHANGE_WATCHER_ENABLED', '1').lower() in ('1', 'true', 'yes')
+    CHANGE_WATCHER_ID = os.getenv('CHANGE_WATCHER_ID', socket.gethostname())  # resume state key, shared by a host's workers
+    CHANGE_TOKEN_SAVE_SECONDS = int(os.getenv('CHANGE_TOKEN_SAVE_SECONDS', 5))
+    CHANGE_POLL_SECONDS = int(os.getenv('CHANGE_POLL_SECONDS', 5))  # when change streams are unavailable
+    CHANGE_RETRY_SECONDS = int(os.getenv('CHANGE_RETRY_SECONDS', 5))
+    
+    # Async views: 'motor' runs their queries on Motor, 'threads' on the sync client in a thread pool
+    ASYNC_DRIVER = os.getenv('ASYNC_DRIVER', 'motor')
+    ASYNC_THREADS = int(os.getenv('ASYNC_THREADS', 16))
+    
+    # Per-command timings for /metrics and the Server-Timing header
+    DB_METRICS_ENABLED = os.getenv('DB_METRICS_ENABLED', '1').lower() in ('1', 'true', 'yes')
+    SLOW_QUERY_MS = int(os.getenv('SLOW_QUERY_MS', 100))  # slower queries are logged with their plan
+    
+    # Catalog pagination
+    GAMES_PER_PAGE = int(os.getenv('GAMES_PER_PAGE', 24))
+    FEATURED_GAMES_LIMIT = 6
+    
+    # Precomputed home page feed: rebuilt on this schedule and after new listings
+    HOME_FEED_REFRESH_SECONDS = int(os.getenv('HOME_FEED_REFRESH_SECONDS', 300))
+    HOME_FEED_MIN_REFRESH_SECONDS = int(os.getenv('HOME_FEED_MIN_REFRESH_SECONDS', 30))  # between triggered rebuilds
+    HOME_FEED_SNAPSHOT_SECONDS = int(os.getenv('HOME_FEED_SNAPSHOT_SECONDS', 15))  # per-worker copy
+    HOME_FEED_RAIL_SIZE = int(os.getenv('HOME_FEED_RAIL_SIZE', 4))
+    HOME_FEED_CONSOLE_RAILS = int(os.getenv('HOME_FEED_CONSOLE_RAILS', 3))
+    
+    # Price guide and /market, read from the daily price_rollups
+    PRICE_GUIDE_DAYS = int(os.getenv('PRICE_GUIDE_DAYS', 180))
+    MARKET_DAYS = int(os.getenv('MARKET_DAYS', 30))
+    MARKET_TOP_TITLES = int(os.getenv('MARKET_TOP_TITLES', 25))
+    
+    # In-process cache for consoles and seller lookups
+    CACHE_TTL_SECONDS = int(os.getenv('CACHE_TTL_SECONDS', 60))
+    CACHE_MAX_ENTRIES = int(os.getenv('CACHE_MAX_ENTRIES', 1024))
+    FACET_CACHE_TTL_SECONDS = int(os.getenv('FACET_CACHE_TTL_SECONDS', 30))
+    
+    # Rendered catalog pages for anonymous visitors: 'memory', 'disk' or 'none'
+    PAGE_CACHE_BACKEND = os.getenv('PAGE_CACHE_BACKEND', 'memory')
+    PAGE_CACHE_TTL_SECONDS = int(os.getenv('PAGE_CACHE_TTL_SECONDS', 300))
+    PAGE_CACHE_DIR = os.getenv('PAGE_CACHE_DIR', 'cache/pages')
+    
+    # seller_stats are kept current incrementally; one worker per deployment recomputes them from games this often
+    SELLER_STATS_RECONCILE_SECONDS = int(os.getenv('SELLER_STATS_RECONCILE_SECONDS', 900))
+    
+    # After startup fails (database down), requests skip retrying it for this long
+    BOOTSTRAP_RETRY_SECONDS = int(os.getenv('BOOTSTRAP_RETRY_SECONDS', 10))
+    
+    # gunicorn refuses to start if a catalog query shape is not index-backed (see gunicorn.conf.py)
+    VERIFY_QUERY_PLANS = os.getenv('VERIFY_QUERY_PLANS', '').lower() in ('1', 'true', 'yes')
+    
+    # Password hashing (scrypt) on a bounded worker pool
+    SCRYPT_N = 2 ** 14
+    SCRYPT_R = 8
+    SCRYPT_P = 1
+    PASSWORD_HASH_WORKERS = int(os.getenv('PASSWORD_HASH_WORKERS', 2))
+    PASSWORD_HASH_MAX_PENDING = int(os.getenv('PASSWORD_HASH_MAX_PENDING', 16))  # running plus queued
+    PASSWORD_HASH_TIMEOUT = 5  # seconds to wait for a slot or a result
+    
+    # Login attempts: a burst, then one more every N seconds, per username and per IP
+    LOGIN_USER_BURST = int(os.getenv('LOGIN_USER_BURST', 5))
+    LOGIN_USER_REFILL_SECONDS = float(os.getenv('LOGIN_USER_REFILL_SECONDS', 12))
+    LOGIN_IP_BURST = int(os.getenv('LOGIN_IP_BURST', 20))
+    LOGIN_IP_REFILL_SECONDS = float(os.getenv('LOGIN_IP_REFILL_SECONDS', 3))
+    # Reverse proxies in front of the app whose X-Forwarded-For/-Proto are trusted (1 behind nginx).
+    # Off by default: with clients connecting directly, the header is theirs to forge.
+    PROXY_FIX_HOPS = int(os.getenv('PROXY_FIX_HOPS', 0))
+    
+    # Static assets: build_assets.py writes fingerprinted copies to static/dist
+    STATIC_FOLDER = 'static'
+    ASSET_DIST_DIR = 'dist'
+    # '' serves uploads from Python; 'x-accel' (nginx) or 'x-sendfile' hands them to the proxy
+    STATIC_SENDFILE = os.getenv('STATIC_SENDFILE', '').lower()
+    X_ACCEL_UPLOADS_PREFIX = os.getenv('X_ACCEL_UPLOADS_PREFIX', '/_uploads/')
+    
     # Image upload settings
     UPLOAD_FOLDER = 'static/uploads'
-    MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB max file size
-    ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'webp'}
\ No newline at end of file
+    MAX_UPLOAD_FILE_SIZE = 5 * 1024 * 1024  # 5MB per image
+    MAX_UPLOAD_REQUEST_SIZE = 16 * 1024 * 1024  # 16MB of images per request
+    MAX_CONTENT_LENGTH = MAX_UPLOAD_REQUEST_SIZE + 64 * 1024  # images plus form fields
+    MAX_IMAGE_PIXELS = 40_000_000  # checked from the header before decoding
+    IMAGE_MASTER_MAX_PX = 2048  # stored images are downscaled to fit this box
+    ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'webp'}
+    
+    # Raw uploads wait here (outside static/) until the image pipeline processes them
+    UPLOAD_STAGING_FOLDER = 'uploads/incoming'
+    IMAGE_WORKERS = int(os.getenv('IMAGE_WORKERS', 2))
+    IMAGE_PROCESSING_TIMEOUT = 600  # seconds before an unfinished image is requeued
+    IMAGE_FETCH_WORKERS = int(os.getenv('IMAGE_FETCH_WORKERS', 4))  # threads downloading imported image URLs
+    IMAGE_FETCH_TIMEOUT = 15  # seconds per image URL
+    
+    # Bulk listing import
+    IMPORT_BATCH_SIZE = int(os.getenv('IMPORT_BATCH_SIZE', 500))  # games per insert_many
+    IMPORT_MAX_ROWS = int(os.getenv('IMPORT_MAX_ROWS', 5000))
\ No newline at end of file
@@ -5,7 +5,9 @@ def create_upload_dirs():
     """Create necessary upload directories"""
     directories = [
         'static/uploads/games',
-        'static/uploads/thumbnails'
+        'static/uploads/thumbnails',
+        'static/uploads/variants',
+        'uploads/incoming'
     ]
     
     for directory in directories:
@@ -0,0 +1,47 @@
+# gunicorn.conf.py - production server: gunicorn -c gunicorn.conf.py app:app
+import multiprocessing
+import os
+import subprocess
+import sys
+
+bind = os.getenv('BIND', '0.0.0.0:5000')
+
+# Behind a reverse proxy, set PROXY_FIX_HOPS to its hop count (1 for a single
+# nginx) so the app trusts X-Forwarded-For; it stays 0 when serving clients directly
+
+# Threaded workers: a request waiting on MongoDB, an upload or a slow client
+# holds one thread rather than a whole process. workers x threads is the
+# number of requests in flight; keep it within MONGO_MAX_POOL_SIZE per worker.
+worker_class = 'gthread'
+workers = int(os.getenv('WEB_WORKERS', multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.getenv('WEB_THREADS', 32))
+
+timeout = int(os.getenv('WEB_TIMEOUT', 60))
+graceful_timeout = 30
+keepalive = 5
+
+# Recycle workers now and then so slow leaks cannot grow without bound
+max_requests = int(os.getenv('WEB_MAX_REQUESTS', 2000))
+max_requests_jitter = 200
+
+# The MongoClient, worker pools and background threads are created lazily
+# per process, so loading the app once before forking is safe
+preload_app = True
+
+accesslog = '-'
+errorlog = '-'
+loglevel = os.getenv('LOG_LEVEL', 'info')
+
+def on_starting(server):
+    """With VERIFY_QUERY_PLANS set, refuse to start when a catalog query shape is not index-backed.
+
+    Runs manage_indexes.py verify in a child process, so the master never
+    opens a MongoClient it would hand to forked workers.
+    """
+    from config import Config  # the app, and with it config, is loaded by now
+
+    if not Config.VERIFY_QUERY_PLANS:
+        return
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'manage_indexes.py')
+    if subprocess.run([sys.executable, script, 'verify']).returncode != 0:
+        raise RuntimeError("Catalog queries fall back to COLLSCAN, run: python manage_indexes.py verify")
@@ -0,0 +1,41 @@
+# import_listings.py - bulk import or export a seller's listings
+import sys
+from models.collections import sellers_db
+from utils.image_pipeline import image_pipeline
+from utils.listing_import import ListingImporter, detect_format, export_rows
+
+USAGE = """Usage:
+  python import_listings.py import <username> <listings.csv|.jsonl> [images.zip]
+  python import_listings.py export <username> [csv|jsonl] > listings.csv"""
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3 or sys.argv[1] not in ("import", "export"):
+        print(USAGE)
+        sys.exit(2)
+
+    seller = sellers_db.get_seller_by_username(sys.argv[2])
+    if not seller:
+        print(f"❌ No seller named {sys.argv[2]}")
+        sys.exit(1)
+
+    if sys.argv[1] == "export":
+        fmt = sys.argv[3] if len(sys.argv) > 3 else "csv"
+        for chunk in export_rows(seller["_id"], fmt):
+            sys.stdout.write(chunk)
+        sys.exit(0)
+
+    if len(sys.argv) < 4 or detect_format(sys.argv[3]) is None:
+        print(USAGE)
+        sys.exit(2)
+    images_zip = open(sys.argv[4], "rb") if len(sys.argv) > 4 else None
+    with open(sys.argv[3], "rb") as listings:
+        report = ListingImporter(seller["_id"]).run(listings, detect_format(sys.argv[3]), images_zip)
+    if images_zip:
+        images_zip.close()
+    for result in report["rows"]:
+        if result["status"] == "error":
+            print(f"❌ Row {result['row']}: {'; '.join(result['errors'])}")
+    print(f"✅ Imported {report['imported']} listings, {report['failed']} failed")
+    # Wait for queued images before the process exits
+    image_pipeline.shutdown()
+    sys.exit(1 if report["failed"] else 0)
@@ -0,0 +1,14 @@
+# manage_indexes.py - create indexes and check query plans
+import sys
+from models.indexes import ensure_indexes, verify_query_plans
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else "ensure"
+    if command == "ensure":
+        sys.exit(1 if ensure_indexes() else 0)
+    elif command == "verify":
+        ensure_indexes()
+        sys.exit(1 if verify_query_plans() else 0)
+    else:
+        print("Usage: python manage_indexes.py [ensure|verify]")
+        sys.exit(2)
@@ -1,5 +1,5 @@
 # models/__init__.py
-from .collections import games_db, sellers_db, consoles_db
+from .collections import games_db, sellers_db, consoles_db, listing_view_db, listing_counts_db
 from .database import db_instance
 from bson.objectid import ObjectId
 from datetime import datetime
@@ -27,6 +27,7 @@ def init_sample_data():
         
         if existing_games > 0 or existing_sellers > 0:
             print("✅ Database already has data, skipping initialization")
+            listing_view_db.ensure_built()
             _SAMPLE_DATA_INITIALIZED = True
             return
         
@@ -333,6 +334,8 @@ def init_sample_data():
         
         db.games.insert_many(all_games)
         print(f"✅ Added {len(all_games)} games")
+        listing_view_db.rebuild()
+        listing_counts_db.rebuild()
         
         _SAMPLE_DATA_INITIALIZED = True
         print("🎮 Sample data initialization COMPLETE!")
@@ -0,0 +1,304 @@
+# models/async_collections.py
+import asyncio
+import contextvars
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial, wraps
+from bson.objectid import ObjectId
+from config import Config
+from .database import db_instance, reads_pinned, catalog_read_preference
+from .listing_card import ListingCard, CARD_PROJECTION
+from .collections import (games_db, sellers_db, consoles_db, seller_stats_db, price_rollups_db,
+                          listing_counts_db, console_cache, seller_cache, facet_cache)
+from utils.db_metrics import instrumented
+
+try:
+    from motor.motor_asyncio import AsyncIOMotorClient
+except ImportError:  # Motor is optional; without it the sync client runs on a thread pool
+    AsyncIOMotorClient = None
+
+class AsyncDatabase:
+    """Event loop thread that runs the async data layer for this process.
+
+    Flask runs each async view on a fresh event loop, but a Motor client is
+    bound to the loop it was created on. So the client lives on one
+    long-lived loop per process, and views hand their queries to it with
+    gather(). Like Database.client, it is rebuilt after a fork.
+    """
+    def __init__(self):
+        self._loop = None
+        self._pid = None
+        self._client = None
+        self._catalog = None
+        self._executor = None
+        self._lock = threading.Lock()
+
+    @property
+    def uses_motor(self):
+        return AsyncIOMotorClient is not None and Config.ASYNC_DRIVER == 'motor'
+
+    def _get_loop(self):
+        with self._lock:
+            if self._loop is None or self._pid != os.getpid():
+                self._loop = asyncio.new_event_loop()
+                self._client = None
+                self._catalog = None
+                self._executor = ThreadPoolExecutor(max_workers=Config.ASYNC_THREADS, thread_name_prefix='async-db')
+                self._pid = os.getpid()
+                threading.Thread(target=self._loop.run_forever, name='async-db', daemon=True).start()
+                print(f"🔄 Async data loop started for process {self._pid} "
+                      f"({'motor' if self.uses_motor else 'thread pool'})")
+            return self._loop
+
+    @property
+    def db(self):
+        """Motor database; only used from coroutines running on the data loop"""
+        if self._client is None:
+            self._client = AsyncIOMotorClient(Config.MONGODB_URI, io_loop=self._loop,
+                                              **db_instance.client_options())
+            self._catalog = self._client.get_database(Config.DATABASE_NAME,
+                                                      read_preference=catalog_read_preference())
+        return self._client[Config.DATABASE_NAME]
+
+    @property
+    def catalog(self):
+        """Motor counterpart of db_instance.catalog"""
+        db = self.db
+        return db if reads_pinned() else self._catalog
+
+    async def to_thread(self, fn, *args, **kwargs):
+        """Run a sync collection method on the pool, keeping the caller's contextvars"""
+        context = contextvars.copy_context()
+        return await asyncio.get_running_loop().run_in_executor(
+            self._executor, partial(context.run, fn, *args, **kwargs))
+
+    async def gather(self, *coros):
+        """Run coroutines concurrently on the data loop and return their results in order.
+
+        Can be awaited from any event loop. The request's contextvars (its
+        DB metrics) go with the queries onto the data loop.
+        """
+        loop = self._get_loop()
+        context = contextvars.copy_context()
+
+        async def run_all():
+            return await asyncio.gather(*[context.run(asyncio.ensure_future, coro) for coro in coros])
+
+        return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(run_all(), loop))
+
+def sync_fallback(method):
+    """Without Motor, run the sync collection's method of the same name on the pool instead"""
+    @wraps(method)
+    async def wrapper(self, *args, **kwargs):
+        if not async_db.uses_motor:
+            return await async_db.to_thread(getattr(self.sync, method.__name__), *args, **kwargs)
+        return await method(self, *args, **kwargs)
+    return wrapper
+
+async def resolved(value):
+    """An awaitable for a value that is already known, to keep a gather() call uniform"""
+    return value
+
+@instrumented
+class AsyncGameCollection:
+    """Async mirror of GameCollection's read methods; queries are built by games_db"""
+    sync = games_db
+
+    @property
+    def collection(self):
+        return async_db.db.games
+
+    @property
+    def listing_view(self):
+        return async_db.catalog.listing_view
+
+    async def _paginated_find(self, query, limit=None, after=None, before=None, sort="newest", offset=0,
+                              projection=None):
+        results, reversed_order = games_db._paginated_cursor(query, limit, after, before, sort, offset,
+                                                             projection, collection=self.listing_view)
+        games = await results.to_list(length=None)
+        if reversed_order:
+            games.reverse()
+        return games
+
+    @sync_fallback
+    async def get_all_games(self, limit=None, after=None, before=None):
+        try:
+            return await self._paginated_find({}, limit, after, before)
+        except Exception as e:
+            print(f"Error getting games: {e}")
+            return []
+
+    @sync_fallback
+    async def get_games_page(self, filters=None, limit=24, after=None, before=None):
+        try:
+            query, page, finish = games_db._page_plan(filters or {}, limit, after, before)
+            return finish(await self._paginated_find(query, **page))
+        except Exception as e:
+            print(f"Error getting games page: {e}")
+            return {"games": [], "next_cursor": None, "prev_cursor": None}
+
+    @sync_fallback
+    async def get_card_page(self, filters=None, limit=24, after=None, before=None):
+        try:
+            query, page, finish = games_db._page_plan(filters or {}, limit, after, before, CARD_PROJECTION)
+            result = finish(await self._paginated_find(query, **page))
+            result["games"] = ListingCard.from_docs(result["games"])
+            return result
+        except Exception as e:
+            print(f"Error getting games page: {e}")
+            return {"games": [], "next_cursor": None, "prev_cursor": None}
+
+    @sync_fallback
+    async def get_facets(self, filters):
+        key = games_db.facet_cache_key(filters)
+        cached = facet_cache.get(key)
+        if cached is not None:
+            return cached
+        try:
+            counts = None
+            if not key:
+                counts = games_db._unfiltered_counts(
+                    await async_db.catalog.listing_counts.find_one({"_id": listing_counts_db.COUNTS_ID}))
+            if counts is None:
+                rows = await self.listing_view.aggregate(games_db._facet_pipeline(filters)).to_list(length=1)
+                counts = games_db._facet_counts(rows[0] if rows else {})
+            facet_cache.set(key, counts)
+            return counts
+        except Exception as e:
+            print(f"Error getting search facets: {e}")
+            return games_db._facet_counts({})
+
+    @sync_fallback
+    async def get_game_by_id(self, game_id):
+        try:
+            return await self.listing_view.find_one({"_id": ObjectId(game_id)})
+        except Exception as e:
+            print(f"Error getting game {game_id}: {e}")
+            return None
+
+    @sync_fallback
+    async def is_game_owner(self, game_id, seller_id):
+        try:
+            game = await self.collection.find_one(
+                {"_id": ObjectId(game_id), "seller_id": ObjectId(seller_id)}, {"_id": 1}
+            )
+            return game is not None
+        except Exception as e:
+            print(f"Error checking game ownership: {e}")
+            return False
+
+@instrumented
+class AsyncSellerCollection:
+    """Async mirror of SellerCollection's read methods"""
+    sync = sellers_db
+
+    @property
+    def collection(self):
+        return async_db.catalog.sellers
+
+    @sync_fallback
+    async def get_all_sellers(self):
+        try:
+            sellers = await async_db.catalog.seller_stats.find().sort("rating", -1).to_list(length=None)
+            if sellers:
+                return [seller_stats_db._with_averages(doc) for doc in sellers]
+            # Stats not built yet
+            return await self.collection.find().sort("rating", -1).to_list(length=None)
+        except Exception as e:
+            print(f"Error getting sellers: {e}")
+            return []
+
+    @sync_fallback
+    async def get_seller_by_id(self, seller_id):
+        try:
+            cached = None if reads_pinned() else seller_cache.get(str(seller_id))
+            if cached is not None:
+                return dict(cached)
+            seller = await self.collection.find_one({"_id": ObjectId(seller_id)})
+            if seller:
+                seller_cache.set(str(seller_id), seller)
+                return dict(seller)
+            return None
+        except Exception as e:
+            print(f"Error getting seller {seller_id}: {e}")
+            return None
+
+    @sync_fallback
+    async def get_seller_games(self, seller_id):
+        try:
+            return await async_db.catalog.listing_view.find(
+                {"seller_id": ObjectId(seller_id)}
+            ).sort([("date_listed", -1), ("_id", -1)]).to_list(length=None)
+        except Exception as e:
+            print(f"Error getting seller games: {e}")
+            return []
+
+    @sync_fallback
+    async def get_seller_cards(self, seller_id):
+        try:
+            return ListingCard.from_docs(await async_db.catalog.listing_view.find(
+                {"seller_id": ObjectId(seller_id)}, CARD_PROJECTION
+            ).sort([("date_listed", -1), ("_id", -1)]).to_list(length=None))
+        except Exception as e:
+            print(f"Error getting seller games: {e}")
+            return []
+
+    async def get_stats(self, seller_id):
+        """seller_stats document for one seller, as seller_stats_db.get returns it"""
+        if not async_db.uses_motor:
+            return await async_db.to_thread(seller_stats_db.get, seller_id)
+        try:
+            doc = await async_db.catalog.seller_stats.find_one({"_id": ObjectId(seller_id)})
+            return seller_stats_db._with_averages(doc) if doc else None
+        except Exception as e:
+            print(f"Error getting seller stats: {e}")
+            return None
+
+@instrumented
+class AsyncConsoleCollection:
+    """Async mirror of ConsoleCollection's read methods"""
+    sync = consoles_db
+
+    @property
+    def collection(self):
+        return async_db.catalog.consoles
+
+    @sync_fallback
+    async def get_all_consoles(self):
+        try:
+            consoles = console_cache.get("all")
+            if consoles is None:
+                consoles = await self.collection.find().sort("name", 1).to_list(length=None)
+                console_cache.set("all", consoles)
+            return list(consoles)
+        except Exception as e:
+            print(f"Error getting consoles: {e}")
+            return []
+
+@instrumented
+class AsyncPriceRollupCollection:
+    """Async mirror of PriceRollupCollection's price guide"""
+    sync = price_rollups_db
+
+    @property
+    def collection(self):
+        return async_db.catalog.price_rollups
+
+    @sync_fallback
+    async def get_price_guide(self, game, days=None):
+        days = days or Config.PRICE_GUIDE_DAYS
+        try:
+            rows = await self.collection.find(price_rollups_db._guide_query(game, days)).to_list(length=None)
+            return price_rollups_db._guide(rows, days)
+        except Exception as e:
+            print(f"Error getting price guide: {e}")
+            return None
+
+# Global instances
+async_db = AsyncDatabase()
+async_games_db = AsyncGameCollection()
+async_sellers_db = AsyncSellerCollection()
+async_consoles_db = AsyncConsoleCollection()
+async_price_rollups_db = AsyncPriceRollupCollection()
@@ -0,0 +1,164 @@
+# models/change_watcher.py
+import os
+import threading
+import time
+from datetime import datetime
+from pymongo.errors import OperationFailure, PyMongoError
+from config import Config
+from .database import db_instance
+from utils.invalidation import invalidation_bus
+
+# Server error codes: change streams need a replica set, and a resume token
+# that has fallen off the oplog cannot be resumed from
+UNSUPPORTED_CODES = {40573}
+HISTORY_LOST_CODES = {286, 280, 260}
+
+class ChangeWatcher:
+    """Publishes writes to games, sellers, consoles and the home feed on the invalidation bus.
+
+    Each worker process runs one on a daemon thread, started from bootstrap().
+    It follows a change stream on the database and saves the resume token
+    every few seconds, so a restarted process replays what it missed (the
+    disk page cache outlives the process). Without change streams, e.g. on
+    a standalone mongod, it polls each collection's updated_at high-water
+    mark, plus its document count to catch deletes and unstamped inserts.
+    """
+    COLLECTIONS = ("games", "sellers", "consoles", "home_feed")
+
+    def __init__(self, collections=COLLECTIONS):
+        self.collections = collections
+        self.mode = None
+        self._thread = None
+        self._pid = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        return db_instance.db.change_stream_state
+
+    def start(self):
+        with self._lock:
+            if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='change-watcher', daemon=True)
+            self._pid = os.getpid()
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _load_state(self):
+        try:
+            return self.state.find_one({"_id": Config.CHANGE_WATCHER_ID}) or {}
+        except PyMongoError as e:
+            print(f"❌ Error loading change watcher state: {e}")
+            return {}
+
+    def _save_state(self, fields):
+        try:
+            fields["saved_at"] = datetime.utcnow()
+            self.state.update_one({"_id": Config.CHANGE_WATCHER_ID}, {"$set": fields}, upsert=True)
+        except PyMongoError as e:
+            print(f"❌ Error saving change watcher state: {e}")
+
+    def _publish_all(self):
+        for name in self.collections:
+            invalidation_bus.publish(name)
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self._watch()
+            except OperationFailure as e:
+                if e.code in UNSUPPORTED_CODES:
+                    print(f"🔄 Change streams unavailable ({e.code}), polling updated_at instead")
+                    self._poll()
+                    return
+                if e.code in HISTORY_LOST_CODES:
+                    # Too far behind to resume: start afresh and assume everything changed
+                    print("🔄 Change stream resume token expired, starting a new stream")
+                    self._save_state({"resume_token": None})
+                    self._publish_all()
+                    continue
+                print(f"❌ Change stream failed: {e}")
+            except Exception as e:
+                print(f"❌ Change stream failed: {e}")
+            self._stop.wait(Config.CHANGE_RETRY_SECONDS)
+
+    def _watch(self):
+        token = self._load_state().get("resume_token")
+        pipeline = [{"$match": {"ns.coll": {"$in": list(self.collections)}}}]
+        with db_instance.db.watch(pipeline, resume_after=token, max_await_time_ms=1000) as stream:
+            if self.mode != "change_stream":
+                print(f"✅ Watching {', '.join(self.collections)} for changes"
+                      f"{' from saved resume token' if token else ''}")
+            self.mode = "change_stream"
+            saved, saved_at = token, 0
+            while not self._stop.is_set() and stream.alive:
+                change = stream.try_next()
+                if change is not None:
+                    operation = change["operationType"]
+                    name = change.get("ns", {}).get("coll")
+                    if operation in ("insert", "update", "replace", "delete"):
+                        invalidation_bus.publish(name, change.get("documentKey", {}).get("_id"))
+                    elif name and operation in ("drop", "rename"):
+                        invalidation_bus.publish(name)
+                    else:
+                        self._publish_all()
+                    if operation == "invalidate":
+                        # The stream is closed and cannot be resumed past this event
+                        self._save_state({"resume_token": None})
+                        return
+                token = stream.resume_token
+                if token and token != saved and time.monotonic() - saved_at >= Config.CHANGE_TOKEN_SAVE_SECONDS:
+                    self._save_state({"resume_token": token})
+                    saved, saved_at = token, time.monotonic()
+            if token and token != saved:
+                self._save_state({"resume_token": token})
+
+    def _snapshot(self, name):
+        """(latest updated_at, document count) for one collection"""
+        collection = db_instance.db[name]
+        latest = collection.find_one({"updated_at": {"$exists": True}}, {"updated_at": 1},
+                                     sort=[("updated_at", -1)])
+        return (latest or {}).get("updated_at"), collection.estimated_document_count()
+
+    def _poll(self):
+        self.mode = "polling"
+        saved = self._load_state()
+        marks = saved.get("poll_marks") or {}
+        counts = saved.get("poll_counts") or {}
+        while not self._stop.wait(Config.CHANGE_POLL_SECONDS):
+            try:
+                changed = False
+                for name in self.collections:
+                    changed |= self._poll_collection(name, marks, counts)
+                if changed:
+                    self._save_state({"poll_marks": marks, "poll_counts": counts})
+            except Exception as e:
+                print(f"❌ Change polling failed: {e}")
+
+    def _poll_collection(self, name, marks, counts, limit=1000):
+        if name not in marks or name not in counts:
+            # Nothing saved for it yet: start from where it is now
+            marks[name], counts[name] = self._snapshot(name)
+            return True
+        collection = db_instance.db[name]
+        query = {"updated_at": {"$gt": marks[name]}} if marks[name] else {"updated_at": {"$exists": True}}
+        docs = list(collection.find(query, {"updated_at": 1}).sort("updated_at", 1).limit(limit))
+        count = collection.estimated_document_count()
+        if len(docs) >= limit or count != counts[name]:
+            invalidation_bus.publish(name)
+        else:
+            for doc in docs:
+                invalidation_bus.publish(name, doc["_id"])
+        if docs:
+            marks[name] = docs[-1]["updated_at"]
+        changed = bool(docs) or count != counts[name]
+        counts[name] = count
+        return changed
+
+# Global instance
+change_watcher = ChangeWatcher()
@@ -1,16 +1,320 @@
 # models/collections.py
-from .database import db_instance
+from .database import db_instance, reads_pinned
+from .listing_card import ListingCard, CARD_PROJECTION
 from bson.objectid import ObjectId
-from datetime import datetime
-import hashlib
-import secrets
+from pymongo import ReturnDocument, ReplaceOne, UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+from collections import Counter, OrderedDict
+from datetime import datetime, timedelta
+from config import Config
+from utils.image_utils import image_handler
+from utils.page_cache import page_cache
+from utils.db_metrics import instrumented
+from utils.credentials import credential_hasher
+from utils.invalidation import invalidation_bus
+from utils.sessions import session_store
+from utils.scheduler import PeriodicTask
+import base64
+import math
+import os
+import re
+import socket
+import threading
+import time
 
-class GameCollection:
-    def __init__(self):
-        self.collection = db_instance.db.games
+class TTLCache:
+    """Thread-safe LRU cache whose entries also expire after ttl seconds.
+
+    Caches are refilled from catalog reads, which can lag the primary by up
+    to `settle` seconds (CATALOG_LAG_SECONDS), so an entry set within that
+    long of an invalidation may still hold the old data: it expires when the
+    window ends instead of living out the full ttl.
+    """
+    def __init__(self, maxsize=None, ttl=None, settle=None):
+        self.maxsize = maxsize or Config.CACHE_MAX_ENTRIES
+        self.ttl = ttl or Config.CACHE_TTL_SECONDS
+        self.settle = Config.CATALOG_LAG_SECONDS if settle is None else settle
+        self._data = OrderedDict()
+        # Invalidated key (None for everything) -> when a refill can no longer be stale
+        self._settling = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        """Return the cached value, or None on a miss"""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._data[key]
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, value):
+        with self._lock:
+            now = time.monotonic()
+            expires = now + self.ttl
+            for scope in (None, key):
+                until = self._settling.get(scope)
+                if until is not None and until > now:
+                    expires = min(expires, until)
+            self._data[key] = (expires, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def invalidate(self, key=None):
+        """Drop one key, or everything when no key is given"""
+        with self._lock:
+            now = time.monotonic()
+            if key is None:
+                self._data.clear()
+                self._settling.clear()
+            else:
+                self._data.pop(key, None)
+                if len(self._settling) >= self.maxsize:
+                    self._settling = {scope: until for scope, until in self._settling.items() if until > now}
+            if self.settle:
+                self._settling[key] = now + self.settle
+
+    def stats(self):
+        with self._lock:
+            return {"size": len(self._data), "hits": self.hits, "misses": self.misses}
+
+console_cache = TTLCache(maxsize=8)
+seller_cache = TTLCache()
+facet_cache = TTLCache(maxsize=512, ttl=Config.FACET_CACHE_TTL_SECONDS)
+
+def cache_stats():
+    return {"consoles": console_cache.stats(), "sellers": seller_cache.stats(), "facets": facet_cache.stats()}
+
+def touched(update):
+    """Stamp an update with updated_at, the high-water mark the change watcher polls"""
+    update = dict(update)
+    update["$set"] = {**update.get("$set", {}), "updated_at": datetime.utcnow()}
+    return update
+
+# Writes seen by the change watcher, from this or any other process
+def _games_changed(game_id):
+    facet_cache.invalidate()
+    page_cache.invalidate()
+
+def _sellers_changed(seller_id):
+    seller_cache.invalidate(str(seller_id) if seller_id is not None else None)
+    page_cache.invalidate()
+
+def _consoles_changed(console_id):
+    console_cache.invalidate()
+    page_cache.invalidate()
+
+def _home_feed_changed(feed_id):
+    home_feed_db.expire()
+    page_cache.invalidate()
+
+invalidation_bus.subscribe("games", _games_changed)
+invalidation_bus.subscribe("sellers", _sellers_changed)
+invalidation_bus.subscribe("consoles", _consoles_changed)
+invalidation_bus.subscribe("home_feed", _home_feed_changed)
+
+# Catalog vocabulary shared by the listing forms and the search facets
+CONDITIONS = ["Mint", "Excellent", "Good", "Fair", "Poor"]
+RARITIES = ["Common", "Uncommon", "Rare", "Very Rare", "Ultra Rare"]
+# Rarities the home page's "Rare Finds" rail draws from
+RARE_FINDS = RARITIES[2:]
+
+# sort option -> (listing_view field, direction); relevance orders by text score
+SORT_OPTIONS = {
+    "newest": ("date_listed", -1),
+    "price_asc": ("price", 1),
+    "price_desc": ("price", -1),
+    "relevance": None,
+}
+
+# facet name -> listing_view field it counts
+FACET_FIELDS = {"console": "console_id", "condition": "condition", "rarity": "rarity"}
+
+def _encode(raw):
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def _decode(cursor):
+    padded = cursor + "=" * (-len(cursor) % 4)
+    return base64.urlsafe_b64decode(padded.encode()).decode().split("|")
+
+def encode_cursor(game, sort_field="date_listed"):
+    """Encode a game's (sort_field, _id) key as an opaque URL-safe cursor"""
+    value = game[sort_field]
+    if isinstance(value, datetime):
+        return _encode(f"d|{value.isoformat()}|{game['_id']}")
+    return _encode(f"n|{float(value)!r}|{game['_id']}")
+
+def decode_cursor(cursor):
+    """Decode a keyset cursor into (value, ObjectId), or None if it is invalid"""
+    if not cursor:
+        return None
+    try:
+        kind, value, id_part = _decode(cursor)
+        if kind == "d":
+            return datetime.fromisoformat(value), ObjectId(id_part)
+        if kind == "n":
+            return float(value), ObjectId(id_part)
+    except Exception:
+        pass
+    return None
+
+def encode_offset_cursor(offset):
+    """Relevance-ranked results cannot be keyset-paginated, so they page by position"""
+    return _encode(f"o|{offset}")
+
+def decode_offset_cursor(cursor):
+    if not cursor:
+        return None
+    try:
+        kind, offset = _decode(cursor)
+        return max(0, int(offset)) if kind == "o" else None
+    except Exception:
+        return None
+
+# Seller fields copied into every listing_view document
+SELLER_SUMMARY_FIELDS = ("username", "rating", "total_sales", "location", "bio", "response_time")
+
+def seller_summary(seller):
+    summary = {"_id": seller["_id"]}
+    for field in SELLER_SUMMARY_FIELDS:
+        if field in seller:
+            summary[field] = seller[field]
+    return summary
+
+# Price histograms use log-spaced buckets 5% wide, so a percentile read
+# from them is within about 2.5% of the exact value
+PRICE_BUCKET_LOG = math.log(1.05)
+PRICE_PERCENTILES = {"p10": 0.1, "p25": 0.25, "median": 0.5, "p75": 0.75, "p90": 0.9}
+
+def normalize_title(title):
+    """Grouping key for a title: 'Super Mario Bros. 3' and 'super mario bros 3' match"""
+    return " ".join(re.sub(r"[^a-z0-9]+", " ", (title or "").lower()).split())
+
+def price_bucket(price):
+    return str(math.floor(math.log(max(float(price), 0.01)) / PRICE_BUCKET_LOG))
+
+def summarize_prices(count, total, low, high, histograms):
+    """Count, range, mean and percentiles from merged rollup histograms, or None without data"""
+    if not count:
+        return None
+    merged = {}
+    for histogram in histograms:
+        for bucket, bucket_count in histogram.items():
+            merged[int(bucket)] = merged.get(int(bucket), 0) + bucket_count
+    summary = {"count": count, "min": low, "max": high, "mean": total / count}
+    buckets = sorted(merged.items())
+    for name, fraction in PRICE_PERCENTILES.items():
+        rank, seen = max(1, math.ceil(fraction * count)), 0
+        for bucket, bucket_count in buckets:
+            seen += bucket_count
+            if seen >= rank:
+                break
+        # Geometric middle of the bucket, kept inside the exact range
+        summary[name] = min(max(math.exp((bucket + 0.5) * PRICE_BUCKET_LOG), low), high)
+    return summary
+
+@instrumented
+class ListingViewCollection:
+    """Denormalized copy of games with console name and seller summary embedded.
+
+    Catalog reads query this collection with a plain find() instead of
+    joining consoles and sellers on every request.
+    """
+    @property
+    def collection(self):
+        return db_instance.db.listing_view
+
+    @property
+    def catalog(self):
+        """listing_view for browse reads, which may be served by a secondary"""
+        return db_instance.catalog.listing_view
+
+    def build_document(self, game, console, seller):
+        doc = dict(game)
+        doc["console"] = {"_id": console["_id"], "name": console.get("name")}
+        doc["seller"] = seller_summary(seller)
+        return doc
+
+    def upsert_game(self, game):
+        """Write the listing_view document for a freshly inserted or changed game"""
+        try:
+            db = db_instance.db
+            console = db.consoles.find_one({"_id": game["console_id"]}, {"name": 1})
+            seller = db.sellers.find_one({"_id": game["seller_id"]},
+                                         {field: 1 for field in SELLER_SUMMARY_FIELDS})
+            if not console or not seller:
+                # Same outcome as the old $unwind: listings without a console or seller are hidden
+                self.collection.delete_one({"_id": game["_id"]})
+                return False
+            doc = self.build_document(game, console, seller)
+            self.collection.replace_one({"_id": game["_id"]}, doc, upsert=True)
+            return True
+        except Exception as e:
+            print(f"Error updating listing view: {e}")
+            return False
+
+    def upsert_games(self, games):
+        """Bulk upsert_game: one read per referenced collection and one bulk write"""
+        if not games:
+            return 0
+        try:
+            db = db_instance.db
+            consoles = {console["_id"]: console for console in db.consoles.find(
+                {"_id": {"$in": list({game["console_id"] for game in games})}}, {"name": 1})}
+            sellers = {seller["_id"]: seller for seller in db.sellers.find(
+                {"_id": {"$in": list({game["seller_id"] for game in games})}},
+                {field: 1 for field in SELLER_SUMMARY_FIELDS})}
+            requests = [
+                ReplaceOne({"_id": game["_id"]},
+                           self.build_document(game, consoles[game["console_id"]], sellers[game["seller_id"]]),
+                           upsert=True)
+                for game in games
+                if game["console_id"] in consoles and game["seller_id"] in sellers
+            ]
+            if requests:
+                self.collection.bulk_write(requests, ordered=False)
+            return len(requests)
+        except Exception as e:
+            print(f"Error updating listing view: {e}")
+            return 0
+
+    def apply_game_update(self, game_id, update):
+        """Mirror an update already applied to a games document"""
+        try:
+            self.collection.update_one({"_id": ObjectId(game_id)}, update)
+        except Exception as e:
+            print(f"Error updating listing view: {e}")
+
+    def apply_update_many(self, query, update):
+        """Mirror an update_many already applied to the games collection"""
+        try:
+            self.collection.update_many(query, update)
+        except Exception as e:
+            print(f"Error updating listing view: {e}")
 
-    def get_all_games(self):
+    def sync_seller(self, seller_id, update_data):
+        """Refresh the embedded seller summary on all of a seller's listings"""
+        changes = {f"seller.{field}": value for field, value in update_data.items()
+                   if field in SELLER_SUMMARY_FIELDS}
+        if not changes:
+            return
         try:
+            self.collection.update_many({"seller_id": ObjectId(seller_id)}, {"$set": changes})
+        except Exception as e:
+            print(f"Error syncing seller into listing view: {e}")
+
+    def rebuild(self):
+        """Recompute the whole view from games, consoles and sellers"""
+        try:
+            seller_fields = {"_id": "$seller._id"}
+            seller_fields.update({field: f"$seller.{field}" for field in SELLER_SUMMARY_FIELDS})
             pipeline = [
                 {
                     "$lookup": {
@@ -28,199 +332,1227 @@ class GameCollection:
                         "as": "seller"
                     }
                 },
+                {"$unwind": "$console"},
+                {"$unwind": "$seller"},
                 {
-                    "$unwind": "$console"
-                },
-                {
-                    "$unwind": "$seller"
+                    "$addFields": {
+                        "console": {"_id": "$console._id", "name": "$console.name"},
+                        "seller": seller_fields
+                    }
                 },
-                {
-                    "$sort": {"date_listed": -1}
-                }
+                # $out swaps the collection in atomically and keeps its indexes
+                {"$out": "listing_view"}
             ]
-            return list(self.collection.aggregate(pipeline))
+            db_instance.db.games.aggregate(pipeline)
+            page_cache.invalidate()
+            print(f"✅ Rebuilt listing view: {self.collection.count_documents({})} listings")
+            return True
         except Exception as e:
-            print(f"Error getting games: {e}")
+            print(f"Error rebuilding listing view: {e}")
+            return False
+
+    def ensure_built(self):
+        """Backfill the view when it is out of step with the games collection"""
+        try:
+            if self.collection.estimated_document_count() != db_instance.db.games.estimated_document_count():
+                print("🔄 Listing view out of date, rebuilding...")
+                self.rebuild()
+        except Exception as e:
+            print(f"Error checking listing view: {e}")
+
+@instrumented
+class ImageBlobCollection:
+    """Reference-counted, content-addressed image files.
+
+    One document per distinct upload, keyed by its SHA-256. status moves
+    staged -> processing -> ready; the image pipeline only processes blobs
+    it claims, so a duplicate upload just adds a reference.
+    """
+    @property
+    def collection(self):
+        return db_instance.db.image_blobs
+
+    def acquire(self, digest, filename):
+        """Add a reference, return (filename, is_new) for the stored blob"""
+        blob = self.collection.find_one_and_update(
+            {"_id": digest},
+            {
+                "$inc": {"refcount": 1},
+                "$setOnInsert": {"filename": filename, "status": "staged", "created_at": datetime.now()}
+            },
+            upsert=True,
+            return_document=ReturnDocument.BEFORE
+        )
+        if blob is None:
+            return filename, True
+        return blob["filename"], False
+
+    def reference(self, filename):
+        """Add a reference to an existing blob by name, True if it exists"""
+        try:
+            return self.collection.find_one_and_update({"filename": filename}, {"$inc": {"refcount": 1}}) is not None
+        except Exception as e:
+            print(f"Error referencing image blob: {e}")
+            return False
+
+    def release(self, filename):
+        """Drop a reference, return True when it was the last one and the blob is gone"""
+        try:
+            blob = self.collection.find_one_and_update(
+                {"filename": filename},
+                {"$inc": {"refcount": -1}},
+                return_document=ReturnDocument.AFTER
+            )
+            if blob is None or blob["refcount"] > 0:
+                return False
+            result = self.collection.delete_one({"_id": blob["_id"], "refcount": {"$lte": 0}})
+            return result.deleted_count > 0
+        except Exception as e:
+            print(f"Error releasing image blob: {e}")
+            return False
+
+    def claim(self, filename):
+        """Atomically move a staged blob to processing, True if this caller won"""
+        result = self.collection.update_one(
+            {"filename": filename, "status": "staged"},
+            {"$set": {"status": "processing"}}
+        )
+        return result.modified_count > 0
+
+    def set_status(self, filename, status):
+        self.collection.update_one({"filename": filename}, {"$set": {"status": status}})
+
+    def delete(self, filename):
+        self.collection.delete_one({"filename": filename})
+
+    def get_statuses(self, filenames):
+        """Map filename -> status; legacy images without a blob count as ready"""
+        statuses = {filename: "ready" for filename in filenames}
+        for blob in self.collection.find({"filename": {"$in": list(filenames)}}, {"filename": 1, "status": 1}):
+            statuses[blob["filename"]] = blob["status"]
+        return statuses
+
+    def get_unfinished(self):
+        return list(self.collection.find({"status": {"$in": ["staged", "processing"]}},
+                                         {"filename": 1, "status": 1, "created_at": 1}))
+
+# Seller profile fields copied into seller_stats for the sellers directory
+SELLER_DIRECTORY_FIELDS = SELLER_SUMMARY_FIELDS + ("member_since",)
+
+@instrumented
+class TaskLeaseCollection:
+    """Time-limited claims that let one worker in the deployment run a periodic job"""
+    @property
+    def collection(self):
+        return db_instance.db.task_leases
+
+    def claim(self, name, seconds):
+        """Take the lease for `seconds` if it is free or has expired; True if this process got it"""
+        now = datetime.utcnow()
+        try:
+            # A live lease does not match, so the upsert collides with it on _id
+            self.collection.update_one(
+                {"_id": name, "expires_at": {"$lte": now}},
+                {"$set": {"expires_at": now + timedelta(seconds=seconds),
+                          "holder": f"{socket.gethostname()}:{os.getpid()}"}},
+                upsert=True)
+            return True
+        except DuplicateKeyError:
+            return False
+        except Exception as e:
+            print(f"Error claiming task lease {name}: {e}")
+            return False
+
+@instrumented
+class SellerStatsCollection:
+    """Per-seller listing counters plus the profile fields the directory shows.
+
+    Each document holds active_listings, total_price, listings_with_images,
+    consoles ({console_id: count}) and last_listed. The game write paths
+    keep them current with $inc, and reconcile() recomputes them from
+    games with $merge.
+    """
+    @property
+    def collection(self):
+        return db_instance.db.seller_stats
+
+    @property
+    def catalog(self):
+        return db_instance.catalog.seller_stats
+
+    def add_listings(self, games, sign=1):
+        """Count new listings (or, with sign=-1, removed ones) in one bulk write"""
+        updates = {}
+        for game in games:
+            update = updates.setdefault(game["seller_id"], {"$inc": {}})
+            inc = update["$inc"]
+            for field, amount in (("active_listings", 1),
+                                  ("total_price", float(game.get("price") or 0)),
+                                  (f"consoles.{game['console_id']}", 1),
+                                  ("listings_with_images", 1 if game.get("images") else 0)):
+                inc[field] = inc.get(field, 0) + sign * amount
+            if sign > 0 and game.get("date_listed"):
+                last = update.setdefault("$max", {"last_listed": game["date_listed"]})
+                last["last_listed"] = max(last["last_listed"], game["date_listed"])
+        if not updates:
+            return
+        try:
+            # No upsert: a seller without a stats document is picked up by reconcile()
+            self.collection.bulk_write(
+                [UpdateOne({"_id": seller_id}, update) for seller_id, update in updates.items()],
+                ordered=False)
+        except Exception as e:
+            print(f"Error updating seller stats: {e}")
+
+    def image_count_changed(self, seller_id, delta):
+        """A listing gained its first image (+1) or lost its last one (-1)"""
+        try:
+            self.collection.update_one({"_id": ObjectId(seller_id)}, {"$inc": {"listings_with_images": delta}})
+        except Exception as e:
+            print(f"Error updating seller stats: {e}")
+
+    def add_seller(self, seller):
+        try:
+            doc = {field: seller[field] for field in SELLER_DIRECTORY_FIELDS if field in seller}
+            doc.update({"_id": seller["_id"], "active_listings": 0, "total_price": 0,
+                        "listings_with_images": 0, "consoles": {}, "updated_at": datetime.now()})
+            self.collection.replace_one({"_id": seller["_id"]}, doc, upsert=True)
+        except Exception as e:
+            print(f"Error creating seller stats: {e}")
+
+    def sync_seller(self, seller_id, update_data):
+        changes = {field: value for field, value in update_data.items() if field in SELLER_DIRECTORY_FIELDS}
+        if not changes:
+            return
+        try:
+            self.collection.update_one({"_id": ObjectId(seller_id)}, {"$set": changes})
+        except Exception as e:
+            print(f"Error syncing seller stats: {e}")
+
+    def _with_averages(self, doc):
+        doc["avg_price"] = doc["total_price"] / doc["active_listings"] if doc.get("active_listings") else 0
+        return doc
+
+    def get_directory(self):
+        """Every seller with their stats, best rated first, from one indexed find"""
+        try:
+            return [self._with_averages(doc) for doc in self.catalog.find().sort("rating", -1)]
+        except Exception as e:
+            print(f"Error getting seller stats: {e}")
             return []
 
-    def get_game_by_id(self, game_id):
+    def get(self, seller_id):
         try:
-            pipeline = [
-                {
-                    "$match": {"_id": ObjectId(game_id)}
-                },
-                {
-                    "$lookup": {
-                        "from": "consoles",
-                        "localField": "console_id",
-                        "foreignField": "_id",
-                        "as": "console"
-                    }
-                },
+            doc = self.catalog.find_one({"_id": ObjectId(seller_id)})
+            return self._with_averages(doc) if doc else None
+        except Exception as e:
+            print(f"Error getting seller stats: {e}")
+            return None
+
+    def reconcile(self, seller_ids=None):
+        """Recompute stats from the games collection and $merge them in"""
+        try:
+            pipeline = []
+            if seller_ids is not None:
+                pipeline.append({"$match": {"_id": {"$in": [ObjectId(seller_id) for seller_id in seller_ids]}}})
+            pipeline += [
                 {
                     "$lookup": {
-                        "from": "sellers",
-                        "localField": "seller_id",
-                        "foreignField": "_id",
-                        "as": "seller"
+                        "from": "games",
+                        "let": {"seller_id": "$_id"},
+                        "pipeline": [
+                            {"$match": {"$expr": {"$eq": ["$seller_id", "$$seller_id"]}}},
+                            {"$group": {
+                                "_id": "$console_id",
+                                "count": {"$sum": 1},
+                                "total_price": {"$sum": "$price"},
+                                "with_images": {"$sum": {"$cond": [
+                                    {"$gt": [{"$size": {"$ifNull": ["$images", []]}}, 0]}, 1, 0]}},
+                                "last_listed": {"$max": "$date_listed"}
+                            }}
+                        ],
+                        "as": "per_console"
                     }
                 },
                 {
-                    "$unwind": "$console"
+                    "$project": dict(
+                        {field: 1 for field in SELLER_DIRECTORY_FIELDS},
+                        active_listings={"$sum": "$per_console.count"},
+                        total_price={"$sum": "$per_console.total_price"},
+                        listings_with_images={"$sum": "$per_console.with_images"},
+                        last_listed={"$max": "$per_console.last_listed"},
+                        consoles={"$arrayToObject": {"$map": {
+                            "input": "$per_console",
+                            "in": {"k": {"$toString": "$$this._id"}, "v": "$$this.count"}
+                        }}},
+                        updated_at="$$NOW"
+                    )
                 },
-                {
-                    "$unwind": "$seller"
+                {"$merge": {"into": "seller_stats", "on": "_id", "whenMatched": "replace", "whenNotMatched": "insert"}}
+            ]
+            db_instance.db.sellers.aggregate(pipeline)
+            if seller_ids is None:
+                print(f"✅ Reconciled seller stats: {self.collection.estimated_document_count()} sellers")
+            return True
+        except Exception as e:
+            print(f"Error reconciling seller stats: {e}")
+            return False
+
+    def reconcile_if_due(self):
+        """Periodic task: every worker runs it, but only the lease holder reconciles each interval"""
+        # A little under the interval, so the holder's next run is not locked out by its own lease
+        if task_leases_db.claim("seller-stats-reconcile", Config.SELLER_STATS_RECONCILE_SECONDS * 0.9):
+            self.reconcile()
+
+    def ensure_built(self):
+        """Build the stats when they are missing sellers"""
+        try:
+            if self.collection.estimated_document_count() != db_instance.db.sellers.estimated_document_count():
+                print("🔄 Seller stats out of date, rebuilding...")
+                self.reconcile()
+        except Exception as e:
+            print(f"Error checking seller stats: {e}")
+
+@instrumented
+class ListingCountsCollection:
+    """Catalog-wide listing counts in one document.
+
+    Holds total plus {value: count} maps for each of FACET_FIELDS. The game
+    write paths keep it current with $inc, so the home feed's console rails
+    and the unfiltered search facets never group over listing_view;
+    rebuild() recounts it from games.
+    """
+    COUNTS_ID = "listings"
+
+    @property
+    def collection(self):
+        return db_instance.db.listing_counts
+
+    @property
+    def catalog(self):
+        return db_instance.catalog.listing_counts
+
+    def add_listings(self, games, sign=1):
+        """Count new listings (or, with sign=-1, removed ones) in one update"""
+        inc = {}
+        for game in games:
+            inc["total"] = inc.get("total", 0) + sign
+            for name, field in FACET_FIELDS.items():
+                key = f"{name}.{game.get(field)}"
+                inc[key] = inc.get(key, 0) + sign
+        if not inc:
+            return
+        try:
+            # No upsert: a partial document would stop ensure_built() from counting everything
+            self.collection.update_one({"_id": self.COUNTS_ID}, {"$inc": inc})
+        except Exception as e:
+            print(f"Error updating listing counts: {e}")
+
+    def get(self, primary=False):
+        """The counts document ({"total": n, "console": {...}, ...}), or None if not built"""
+        collection = self.collection if primary else self.catalog
+        return collection.find_one({"_id": self.COUNTS_ID})
+
+    def rebuild(self):
+        """Recount every listing and replace the document"""
+        try:
+            pipeline = [{"$facet": dict(
+                {name: [{"$group": {"_id": f"${field}", "count": {"$sum": 1}}}]
+                 for name, field in FACET_FIELDS.items()},
+                total=[{"$count": "count"}]
+            )}]
+            result = next(db_instance.db.games.aggregate(pipeline, allowDiskUse=True), {})
+            doc = {name: {str(row["_id"]): row["count"] for row in result.get(name, [])}
+                   for name in FACET_FIELDS}
+            total = result.get("total") or [{"count": 0}]
+            doc.update({"_id": self.COUNTS_ID, "total": total[0]["count"], "updated_at": datetime.utcnow()})
+            self.collection.replace_one({"_id": self.COUNTS_ID}, doc, upsert=True)
+            print(f"✅ Counted {doc['total']} listings")
+            return True
+        except Exception as e:
+            print(f"Error rebuilding listing counts: {e}")
+            return False
+
+    def ensure_built(self):
+        """Count the listings when the document is missing"""
+        try:
+            if self.get(primary=True) is None:
+                print("🔄 Listing counts missing, rebuilding...")
+                self.rebuild()
+        except Exception as e:
+            print(f"Error checking listing counts: {e}")
+
+@instrumented
+class PriceRollupCollection:
+    """Daily price rollups per normalized title, console, condition and rarity.
+
+    Each document covers one group on one day: count, sum, min, max and a
+    histogram of asking prices (see price_bucket). A median or percentile
+    over any run of days merges a few of these small documents, so price
+    guides never scan listings. New listings are added with $inc upserts.
+    """
+    GROUP_FIELDS = ("title_key", "console_id", "condition", "rarity", "day")
+
+    @property
+    def collection(self):
+        return db_instance.db.price_rollups
+
+    @property
+    def catalog(self):
+        return db_instance.catalog.price_rollups
+
+    def record_listings(self, games):
+        """Add new listings' prices to their day's rollups in one bulk write"""
+        updates = {}
+        for game in games:
+            try:
+                price = float(game.get("price"))
+            except (TypeError, ValueError):
+                continue
+            if not math.isfinite(price):
+                continue
+            listed = game.get("date_listed") or datetime.now()
+            group = (normalize_title(game.get("title")), game.get("console_id"), game.get("condition"),
+                     game.get("rarity"), datetime(listed.year, listed.month, listed.day))
+            update = updates.setdefault(group, {"$inc": {"n": 0, "sum": 0}, "$min": {"min": price},
+                                                "$max": {"max": price},
+                                                "$setOnInsert": {"title": game.get("title")}})
+            inc = update["$inc"]
+            bucket = f"h.{price_bucket(price)}"
+            inc["n"] += 1
+            inc["sum"] += price
+            inc[bucket] = inc.get(bucket, 0) + 1
+            update["$min"]["min"] = min(update["$min"]["min"], price)
+            update["$max"]["max"] = max(update["$max"]["max"], price)
+        if not updates:
+            return
+        try:
+            self.collection.bulk_write(
+                [UpdateOne(dict(zip(self.GROUP_FIELDS, group)), update, upsert=True)
+                 for group, update in updates.items()],
+                ordered=False)
+        except Exception as e:
+            print(f"Error updating price rollups: {e}")
+
+    def rebuild(self):
+        """Recompute every rollup from games and $merge them in.
+
+        Each group and day is replaced with its recomputed document, so the
+        result is the same however many workers run it at once. Buckets and
+        title keys are computed exactly as price_bucket and normalize_title do.
+        """
+        group = {field: f"$_id.{field}" for field in self.GROUP_FIELDS}
+        title_words = {"$map": {"input": {"$regexFindAll": {"input": {"$toLower": "$title"}, "regex": "[a-z0-9]+"}},
+                                "in": "$$this.match"}}
+        try:
+            db_instance.db.games.aggregate([
+                # Also drops NaN, which sorts below every number
+                {"$match": {"price": {"$gte": 0, "$lt": float("inf")}}},
+                {"$addFields": {"listed": {"$ifNull": ["$date_listed", "$$NOW"]}}},
+                {"$project": {
+                    "title": 1, "console_id": 1, "condition": 1, "rarity": 1, "price": 1,
+                    "day": {"$dateFromParts": {"year": {"$year": "$listed"}, "month": {"$month": "$listed"},
+                                               "day": {"$dayOfMonth": "$listed"}}},
+                    "title_key": {"$reduce": {"input": title_words, "initialValue": "", "in": {"$concat": [
+                        "$$value", {"$cond": [{"$eq": ["$$value", ""]}, "", " "]}, "$$this"]}}},
+                    "bucket": {"$toString": {"$floor": {"$divide": [
+                        {"$ln": {"$max": ["$price", 0.01]}}, {"$literal": PRICE_BUCKET_LOG}]}}},
+                }},
+                {"$group": {"_id": dict({field: f"${field}" for field in self.GROUP_FIELDS}, bucket="$bucket"),
+                            "title": {"$first": "$title"}, "n": {"$sum": 1}, "sum": {"$sum": "$price"},
+                            "min": {"$min": "$price"}, "max": {"$max": "$price"}}},
+                {"$group": {"_id": group, "title": {"$first": "$title"}, "n": {"$sum": "$n"},
+                            "sum": {"$sum": "$sum"}, "min": {"$min": "$min"}, "max": {"$max": "$max"},
+                            "h": {"$push": {"k": "$_id.bucket", "v": "$n"}}}},
+                {"$project": dict(group, _id=0, title=1, n=1, sum=1, min=1, max=1, h={"$arrayToObject": "$h"})},
+                {"$merge": {"into": "price_rollups", "on": list(self.GROUP_FIELDS),
+                            "whenMatched": "replace", "whenNotMatched": "insert"}}
+            ], allowDiskUse=True)
+            print(f"✅ Rebuilt price rollups: {self.collection.estimated_document_count()} buckets")
+            return True
+        except Exception as e:
+            print(f"Error rebuilding price rollups: {e}")
+            return False
+
+    def ensure_built(self):
+        """Build the rollups when there are listings but no rollups yet"""
+        try:
+            if (self.collection.estimated_document_count() == 0
+                    and db_instance.db.games.estimated_document_count() > 0):
+                print("🔄 Price rollups missing, building...")
+                self.rebuild()
+        except Exception as e:
+            print(f"Error checking price rollups: {e}")
+
+    def _since(self, days):
+        today = datetime.now()
+        return datetime(today.year, today.month, today.day) - timedelta(days=days - 1)
+
+    def _guide_query(self, game, days):
+        return {"title_key": normalize_title(game.get("title")), "console_id": game.get("console_id"),
+                "day": {"$gte": self._since(days)}}
+
+    def _guide(self, rows, days):
+        """Price guide from a title's rollup rows: overall and per condition"""
+        if not rows:
+            return None
+        by_condition = {}
+        for row in rows:
+            by_condition.setdefault(row.get("condition"), []).append(row)
+
+        def summarize(group):
+            return summarize_prices(sum(row["n"] for row in group), sum(row["sum"] for row in group),
+                                    min(row["min"] for row in group), max(row["max"] for row in group),
+                                    [row.get("h", {}) for row in group])
+
+        return {
+            "days": days,
+            "overall": summarize(rows),
+            "conditions": [(condition, summarize(by_condition[condition]))
+                           for condition in CONDITIONS if condition in by_condition],
+        }
+
+    def get_price_guide(self, game, days=None):
+        """Asking prices for the same title on the same console over the last `days` days"""
+        days = days or Config.PRICE_GUIDE_DAYS
+        try:
+            return self._guide(list(self.catalog.find(self._guide_query(game, days))), days)
+        except Exception as e:
+            print(f"Error getting price guide: {e}")
+            return None
+
+    def _market_pipeline(self, group_key, match, limit):
+        """Totals and one merged histogram per group, with the buckets merged on the server"""
+        pipeline = [
+            {"$match": match},
+            {"$addFields": {"buckets": {"$objectToArray": "$h"}}},
+            {"$unwind": {"path": "$buckets", "includeArrayIndex": "position"}},
+            # One row per group and bucket; each rollup's sum is counted on its first bucket only
+            {"$group": {"_id": {"key": group_key, "bucket": "$buckets.k"}, "title": {"$first": "$title"},
+                        "count": {"$sum": "$buckets.v"},
+                        "sum": {"$sum": {"$cond": [{"$eq": ["$position", 0]}, "$sum", 0]}},
+                        "min": {"$min": "$min"}, "max": {"$max": "$max"}}},
+            {"$group": {"_id": "$_id.key", "title": {"$first": "$title"}, "n": {"$sum": "$count"},
+                        "sum": {"$sum": "$sum"}, "min": {"$min": "$min"}, "max": {"$max": "$max"},
+                        "h": {"$push": {"k": "$_id.bucket", "v": "$count"}}}},
+            {"$sort": {"n": -1, "_id": 1}},
+        ]
+        if limit:
+            pipeline.append({"$limit": limit})
+        return pipeline
+
+    def _market_rows(self, rows):
+        market = []
+        for row in rows:
+            histogram = {bucket["k"]: bucket["v"] for bucket in row["h"]}
+            summary = summarize_prices(row["n"], row["sum"], row["min"], row["max"], [histogram])
+            key = row["_id"] if isinstance(row["_id"], dict) else {"console_id": row["_id"]}
+            market.append(dict(summary, title=row.get("title"), **key))
+        return market
+
+    def get_market(self, console_id=None, days=None, limit=None):
+        """Per-console summaries and the most listed titles over the last `days` days"""
+        days = days or Config.MARKET_DAYS
+        match = {"day": {"$gte": self._since(days)}}
+        if console_id:
+            match["console_id"] = ObjectId(console_id)
+        try:
+            consoles = self.catalog.aggregate(self._market_pipeline("$console_id", match, None),
+                                              allowDiskUse=True)
+            titles = self.catalog.aggregate(self._market_pipeline(
+                {"title_key": "$title_key", "console_id": "$console_id"}, match,
+                limit or Config.MARKET_TOP_TITLES), allowDiskUse=True)
+            return {"days": days, "consoles": self._market_rows(consoles), "titles": self._market_rows(titles)}
+        except Exception as e:
+            print(f"Error getting market summary: {e}")
+            return {"days": days, "consoles": [], "titles": []}
+
+@instrumented
+class HomeFeedCollection:
+    """The home page's listing cards, precomputed into one document.
+
+    refresh() builds every rail from listing_view and replaces the document
+    in a single write, so readers see the old feed or the new one, never a
+    mix. Each worker keeps the loaded feed in memory, so the home page costs
+    a dict lookup, or one find by _id once the copy is HOME_FEED_SNAPSHOT_SECONDS
+    old or the change watcher reports a new feed. The refresher rebuilds it
+    every HOME_FEED_REFRESH_SECONDS, and early after listings change, but at
+    most once per HOME_FEED_MIN_REFRESH_SECONDS across all workers.
+    """
+    FEED_ID = "home"
+
+    def __init__(self):
+        self._snapshot = None
+        self._loaded_at = 0
+        self._pending_since = None
+        self.refresher = PeriodicTask('home-feed-refresh', Config.HOME_FEED_REFRESH_SECONDS,
+                                      self.refresh_if_due)
+
+    @property
+    def collection(self):
+        return db_instance.db.home_feed
+
+    def _cards(self, query, limit):
+        # From the primary: a rebuild right after a new listing must include it
+        return list(listing_view_db.collection.find(query, CARD_PROJECTION)
+                    .sort([("date_listed", -1), ("_id", -1)]).limit(limit))
+
+    def _top_consoles(self, counts):
+        """The biggest consoles by listing count, from the maintained counters"""
+        names = {str(console["_id"]): console["name"] for console in consoles_db.get_all_consoles()}
+        ranked = sorted(((count, console_id) for console_id, count in counts.get("console", {}).items()
+                         if count > 0 and console_id in names), key=lambda item: (-item[0], item[1]))
+        return [{"_id": ObjectId(console_id), "name": names[console_id], "count": count}
+                for count, console_id in ranked[:Config.HOME_FEED_CONSOLE_RAILS]]
+
+    def build(self):
+        """The feed document: newest listings, rare finds and the biggest consoles' rails"""
+        started_at = datetime.utcnow()
+        rail_size = Config.HOME_FEED_RAIL_SIZE
+        counts = listing_counts_db.get(primary=True) or {}
+        return {
+            "_id": self.FEED_ID,
+            "featured": self._cards({}, Config.FEATURED_GAMES_LIMIT),
+            "rare_finds": self._cards({"rarity": {"$in": RARE_FINDS}}, rail_size),
+            "consoles": [dict(console, games=self._cards({"console_id": console["_id"]}, rail_size))
+                         for console in self._top_consoles(counts)],
+            "total_listings": counts.get("total", 0),
+            "started_at": started_at,
+            "updated_at": datetime.utcnow(),
+        }
+
+    def _view(self, doc):
+        return {
+            "featured": ListingCard.from_docs(doc.get("featured", [])),
+            "rare_finds": ListingCard.from_docs(doc.get("rare_finds", [])),
+            "consoles": [dict(console, games=ListingCard.from_docs(console["games"]))
+                         for console in doc.get("consoles", [])],
+            "total_listings": doc.get("total_listings", 0),
+            "updated_at": doc.get("updated_at"),
+        }
+
+    def _set_snapshot(self, doc):
+        # One reference swap: a reader holds the old feed or the new one
+        self._snapshot = self._view(doc)
+        self._loaded_at = time.monotonic()
+        return self._snapshot
+
+    def refresh(self):
+        """Rebuild the feed and swap it in; returns the new feed, or None on failure"""
+        try:
+            self._pending_since = None
+            doc = self.build()
+            self.collection.replace_one({"_id": self.FEED_ID}, doc, upsert=True)
+            page_cache.invalidate()
+            return self._set_snapshot(doc)
+        except Exception as e:
+            print(f"Error refreshing home feed: {e}")
+            return None
+
+    def refresh_if_due(self):
+        """Refresher task: rebuild when listings changed or another worker has not just done it.
+
+        A change waits until the stored feed is HOME_FEED_MIN_REFRESH_SECONDS
+        old, and is dropped if a rebuild that started after it has since been
+        stored, so steady writes cost one rebuild per interval, not one per
+        worker per write.
+        """
+        while True:
+            try:
+                doc = self.collection.find_one({"_id": self.FEED_ID}, {"started_at": 1, "updated_at": 1})
+            except Exception as e:
+                print(f"Error checking home feed: {e}")
+                break
+            if doc is None:
+                break
+            pending = self._pending_since
+            if pending is not None and doc.get("started_at") and doc["started_at"] >= pending:
+                # Another worker's rebuild already includes the change
+                self._pending_since = pending = None
+            age = (datetime.utcnow() - doc["updated_at"]).total_seconds()
+            if pending is None:
+                if age < Config.HOME_FEED_REFRESH_SECONDS / 2:
+                    return
+                break
+            if age >= Config.HOME_FEED_MIN_REFRESH_SECONDS:
+                break
+            if self.refresher.wait(Config.HOME_FEED_MIN_REFRESH_SECONDS - age):
+                return
+        self.refresh()
+
+    def refresh_soon(self):
+        """Listings changed: rebuild on the refresher thread; bursts coalesce into one rebuild"""
+        if self._pending_since is None:
+            self._pending_since = datetime.utcnow()
+        self.refresher.trigger()
+
+    def expire(self):
+        """Drop this worker's copy, so the next get() reads the stored feed"""
+        self._loaded_at = 0
+
+    def get(self):
+        """The current feed, from this worker's copy or one lookup by _id"""
+        snapshot = self._snapshot
+        if snapshot is not None and time.monotonic() - self._loaded_at < Config.HOME_FEED_SNAPSHOT_SECONDS:
+            return snapshot
+        try:
+            doc = self.collection.find_one({"_id": self.FEED_ID})
+            if doc is not None:
+                return self._set_snapshot(doc)
+        except Exception as e:
+            print(f"Error loading home feed: {e}")
+            return snapshot or self._view({})
+        # Not built yet, e.g. on a fresh database
+        return self.refresh() or self._view({})
+
+@instrumented
+class GameCollection:
+    @property
+    def collection(self):
+        return db_instance.db.games
+
+    def _paginated_cursor(self, query, limit=None, after=None, before=None, sort="newest", offset=0,
+                          projection=None, collection=None):
+        """Keyset-paginated listing_view cursor ordered by (sort field, _id).
+
+        Returns (cursor, reversed); reversed is True when paging backwards,
+        in which case the results come out in the opposite display order.
+        projection limits the fields returned (see CARD_PROJECTION).
+        collection defaults to listing_view's catalog handle; the async layer
+        passes its Motor collection, whose cursors chain the same way.
+        """
+        collection = collection if collection is not None else listing_view_db.catalog
+        if sort == "relevance":
+            results = collection.find(query, {**(projection or {}), "score": {"$meta": "textScore"}}).sort(
+                [("score", {"$meta": "textScore"}), ("_id", -1)]
+            ).skip(offset)
+            if limit:
+                results = results.limit(int(limit))
+            return results, False
+
+        field, base = SORT_OPTIONS[sort]
+        match = dict(query)
+        direction = base
+        cursor = decode_cursor(after or before)
+        if cursor:
+            value, game_id = cursor
+            forward = bool(after)
+            op = "$lt" if (base == -1) == forward else "$gt"
+            match = {"$and": [match, {"$or": [
+                {field: {op: value}},
+                {field: value, "_id": {op: game_id}}
+            ]}]}
+            if not forward:
+                direction = -base
+
+        results = collection.find(match, projection).sort([(field, direction), ("_id", direction)])
+        if limit:
+            results = results.limit(int(limit))
+        return results, direction != base
+
+    def _paginated_find(self, query, limit=None, after=None, before=None, sort="newest", offset=0,
+                        projection=None):
+        results, reversed_order = self._paginated_cursor(query, limit, after, before, sort, offset, projection)
+        games = list(results)
+        if reversed_order:
+            # Paging backwards: restore display order
+            games.reverse()
+        return games
+
+    def get_all_games(self, limit=None, after=None, before=None):
+        try:
+            return self._paginated_find({}, limit, after, before)
+        except Exception as e:
+            print(f"Error getting games: {e}")
+            return []
+
+    def resolve_sort(self, filters):
+        """Requested sort order, defaulting to relevance for text searches"""
+        sort = filters.get("sort")
+        if sort not in SORT_OPTIONS or (sort == "relevance" and not filters.get("q")):
+            sort = "relevance" if filters.get("q") else "newest"
+        return sort
+
+    def _page_plan(self, filters, limit, after=None, before=None, projection=None):
+        """Work out one page's query without running it.
+
+        Returns (query, page, finish): page holds the _paginated_cursor
+        arguments and finish(games) turns the fetched rows into the
+        {games, next_cursor, prev_cursor} result. Shared by the sync and
+        async data layers.
+        """
+        sort = self.resolve_sort(filters)
+        query = self.build_search_query(filters)
+        if sort == "relevance":
+            end = decode_offset_cursor(before)
+            if end:
+                start = max(0, end - limit)
+                page = {"limit": end - start, "offset": start, "sort": sort, "projection": projection}
+                has_more = None
+            else:
+                start = decode_offset_cursor(after) or 0
+                page = {"limit": limit + 1, "offset": start, "sort": sort, "projection": projection}
+                has_more = False
+
+            def finish(games):
+                more = True if has_more is None else len(games) > limit
+                games = games[:limit]
+                return {
+                    "games": games,
+                    "next_cursor": encode_offset_cursor(start + len(games)) if games and more else None,
+                    "prev_cursor": encode_offset_cursor(start) if start > 0 else None
                 }
+            return query, page, finish
+
+        field = SORT_OPTIONS[sort][0]
+        page = {"limit": limit + 1, "after": after, "before": before, "sort": sort,
+                "projection": projection}
+        if before and decode_cursor(before):
+            def finish(games):
+                # Paged backwards from the cursor: the extra row (if any) comes first
+                has_more = len(games) > limit
+                if has_more:
+                    games = games[1:]
+                return {
+                    "games": games,
+                    "next_cursor": encode_cursor(games[-1], field) if games else None,
+                    "prev_cursor": encode_cursor(games[0], field) if games and has_more else None
+                }
+            return query, page, finish
+
+        def finish(games):
+            has_more = len(games) > limit
+            games = games[:limit]
+            return {
+                "games": games,
+                "next_cursor": encode_cursor(games[-1], field) if games and has_more else None,
+                "prev_cursor": encode_cursor(games[0], field) if games and after and decode_cursor(after) else None
+            }
+        return query, page, finish
+
+    def get_games_page(self, filters=None, limit=24, after=None, before=None):
+        """Return one page of games plus cursors for the neighbouring pages"""
+        try:
+            query, page, finish = self._page_plan(filters or {}, limit, after, before)
+            return finish(self._paginated_find(query, **page))
+        except Exception as e:
+            print(f"Error getting games page: {e}")
+            return {"games": [], "next_cursor": None, "prev_cursor": None}
+
+    def get_card_page(self, filters=None, limit=24, after=None, before=None):
+        """get_games_page for list views: card fields only, as ListingCard records"""
+        try:
+            query, page, finish = self._page_plan(filters or {}, limit, after, before, CARD_PROJECTION)
+            result = finish(self._paginated_find(query, **page))
+            result["games"] = ListingCard.from_docs(result["games"])
+            return result
+        except Exception as e:
+            print(f"Error getting games page: {e}")
+            return {"games": [], "next_cursor": None, "prev_cursor": None}
+
+    def facet_cache_key(self, filters):
+        return tuple(sorted((name, str(value)) for name, value in filters.items() if value and name != "sort"))
+
+    def _facet_pipeline(self, filters):
+        base_query = self.build_search_query(
+            {name: value for name, value in filters.items() if name not in FACET_FIELDS}
+        )
+        facet_query = self.build_search_query({name: filters.get(name) for name in FACET_FIELDS})
+        facets = {}
+        for name, field in FACET_FIELDS.items():
+            others = {f: value for f, value in facet_query.items() if f != field}
+            facets[name] = [
+                {"$match": others},
+                {"$group": {"_id": f"${field}", "count": {"$sum": 1}}}
             ]
-            result = list(self.collection.aggregate(pipeline))
-            return result[0] if result else None
+        return [{"$match": base_query}, {"$facet": facets}]
+
+    def _facet_counts(self, result):
+        return {
+            name: {str(row["_id"]): row["count"] for row in (result or {}).get(name, [])}
+            for name in FACET_FIELDS
+        }
+
+    def _unfiltered_counts(self, doc):
+        """Facet counts from the listing_counts document, or None when it is not built"""
+        if doc is None:
+            return None
+        return {name: {value: count for value, count in doc.get(name, {}).items() if count > 0}
+                for name in FACET_FIELDS}
+
+    def get_facets(self, filters):
+        """Per-console/condition/rarity counts for the search sidebar, in one $facet aggregation.
+
+        Each facet is counted with every filter applied except its own, so the
+        other options still show how many results they would give. With no
+        filters the counts come from listing_counts instead of an aggregation
+        over every listing.
+        """
+        key = self.facet_cache_key(filters)
+        cached = facet_cache.get(key)
+        if cached is not None:
+            return cached
+        try:
+            counts = self._unfiltered_counts(listing_counts_db.get()) if not key else None
+            if counts is None:
+                result = next(listing_view_db.catalog.aggregate(self._facet_pipeline(filters)), {})
+                counts = self._facet_counts(result)
+            facet_cache.set(key, counts)
+            return counts
+        except Exception as e:
+            print(f"Error getting search facets: {e}")
+            return {name: {} for name in FACET_FIELDS}
+
+    def get_game_by_id(self, game_id):
+        try:
+            return listing_view_db.catalog.find_one({"_id": ObjectId(game_id)})
         except Exception as e:
             print(f"Error getting game {game_id}: {e}")
             return None
 
+    def _listings_added(self, games):
+        """Bring the read models up to date with inserted games.
+
+        The insert has already succeeded, so a failure here is logged rather
+        than reported to the caller; reconcile() and the rebuilds repair it.
+        """
+        if not games:
+            return
+        try:
+            if len(games) == 1:
+                listing_view_db.upsert_game(games[0])
+            else:
+                listing_view_db.upsert_games(games)
+            seller_stats_db.add_listings(games)
+            listing_counts_db.add_listings(games)
+            price_rollups_db.record_listings(games)
+        except Exception as e:
+            print(f"Error updating read models for new listings: {e}")
+        home_feed_db.refresh_soon()
+        facet_cache.invalidate()
+        page_cache.invalidate()
+
     def add_game(self, game_data):
         try:
+            game_data.setdefault("updated_at", datetime.utcnow())
             result = self.collection.insert_one(game_data)
-            return result
         except Exception as e:
             print(f"Error adding game: {e}")
             return None
+        self._listings_added([game_data])
+        return result
 
-    def search_games(self, filters):
-        try:
-            query = {}
-            if filters.get('console'):
-                # Ensure ObjectId conversion for console filter
-                try:
-                    query['console_id'] = ObjectId(filters['console'])
-                except Exception:
-                    query['console_id'] = filters['console']
-            if filters.get('condition'):
-                query['condition'] = filters['condition']
-            if filters.get('rarity'):
-                query['rarity'] = filters['rarity']
-            pipeline = [
-                {"$match": query},
-                {
-                    "$lookup": {
-                        "from": "consoles",
-                        "localField": "console_id",
-                        "foreignField": "_id",
-                        "as": "console"
-                    }
-                },
-                {
-                    "$lookup": {
-                        "from": "sellers",
-                        "localField": "seller_id",
-                        "foreignField": "_id",
-                        "as": "seller"
-                    }
-                },
-                {"$unwind": "$console"},
-                {"$unwind": "$seller"},
-                {"$sort": {"date_listed": -1}}
-            ]
-            return list(self.collection.aggregate(pipeline))
+    def add_games(self, games):
+        """Insert many games in one unordered insert_many.
+
+        Returns {index: error_message} for the games that were not inserted;
+        every other game has its _id set.
+        """
+        errors = {}
+        now = datetime.utcnow()
+        for game in games:
+            game.setdefault("updated_at", now)
+        try:
+            self.collection.insert_many(games, ordered=False)
+        except BulkWriteError as e:
+            for write_error in e.details.get("writeErrors", []):
+                errors[write_error["index"]] = write_error.get("errmsg", "write failed")
+        except Exception as e:
+            print(f"Error adding games: {e}")
+            return {index: str(e) for index in range(len(games))}
+        self._listings_added([game for index, game in enumerate(games) if index not in errors])
+        return errors
+
+    def build_search_query(self, filters):
+        query = {}
+        if filters.get('q'):
+            query['$text'] = {'$search': filters['q']}
+        if filters.get('console'):
+            # Ensure ObjectId conversion for console filter
+            try:
+                query['console_id'] = ObjectId(filters['console'])
+            except Exception:
+                query['console_id'] = filters['console']
+        if filters.get('condition'):
+            query['condition'] = filters['condition']
+        if filters.get('rarity'):
+            query['rarity'] = filters['rarity']
+        price = {}
+        if filters.get('min_price'):
+            price['$gte'] = float(filters['min_price'])
+        if filters.get('max_price'):
+            price['$lte'] = float(filters['max_price'])
+        if price:
+            query['price'] = price
+        return query
+
+    def search_games(self, filters, limit=None, after=None, before=None, offset=0):
+        try:
+            query = self.build_search_query(filters)
+            return self._paginated_find(query, limit, after, before, self.resolve_sort(filters), offset)
         except Exception as e:
             print(f"Error searching games: {e}")
             return []
 
-    def add_game_image(self, game_id, filename):
+    def add_game_image(self, game_id, filename, pending=False):
         """Add image filename to game document"""
+        return bool(self.add_game_images(game_id, [filename], [filename] if pending else []))
+
+    def add_game_images(self, game_id, filenames, pending=()):
+        """Append images to a game in one $push/$each, returning the filenames added.
+
+        pending lists the ones still being processed. Nothing is added if
+        any of them is already on the game, so each file keeps one reference.
+        """
+        if not filenames:
+            return []
         try:
-            result = self.collection.update_one(
-                {"_id": ObjectId(game_id)},
-                {"$push": {"images": filename}}
-            )
-            return result.modified_count > 0
+            push = {"images": {"$each": list(filenames)}}
+            if pending:
+                push["pending_images"] = {"$each": list(pending)}
+            update = touched({"$push": push})
+            before = self.collection.find_one_and_update(
+                {"_id": ObjectId(game_id), "images": {"$nin": list(filenames)}}, update,
+                projection={"images": 1, "seller_id": 1})
+            if not before:
+                return []
+            listing_view_db.apply_game_update(game_id, update)
+            if not before.get("images"):
+                seller_stats_db.image_count_changed(before["seller_id"], 1)
+            page_cache.invalidate()
+            return list(filenames)
         except Exception as e:
-            print(f"Error adding image to game: {e}")
-            return False
+            print(f"Error adding images to game: {e}")
+            return []
+
+    def mark_image_ready(self, filename):
+        """Called by the image pipeline once an image blob has been processed"""
+        try:
+            query = {"pending_images": filename}
+            update = touched({"$pull": {"pending_images": filename}})
+            result = self.collection.update_many(query, update)
+            listing_view_db.apply_update_many(query, update)
+            if result.modified_count:
+                # A new listing's card shows a placeholder until its image is ready
+                home_feed_db.refresh_soon()
+                page_cache.invalidate()
+            return result.modified_count
+        except Exception as e:
+            print(f"Error marking image ready: {e}")
+            return 0
+
+    def mark_image_failed(self, filename):
+        """Drop an image the pipeline could not process from every game using it"""
+        try:
+            query = {"images": filename}
+            update = touched({"$pull": {"images": filename, "pending_images": filename}})
+            games = list(self.collection.find(query, {"seller_id": 1, "images": 1}))
+            result = self.collection.update_many(query, update)
+            listing_view_db.apply_update_many(query, update)
+            if result.modified_count:
+                # Only listings left with no image change their seller's counter
+                emptied = Counter(game["seller_id"] for game in games if set(game["images"]) == {filename})
+                for seller_id, count in emptied.items():
+                    seller_stats_db.image_count_changed(seller_id, -count)
+                home_feed_db.refresh_soon()
+                page_cache.invalidate()
+            return result.modified_count
+        except Exception as e:
+            print(f"Error marking image failed: {e}")
+            return 0
+
+    def get_image_status(self, game_id):
+        """Return [{"filename", "status"}] for each image of a game, or None if it does not exist"""
+        try:
+            game = self.collection.find_one({"_id": ObjectId(game_id)},
+                                            {"images": 1, "pending_images": 1})
+            if not game:
+                return None
+            pending = set(game.get("pending_images", []))
+            return [
+                {"filename": filename, "status": "pending" if filename in pending else "ready"}
+                for filename in game.get("images", [])
+            ]
+        except Exception as e:
+            print(f"Error getting image status: {e}")
+            return None
 
     def set_primary_image(self, game_id, filename):
         """Set primary image for game"""
+        return self.arrange_images(game_id, primary=filename)
+
+    def arrange_images(self, game_id, order=None, primary=None, seller_id=None):
+        """Reorder a game's images and/or choose its primary image in one update.
+
+        order must hold exactly the game's current images; primary must be
+        one of them, and defaults to the first of order. With seller_id the
+        update only applies to that seller's game.
+        """
         try:
-            result = self.collection.update_one(
-                {"_id": ObjectId(game_id)},
-                {"$set": {"primary_image": filename}}
-            )
-            return result.modified_count > 0
+            query = {"_id": ObjectId(game_id)}
+            if seller_id is not None:
+                query["seller_id"] = ObjectId(seller_id)
+            changes = {}
+            if order:
+                order = list(order)
+                if len(set(order)) != len(order) or (primary is not None and primary not in order):
+                    return False
+                query["images"] = {"$size": len(order), "$all": order}
+                changes["images"] = order
+                primary = primary if primary is not None else order[0]
+            elif primary is not None:
+                query["images"] = primary
+            if primary is None:
+                return False
+            changes["primary_image"] = primary
+            update = touched({"$set": changes})
+            result = self.collection.update_one(query, update)
+            if not result.matched_count:
+                return False
+            listing_view_db.apply_game_update(game_id, update)
+            page_cache.invalidate()
+            return True
         except Exception as e:
-            print(f"Error setting primary image: {e}")
+            print(f"Error arranging game images: {e}")
             return False
 
     def remove_game_image(self, game_id, filename):
         """Remove image from game"""
+        return bool(self.remove_game_images(game_id, [filename]))
+
+    def remove_game_images(self, game_id, filenames, seller_id=None):
+        """Remove several images from a game in one $pull, returning the filenames removed"""
+        if not filenames:
+            return []
         try:
-            result = self.collection.update_one(
-                {"_id": ObjectId(game_id)},
-                {"$pull": {"images": filename}}
-            )
-            return result.modified_count > 0
+            query = {"_id": ObjectId(game_id), "images": {"$in": list(filenames)}}
+            if seller_id is not None:
+                query["seller_id"] = ObjectId(seller_id)
+            update = touched({"$pull": {"images": {"$in": list(filenames)},
+                                        "pending_images": {"$in": list(filenames)}}})
+            before = self.collection.find_one_and_update(
+                query, update, projection={"images": 1, "seller_id": 1, "primary_image": 1})
+            if not before:
+                return []
+            removed = [filename for filename in before.get("images", []) if filename in filenames]
+            listing_view_db.apply_game_update(game_id, update)
+            if before.get("primary_image") in removed:
+                unset = touched({"$unset": {"primary_image": ""}})
+                self.collection.update_one({"_id": before["_id"], "primary_image": before["primary_image"]}, unset)
+                listing_view_db.apply_game_update(game_id, unset)
+            if len(removed) == len(before.get("images", [])):
+                seller_stats_db.image_count_changed(before["seller_id"], -1)
+            page_cache.invalidate()
+            for filename in removed:
+                if image_blobs_db.release(filename):
+                    image_handler.delete_files(filename)
+            return removed
         except Exception as e:
-            print(f"Error removing image from game: {e}")
-            return False
+            print(f"Error removing images from game: {e}")
+            return []
 
-    def is_game_owner(self, game_id, seller_id):
-        """Check if seller owns this game"""
+    def remove_game(self, game_id, seller_id):
+        """Delete one of a seller's listings and drop its image references"""
         try:
-            game = self.collection.find_one({
-                "_id": ObjectId(game_id),
-                "seller_id": ObjectId(seller_id)
-            })
-            return game is not None
+            game = self.collection.find_one_and_delete({"_id": ObjectId(game_id), "seller_id": ObjectId(seller_id)})
+            if not game:
+                return False
+            listing_view_db.collection.delete_one({"_id": game["_id"]})
+            seller_stats_db.add_listings([game], sign=-1)
+            listing_counts_db.add_listings([game], sign=-1)
+            home_feed_db.refresh_soon()
+            for filename in game.get("images", []):
+                if image_blobs_db.release(filename):
+                    image_handler.delete_files(filename)
+            facet_cache.invalidate()
+            page_cache.invalidate()
+            return True
         except Exception as e:
-            print(f"Error checking game ownership: {e}")
+            print(f"Error removing game: {e}")
             return False
 
+    def get_owned_game(self, game_id, seller_id, fields=("images", "pending_images", "primary_image")):
+        """A seller's game with just the given fields, or None if it does not exist or is not theirs.
+
+        One find_one on _id, so existence and ownership cost a single indexed lookup.
+        """
+        try:
+            return self.collection.find_one(
+                {"_id": ObjectId(game_id), "seller_id": ObjectId(seller_id)},
+                {field: 1 for field in fields}
+            )
+        except Exception as e:
+            print(f"Error getting game {game_id}: {e}")
+            return None
+
+    def is_game_owner(self, game_id, seller_id):
+        """Check if seller owns this game"""
+        return self.get_owned_game(game_id, seller_id, fields=("_id",)) is not None
+
+@instrumented
 class SellerCollection:
-    def __init__(self):
-        self.collection = db_instance.db.sellers
+    @property
+    def collection(self):
+        return db_instance.db.sellers
+
+    @property
+    def catalog(self):
+        return db_instance.catalog.sellers
 
     def get_all_sellers(self):
+        """Sellers directory with listing stats, served from seller_stats"""
+        sellers = seller_stats_db.get_directory()
+        if sellers:
+            return sellers
         try:
-            return list(self.collection.find().sort("rating", -1))
+            # Stats not built yet
+            return list(self.catalog.find().sort("rating", -1))
         except Exception as e:
             print(f"Error getting sellers: {e}")
             return []
 
     def get_seller_by_id(self, seller_id):
+        """Seller document; reads pinned to the primary bypass the cache and refresh it"""
         try:
+            cached = None if reads_pinned() else seller_cache.get(str(seller_id))
+            if cached is not None:
+                return dict(cached)
             if isinstance(seller_id, str):
                 seller_id = ObjectId(seller_id)
-            return self.collection.find_one({"_id": seller_id})
+            seller = self.catalog.find_one({"_id": seller_id})
+            if seller:
+                seller_cache.set(str(seller_id), seller)
+                return dict(seller)
+            return None
         except Exception as e:
             print(f"Error getting seller {seller_id}: {e}")
             return None
 
     def get_seller_games(self, seller_id):
         try:
-            pipeline = [
-                {
-                    "$match": {"seller_id": ObjectId(seller_id)}
-                },
-                {
-                    "$lookup": {
-                        "from": "consoles",
-                        "localField": "console_id",
-                        "foreignField": "_id",
-                        "as": "console"
-                    }
-                },
-                {
-                    "$unwind": "$console"
-                },
-                {
-                    "$sort": {"date_listed": -1}
-                }
-            ]
-            games_collection = db_instance.db.games
-            return list(games_collection.aggregate(pipeline))
+            return list(listing_view_db.catalog.find(
+                {"seller_id": ObjectId(seller_id)}
+            ).sort([("date_listed", -1), ("_id", -1)]))
         except Exception as e:
             print(f"Error getting seller games: {e}")
             return []
 
+    def get_seller_cards(self, seller_id):
+        """A seller's listings as ListingCard records, newest first"""
+        try:
+            return ListingCard.from_docs(listing_view_db.catalog.find(
+                {"seller_id": ObjectId(seller_id)}, CARD_PROJECTION
+            ).sort([("date_listed", -1), ("_id", -1)]))
+        except Exception as e:
+            print(f"Error getting seller games: {e}")
+            return []
+
+    def iter_seller_games(self, seller_id, batch_size=500):
+        """Stream a seller's listings from a cursor, for exports"""
+        return listing_view_db.catalog.find(
+            {"seller_id": ObjectId(seller_id)}
+        ).sort([("date_listed", -1), ("_id", -1)]).batch_size(batch_size)
+
     def get_seller_by_username(self, username):
         """Get seller by username"""
         try:
@@ -234,54 +1566,80 @@ class SellerCollection:
         try:
             # Hash password
             if 'password' in seller_data:
-                salt = secrets.token_hex(16)
-                password_hash = hashlib.sha256((seller_data['password'] + salt).encode()).hexdigest()
-                seller_data['password_hash'] = password_hash
-                seller_data['password_salt'] = salt
-                del seller_data['password']
+                seller_data['password_hash'] = credential_hasher.hash_password(seller_data.pop('password'))
             
             seller_data.setdefault('rating', 5.0)
             seller_data.setdefault('total_sales', 0)
             seller_data.setdefault('member_since', datetime.now())
+            seller_data['updated_at'] = datetime.utcnow()
             
             result = self.collection.insert_one(seller_data)
+            seller_stats_db.add_seller(seller_data)
+            seller_cache.invalidate(str(result.inserted_id))
+            page_cache.invalidate()
             return result.inserted_id
         except Exception as e:
             print(f"Error creating seller: {e}")
             return None
 
     def verify_password(self, seller_id, password):
-        """Verify seller password"""
-        try:
+        """Verify seller password, upgrading a legacy SHA-256 hash to scrypt on success.
+
+        Raises CredentialsBusy when the hashing pool is saturated.
+        """
+        # Credentials are never checked against a lagging secondary or the cache
+        with db_instance.primary_reads():
             seller = self.get_seller_by_id(seller_id)
-            if not seller or 'password_hash' not in seller:
-                return False
-            
-            password_hash = hashlib.sha256((password + seller['password_salt']).encode()).hexdigest()
-            return password_hash == seller['password_hash']
-        except Exception as e:
-            print(f"Error verifying password: {e}")
+        if not seller:
             return False
+        ok, needs_rehash = credential_hasher.verify(password, seller)
+        if ok and needs_rehash:
+            try:
+                self.collection.update_one(
+                    {"_id": seller["_id"], "password_hash": seller.get("password_hash")},
+                    {"$set": {"password_hash": credential_hasher.hash_password(password)},
+                     "$unset": {"password_salt": ""}}
+                )
+                seller_cache.invalidate(str(seller["_id"]))
+            except Exception as e:
+                print(f"Error upgrading password hash: {e}")
+        return ok
 
     def update_seller_profile(self, seller_id, update_data):
         """Update seller profile information"""
         try:
             result = self.collection.update_one(
                 {"_id": ObjectId(seller_id)},
-                {"$set": update_data}
+                touched({"$set": update_data})
             )
+            seller_cache.invalidate(str(seller_id))
+            page_cache.invalidate()
+            if result.modified_count > 0:
+                listing_view_db.sync_seller(seller_id, update_data)
+                seller_stats_db.sync_seller(seller_id, update_data)
+                session_store.invalidate_principal(seller_id)
             return result.modified_count > 0
         except Exception as e:
             print(f"Error updating seller profile: {e}")
             return False
 
+@instrumented
 class ConsoleCollection:
-    def __init__(self):
-        self.collection = db_instance.db.consoles
+    @property
+    def collection(self):
+        return db_instance.db.consoles
+
+    @property
+    def catalog(self):
+        return db_instance.catalog.consoles
 
     def get_all_consoles(self):
         try:
-            return list(self.collection.find().sort("name", 1))
+            consoles = console_cache.get("all")
+            if consoles is None:
+                consoles = list(self.catalog.find().sort("name", 1))
+                console_cache.set("all", consoles)
+            return list(consoles)
         except Exception as e:
             print(f"Error getting consoles: {e}")
             return []
@@ -290,20 +1648,29 @@ class ConsoleCollection:
         try:
             if isinstance(console_id, str):
                 console_id = ObjectId(console_id)
-            return self.collection.find_one({"_id": console_id})
+            return self.catalog.find_one({"_id": console_id})
         except Exception as e:
             print(f"Error getting console by ID: {e}")
             return None
 
     def add_console(self, console_data):
         try:
+            console_data.setdefault("updated_at", datetime.utcnow())
             result = self.collection.insert_one(console_data)
+            console_cache.invalidate()
             return result.inserted_id
         except Exception as e:
             print(f"Error adding console: {e}")
             return None
 
 # Initialize collections
+listing_view_db = ListingViewCollection()
+image_blobs_db = ImageBlobCollection()
+task_leases_db = TaskLeaseCollection()
+seller_stats_db = SellerStatsCollection()
+listing_counts_db = ListingCountsCollection()
+price_rollups_db = PriceRollupCollection()
+home_feed_db = HomeFeedCollection()
 games_db = GameCollection()
 sellers_db = SellerCollection()
 consoles_db = ConsoleCollection()
\ No newline at end of file
@@ -1,48 +1,141 @@
 # models/database.py
 from pymongo import MongoClient
-from pymongo.errors import ConnectionFailure, ServerSelectionTimeoutError
+from pymongo.errors import PyMongoError
+from pymongo.read_preferences import Nearest, Primary, PrimaryPreferred, Secondary, SecondaryPreferred
 from config import Config
-import sys
+from utils.db_metrics import db_metrics
+from contextlib import contextmanager
+from contextvars import ContextVar
+import os
+import threading
+
+READ_PREFERENCES = {
+    'primary': Primary,
+    'primaryPreferred': PrimaryPreferred,
+    'secondary': Secondary,
+    'secondaryPreferred': SecondaryPreferred,
+    'nearest': Nearest,
+}
+
+# Set for a request or block whose reads must see its own writes
+_primary_reads = ContextVar('primary_reads', default=False)
+
+def reads_pinned():
+    return _primary_reads.get()
+
+def catalog_read_preference():
+    """Read preference for browse reads, e.g. secondaryPreferred(maxStalenessSeconds=90)"""
+    mode = READ_PREFERENCES.get(Config.CATALOG_READ_PREFERENCE)
+    if mode is None:
+        print(f"❌ Unknown CATALOG_READ_PREFERENCE {Config.CATALOG_READ_PREFERENCE!r}, "
+              f"expected one of {', '.join(READ_PREFERENCES)}; reading from the primary")
+        return Primary()
+    if mode is Primary:
+        return Primary()
+    return mode(max_staleness=Config.CATALOG_MAX_STALENESS_SECONDS)
 
 class Database:
+    """Lazily creates one MongoClient per process.
+
+    Nothing connects at import time. The client is built on first use and
+    rebuilt in a forked worker, since MongoClient is not fork-safe.
+
+    db reads from the primary. catalog is the same database for browse
+    reads that tolerate replication lag: they go to a secondary at most
+    CATALOG_MAX_STALENESS_SECONDS behind, unless the caller is pinned to
+    the primary with pin_primary() or primary_reads().
+    """
     def __init__(self):
-        self.client = None
-        self.db = None
-        self.connect()
+        self._client = None
+        self._catalog = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    @property
+    def client(self):
+        if self._client is None or self._pid != os.getpid():
+            with self._lock:
+                if self._client is None or self._pid != os.getpid():
+                    self.connect()
+        return self._client
+
+    @property
+    def db(self):
+        return self.client[Config.DATABASE_NAME]
+
+    @property
+    def catalog(self):
+        client = self.client
+        if reads_pinned():
+            return client[Config.DATABASE_NAME]
+        return self._catalog
+
+    def pin_primary(self, pinned=True):
+        """Route this request's catalog reads to the primary, e.g. right after it wrote"""
+        _primary_reads.set(pinned)
+
+    @contextmanager
+    def primary_reads(self):
+        token = _primary_reads.set(True)
+        try:
+            yield
+        finally:
+            _primary_reads.reset(token)
+
+    def read_routing(self):
+        """Where catalog reads go, for /readyz"""
+        return {
+            'catalog_read_preference': Config.CATALOG_READ_PREFERENCE,
+            'max_staleness_seconds': Config.CATALOG_MAX_STALENESS_SECONDS,
+            'secondaries': len(self.client.secondaries),
+        }
+
+    def client_options(self):
+        """Pool and driver settings, all tunable through Config"""
+        options = {
+            'maxPoolSize': Config.MONGO_MAX_POOL_SIZE,
+            'minPoolSize': Config.MONGO_MIN_POOL_SIZE,
+            'maxIdleTimeMS': Config.MONGO_MAX_IDLE_TIME_MS,
+            'waitQueueTimeoutMS': Config.MONGO_WAIT_QUEUE_TIMEOUT_MS,
+            'serverSelectionTimeoutMS': Config.MONGO_SERVER_SELECTION_TIMEOUT_MS,
+            'readPreference': Config.MONGO_READ_PREFERENCE,
+        }
+        if Config.MONGO_COMPRESSORS:
+            options['compressors'] = Config.MONGO_COMPRESSORS
+        if Config.DB_METRICS_ENABLED:
+            options['event_listeners'] = [db_metrics]
+        return options
 
     def connect(self):
+        # MongoClient connects in the background, so this never blocks or raises on a down server
+        if self._client is not None and self._pid == os.getpid():
+            self._client.close()
+        self._client = MongoClient(Config.MONGODB_URI, **self.client_options())
+        self._catalog = self._client.get_database(Config.DATABASE_NAME,
+                                                  read_preference=catalog_read_preference())
+        self._pid = os.getpid()
+        print(f"🔄 MongoDB client created for process {self._pid} (database: {Config.DATABASE_NAME})")
+
+    def ping(self):
+        """Return (ok, error_message) without ever exiting the process"""
         try:
-            print("🔄 Attempting to connect to MongoDB Atlas...")
-            self.client = MongoClient(Config.MONGODB_URI, serverSelectionTimeoutMS=5000)
-            
-            # Test the connection
             self.client.admin.command('ping')
-            self.db = self.client[Config.DATABASE_NAME]
-            
-            print("✅ Successfully connected to MongoDB Atlas!")
-            print(f"📊 Database: {Config.DATABASE_NAME}")
-            
-        except ServerSelectionTimeoutError as e:
-            print(f"❌ MongoDB connection timeout: {e}")
-            print("💡 Please check your:")
-            print("   - Internet connection")
-            print("   - MongoDB Atlas connection string")
-            print("   - IP whitelist in MongoDB Atlas")
-            sys.exit(1)
-        except ConnectionFailure as e:
-            print(f"❌ MongoDB connection failed: {e}")
-            sys.exit(1)
+            return True, None
+        except PyMongoError as e:
+            return False, str(e)
         except Exception as e:
-            print(f"❌ Unexpected error: {e}")
-            sys.exit(1)
+            return False, f"Unexpected error: {e}"
 
     def get_db(self):
         return self.db
 
     def close_connection(self):
-        if self.client:
-            self.client.close()
+        if self._client is not None and self._pid == os.getpid():
+            self._client.close()
             print("🔌 MongoDB connection closed")
+        self._client = None
+        self._catalog = None
+        self._pid = None
 
 # Create global instance
-db_instance = Database()
\ No newline at end of file
+db_instance = Database()
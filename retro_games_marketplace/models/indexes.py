@@ -0,0 +1,132 @@
+# models/indexes.py
+from pymongo import ASCENDING, DESCENDING, TEXT
+from pymongo.errors import OperationFailure
+from bson.objectid import ObjectId
+from datetime import datetime
+from .database import db_instance
+
+# Every index the query methods in collections.py rely on, per collection.
+# create_index is a no-op when an identical index already exists.
+INDEXES = {
+    "games": [
+        ([("seller_id", ASCENDING), ("date_listed", DESCENDING)], {"name": "seller_date"}),
+        ([("date_listed", DESCENDING), ("_id", DESCENDING)], {"name": "date_listed_id"}),
+        ([("pending_images", ASCENDING)], {"name": "pending_images"}),
+        ([("images", ASCENDING)], {"name": "images"}),
+        ([("updated_at", ASCENDING)], {"name": "updated_at"}),
+    ],
+    "listing_view": [
+        ([("date_listed", DESCENDING), ("_id", DESCENDING)], {"name": "date_listed_id"}),
+        ([("console_id", ASCENDING), ("date_listed", DESCENDING), ("_id", DESCENDING)], {"name": "console_date"}),
+        ([("condition", ASCENDING), ("date_listed", DESCENDING), ("_id", DESCENDING)], {"name": "condition_date"}),
+        ([("rarity", ASCENDING), ("date_listed", DESCENDING), ("_id", DESCENDING)], {"name": "rarity_date"}),
+        ([("seller_id", ASCENDING), ("date_listed", DESCENDING), ("_id", DESCENDING)], {"name": "seller_date"}),
+        ([("pending_images", ASCENDING)], {"name": "pending_images"}),
+        ([("price", ASCENDING), ("_id", ASCENDING)], {"name": "price_id"}),
+        ([("title", TEXT), ("description", TEXT)],
+         {"name": "title_description_text", "weights": {"title": 10, "description": 1}}),
+    ],
+    "image_blobs": [
+        ([("filename", ASCENDING)], {"name": "filename_unique", "unique": True}),
+        ([("status", ASCENDING)], {"name": "status"}),
+    ],
+    "price_rollups": [
+        ([("title_key", ASCENDING), ("console_id", ASCENDING), ("day", ASCENDING),
+          ("condition", ASCENDING), ("rarity", ASCENDING)], {"name": "group_day_unique", "unique": True}),
+        ([("day", ASCENDING)], {"name": "day"}),
+        ([("console_id", ASCENDING), ("day", ASCENDING)], {"name": "console_day"}),
+    ],
+    "seller_stats": [
+        ([("rating", DESCENDING)], {"name": "rating"}),
+    ],
+    "sellers": [
+        ([("username", ASCENDING)], {"name": "username_unique", "unique": True}),
+        ([("rating", DESCENDING)], {"name": "rating"}),
+        ([("updated_at", ASCENDING)], {"name": "updated_at"}),
+    ],
+    "consoles": [
+        ([("name", ASCENDING)], {"name": "name"}),
+        ([("updated_at", ASCENDING)], {"name": "updated_at"}),
+    ],
+}
+
+def ensure_indexes():
+    """Create all declared indexes, return the number that failed"""
+    db = db_instance.db
+    failures = 0
+    for collection_name, indexes in INDEXES.items():
+        for keys, options in indexes:
+            try:
+                db[collection_name].create_index(keys, **options)
+            except OperationFailure as e:
+                failures += 1
+                print(f"❌ Could not create index {collection_name}.{options['name']}: {e}")
+    if not failures:
+        print(f"✅ Indexes ensured on {len(INDEXES)} collections")
+    return failures
+
+def _query_shapes():
+    """One representative cursor per query shape used by the collection classes"""
+    from .collections import games_db, sellers_db, consoles_db, encode_cursor
+
+    sample_id = ObjectId()
+    cursor = encode_cursor({"date_listed": datetime.now(), "_id": sample_id})
+    db = db_instance.db
+
+    def listing(filters, **page):
+        query = games_db.build_search_query(filters)
+        results, _ = games_db._paginated_cursor(query, limit=25, sort=games_db.resolve_sort(filters), **page)
+        return results
+
+    return {
+        "GameCollection.get_all_games": lambda: listing({}),
+        "GameCollection.get_all_games(after)": lambda: listing({}, after=cursor),
+        "GameCollection.get_all_games(before)": lambda: listing({}, before=cursor),
+        "GameCollection.search_games(console)": lambda: listing({"console": str(sample_id)}),
+        "GameCollection.search_games(condition)": lambda: listing({"condition": "Mint"}),
+        "GameCollection.search_games(rarity)": lambda: listing({"rarity": "Rare"}),
+        "GameCollection.search_games(console, condition, rarity)": lambda: listing(
+            {"console": str(sample_id), "condition": "Mint", "rarity": "Rare"}, after=cursor),
+        "GameCollection.search_games(q)": lambda: listing({"q": "mario"}),
+        "GameCollection.search_games(q, sort=newest)": lambda: listing({"q": "mario", "sort": "newest"}),
+        "GameCollection.search_games(price range, sort=price_asc)": lambda: listing(
+            {"min_price": 500, "max_price": 3000, "sort": "price_asc"}),
+        "GameCollection.search_games(sort=price_desc)": lambda: listing(
+            {"sort": "price_desc"}, after=encode_cursor({"price": 1000, "_id": sample_id}, "price")),
+        "GameCollection.get_game_by_id": lambda: db.listing_view.find({"_id": sample_id}),
+        "GameCollection.get_owned_game": lambda: games_db.collection.find({"_id": sample_id, "seller_id": sample_id}),
+        "SellerCollection.get_all_sellers": lambda: db.seller_stats.find().sort("rating", -1),
+        "SellerStatsCollection.get": lambda: db.seller_stats.find({"_id": sample_id}),
+        "SellerCollection.get_seller_by_username": lambda: sellers_db.collection.find({"username": "retro_gamer"}),
+        "SellerCollection.get_seller_games": lambda: db.listing_view.find(
+            {"seller_id": sample_id}).sort([("date_listed", -1), ("_id", -1)]),
+        "ConsoleCollection.get_all_consoles": lambda: consoles_db.collection.find().sort("name", 1),
+        "PriceRollupCollection.get_price_guide": lambda: db.price_rollups.find(
+            {"title_key": "super mario bros", "console_id": sample_id, "day": {"$gte": datetime.now()}}),
+    }
+
+def _uses_collscan(plan):
+    if isinstance(plan, dict):
+        if plan.get("stage") == "COLLSCAN":
+            return True
+        return any(_uses_collscan(value) for value in plan.values())
+    if isinstance(plan, list):
+        return any(_uses_collscan(value) for value in plan)
+    return False
+
+def verify_query_plans():
+    """Explain every query shape, return the names of those that fall back to COLLSCAN"""
+    failing = []
+    for name, make_cursor in _query_shapes().items():
+        try:
+            plan = make_cursor().explain().get("queryPlanner", {}).get("winningPlan", {})
+        except Exception as e:
+            print(f"❌ Could not explain {name}: {e}")
+            failing.append(name)
+            continue
+        if _uses_collscan(plan):
+            print(f"❌ {name} uses COLLSCAN")
+            failing.append(name)
+    if not failing:
+        print("✅ All query shapes are index-backed")
+    return failing
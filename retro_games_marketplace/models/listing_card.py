@@ -0,0 +1,43 @@
+# models/listing_card.py
+
+# listing_view fields a listing card needs: what the templates render plus
+# the sort keys that page cursors are built from
+CARD_PROJECTION = {
+    "title": 1, "condition": 1, "rarity": 1, "price": 1, "date_listed": 1,
+    "images": 1, "pending_images": 1, "primary_image": 1, "console.name": 1, "seller_id": 1,
+    "seller.username": 1, "seller.rating": 1, "seller.total_sales": 1,
+}
+
+class ListingCard:
+    """One game as the list views show it, built from a CARD_PROJECTION row.
+
+    List views render these instead of raw documents, so a template can only
+    reach the fields the query fetched.
+    """
+    __slots__ = ("id", "title", "console_name", "condition", "rarity", "price", "date_listed",
+                 "image", "processing", "seller_id", "seller_username", "seller_rating",
+                 "seller_total_sales")
+
+    def __init__(self, doc):
+        seller = doc.get("seller") or {}
+        pending = doc.get("pending_images") or []
+        ready = [filename for filename in doc.get("images") or [] if filename not in pending]
+        self.id = doc["_id"]
+        self.title = doc.get("title", "")
+        self.console_name = (doc.get("console") or {}).get("name")
+        self.condition = doc.get("condition")
+        self.rarity = doc.get("rarity")
+        self.price = doc.get("price") or 0
+        self.date_listed = doc.get("date_listed")
+        # The chosen primary image once processed, else the first processed one
+        primary = doc.get("primary_image")
+        self.image = primary if primary in ready else (ready[0] if ready else None)
+        self.processing = bool(pending)
+        self.seller_id = doc.get("seller_id")
+        self.seller_username = seller.get("username", "")
+        self.seller_rating = seller.get("rating")
+        self.seller_total_sales = seller.get("total_sales", 0)
+
+    @classmethod
+    def from_docs(cls, docs):
+        return [cls(doc) for doc in docs]
@@ -9,6 +9,14 @@ def reset_database():
     db.games.delete_many({})
     db.sellers.delete_many({})
     db.consoles.delete_many({})
+    db.listing_view.delete_many({})
+    db.image_blobs.delete_many({})
+    db.seller_stats.delete_many({})
+    db.listing_counts.delete_many({})
+    db.home_feed.delete_many({})
+    db.price_rollups.delete_many({})
+    db.change_stream_state.delete_many({})
+    db.task_leases.delete_many({})
     print("✅ Database reset complete!")
     print("🔄 Restart your Flask app to get clean sample data")
 
@@ -0,0 +1,25 @@
+# tests/test_credentials.py
+import threading
+import time
+import unittest
+from unittest import mock
+from config import Config
+from utils.credentials import CredentialHasher, CredentialsBusy
+
+class SlotTest(unittest.TestCase):
+    def test_timed_out_job_keeps_its_slot_until_it_finishes(self):
+        hasher = CredentialHasher(workers=1, max_pending=2)
+        release = threading.Event()
+        with mock.patch.object(Config, 'PASSWORD_HASH_TIMEOUT', 0.2):
+            with self.assertRaises(CredentialsBusy):
+                hasher._run(release.wait, 5)
+            # The job is still running on the pool, so its slot is still taken
+            self.assertEqual(hasher._slots._value, 1)
+            release.set()
+            deadline = time.monotonic() + 5
+            while hasher._slots._value != 2 and time.monotonic() < deadline:
+                time.sleep(0.01)
+        self.assertEqual(hasher._slots._value, 2)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,33 @@
+# tests/test_image_pipeline.py
+import threading
+import unittest
+from utils.image_pipeline import ImagePipeline
+
+class ShutdownTest(unittest.TestCase):
+    def test_shutdown_returns_with_a_remote_fetch_in_flight(self):
+        pipeline = ImagePipeline(max_workers=1)
+        started = threading.Event()
+        release = threading.Event()
+
+        def fetch(game_id, url):
+            started.set()
+            release.wait(5)
+            # What submit() does once the download is staged
+            pipeline._get_executor()
+
+        pipeline._fetch_remote = fetch
+        pipeline.queue_remote("game", "https://example.com/cover.jpg")
+        self.assertTrue(started.wait(5))
+
+        stopper = threading.Thread(target=pipeline.shutdown, daemon=True)
+        stopper.start()
+        stopper.join(0.2)
+        release.set()
+        stopper.join(10)
+
+        self.assertFalse(stopper.is_alive(), "shutdown() deadlocked with a fetch in flight")
+        self.assertIsNone(pipeline._fetcher)
+        self.assertIsNone(pipeline._executor)
+
+if __name__ == '__main__':
+    unittest.main()
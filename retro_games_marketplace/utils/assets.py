@@ -0,0 +1,158 @@
+# utils/assets.py
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import shutil
+from flask import abort, current_app, request, send_from_directory
+from werkzeug.security import safe_join
+from config import Config
+
+try:
+    import brotli
+except ImportError:  # optional: without it assets are only precompressed with gzip
+    brotli = None
+
+# Text assets worth precompressing; images are already compressed
+COMPRESSIBLE = {'.css', '.js', '.svg', '.json', '.txt', '.map', '.html', '.ico'}
+# A year, the longest max-age browsers honour
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def _file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(64 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()[:12]
+
+def build_assets(static_folder=None, output_folder=None):
+    """Copy every static file to a content-hashed name under static/dist, with .gz and .br siblings.
+
+    Writes manifest.json mapping each original path (as passed to
+    url_for('static')) to its fingerprinted path. Uploads are skipped: their
+    names are already unique per content. Returns the manifest.
+    """
+    static_folder = static_folder or os.path.join(PROJECT_ROOT, Config.STATIC_FOLDER)
+    output_folder = output_folder or os.path.join(static_folder, Config.ASSET_DIST_DIR)
+    skip = {os.path.normpath(os.path.join(static_folder, name)) for name in ('uploads', Config.ASSET_DIST_DIR)}
+    manifest = {}
+    for root, dirs, files in os.walk(static_folder):
+        dirs[:] = [d for d in dirs if os.path.normpath(os.path.join(root, d)) not in skip]
+        for name in files:
+            source = os.path.join(root, name)
+            logical = os.path.relpath(source, static_folder).replace(os.sep, '/')
+            stem, ext = os.path.splitext(logical)
+            hashed = f"{stem}.{_file_hash(source)}{ext}"
+            target = os.path.join(output_folder, hashed)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            if not os.path.exists(target):
+                shutil.copyfile(source, target)
+                if ext.lower() in COMPRESSIBLE:
+                    with open(source, 'rb') as f:
+                        data = f.read()
+                    with open(target + '.gz', 'wb') as f:
+                        f.write(gzip.compress(data, compresslevel=9, mtime=0))
+                    if brotli is not None:
+                        with open(target + '.br', 'wb') as f:
+                            f.write(brotli.compress(data, quality=11))
+            manifest[logical] = f"{Config.ASSET_DIST_DIR}/{hashed}"
+
+    tmp_path = os.path.join(output_folder, 'manifest.json.tmp')
+    os.makedirs(output_folder, exist_ok=True)
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, os.path.join(output_folder, 'manifest.json'))
+    return manifest
+
+class AssetPipeline:
+    """Serves /static: fingerprinted names in url_for, far-future caching and precompressed files.
+
+    Without a manifest (build_assets.py not run) URLs are left unchanged and
+    files are served as before, so development needs no build step.
+    """
+    def __init__(self):
+        self.manifest = {}
+        self.fingerprinted = set()
+
+    def init_app(self, app):
+        self.static_folder = os.path.join(app.root_path, Config.STATIC_FOLDER)
+        self.load_manifest()
+        app.add_url_rule('/static/<path:filename>', endpoint='static', view_func=self.send_static)
+        app.url_defaults(self.fingerprint_url)
+
+    def load_manifest(self):
+        path = os.path.join(self.static_folder, Config.ASSET_DIST_DIR, 'manifest.json')
+        try:
+            with open(path) as f:
+                self.manifest = json.load(f)
+            self.fingerprinted = set(self.manifest.values())
+            print(f"✅ Loaded asset manifest ({len(self.manifest)} files)")
+        except FileNotFoundError:
+            self.manifest, self.fingerprinted = {}, set()
+        except (OSError, ValueError) as e:
+            print(f"❌ Error loading asset manifest: {e}")
+            self.manifest, self.fingerprinted = {}, set()
+
+    def fingerprint_url(self, endpoint, values):
+        """url_defaults hook: url_for('static', filename=...) points at the hashed copy"""
+        if endpoint == 'static' and values.get('filename') in self.manifest:
+            values['filename'] = self.manifest[values['filename']]
+
+    def is_immutable(self, filename):
+        # Uploads and their variants are named per content and never rewritten
+        return filename in self.fingerprinted or filename.startswith('uploads/')
+
+    def send_static(self, filename):
+        if filename.startswith('uploads/') and Config.STATIC_SENDFILE in ('x-accel', 'x-sendfile'):
+            return self.offload_upload(filename)
+
+        immutable = self.is_immutable(filename)
+        max_age = IMMUTABLE_MAX_AGE if immutable else None
+        encoding = self.precompressed_encoding(filename) if filename in self.fingerprinted else None
+        if encoding:
+            suffix = '.br' if encoding == 'br' else '.gz'
+            response = send_from_directory(self.static_folder, filename + suffix, max_age=max_age,
+                                           mimetype=mimetypes.guess_type(filename)[0])
+            response.headers['Content-Encoding'] = encoding
+        else:
+            response = send_from_directory(self.static_folder, filename, max_age=max_age)
+        if filename in self.fingerprinted:
+            response.vary.add('Accept-Encoding')
+        if immutable:
+            response.cache_control.public = True
+            response.cache_control.immutable = True
+        return response
+
+    def offload_upload(self, filename):
+        """Empty response telling the front proxy which file to send, so no worker streams it.
+
+        x-accel: nginx, with an internal location at X_ACCEL_UPLOADS_PREFIX
+        aliased to static/uploads. x-sendfile: Apache mod_xsendfile or
+        lighttpd, given the absolute path.
+        """
+        relative = filename[len('uploads/'):]
+        path = safe_join(os.path.join(self.static_folder, 'uploads'), relative)
+        if path is None:
+            abort(404)
+        response = current_app.response_class(status=200)
+        if Config.STATIC_SENDFILE == 'x-accel':
+            response.headers['X-Accel-Redirect'] = Config.X_ACCEL_UPLOADS_PREFIX + relative
+        else:
+            response.headers['X-Sendfile'] = os.path.abspath(path)
+        response.headers['Content-Type'] = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+        response.cache_control.public = True
+        response.cache_control.max_age = IMMUTABLE_MAX_AGE
+        response.cache_control.immutable = True
+        return response
+
+    def precompressed_encoding(self, filename):
+        accepted = request.accept_encodings
+        for encoding, suffix in (('br', '.br'), ('gzip', '.gz')):
+            if accepted[encoding] and os.path.exists(os.path.join(self.static_folder, filename + suffix)):
+                return encoding
+        return None
+
+# Global instance
+asset_pipeline = AssetPipeline()
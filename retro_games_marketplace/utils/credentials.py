@@ -0,0 +1,85 @@
+# utils/credentials.py
+import hashlib
+import hmac
+import secrets
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from config import Config
+
+class CredentialsBusy(Exception):
+    """Raised when every hashing slot is taken; the caller should ask the user to retry"""
+
+class CredentialHasher:
+    """scrypt password hashing on a small bounded pool.
+
+    hashlib.scrypt releases the GIL, so a thread pool hashes in parallel
+    without blocking the request threads' Python work. At most
+    PASSWORD_HASH_MAX_PENDING hashes run or wait at once (each one takes
+    128 * n * r bytes of memory); beyond that callers get CredentialsBusy.
+    """
+    def __init__(self, workers=None, max_pending=None):
+        self.workers = workers or Config.PASSWORD_HASH_WORKERS
+        self._slots = threading.BoundedSemaphore(max_pending or Config.PASSWORD_HASH_MAX_PENDING)
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='scrypt')
+            return self._executor
+
+    def _run(self, fn, *args):
+        if not self._slots.acquire(timeout=Config.PASSWORD_HASH_TIMEOUT):
+            raise CredentialsBusy("Too many logins in progress")
+        try:
+            future = self._get_executor().submit(fn, *args)
+        except Exception:
+            self._slots.release()
+            raise
+        # The slot is held until the job is done, not just until the caller gives up on it
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            return future.result(timeout=Config.PASSWORD_HASH_TIMEOUT)
+        except FutureTimeout:
+            # Still queued: drop it (which frees the slot); already running: it frees the slot when it ends
+            future.cancel()
+            raise CredentialsBusy("Password check timed out")
+
+    def _scrypt(self, password, salt, n, r, p):
+        return hashlib.scrypt(password.encode(), salt=salt, n=n, r=r, p=p,
+                              maxmem=256 * n * r, dklen=32)
+
+    def hash_password(self, password):
+        """Return 'scrypt$n$r$p$salt$hash' for storing in password_hash"""
+        n, r, p = Config.SCRYPT_N, Config.SCRYPT_R, Config.SCRYPT_P
+        salt = secrets.token_bytes(16)
+        derived = self._run(self._scrypt, password, salt, n, r, p)
+        return f"scrypt${n}${r}${p}${salt.hex()}${derived.hex()}"
+
+    def verify(self, password, seller):
+        """Check a password against a seller document, return (ok, needs_rehash).
+
+        Understands scrypt hashes and the two legacy SHA-256 formats: salted
+        (password_salt field, from create_seller) and unsalted (seeded sellers).
+        """
+        stored = seller.get('password_hash') or ''
+        if stored.startswith('scrypt$'):
+            try:
+                _, n, r, p, salt, expected = stored.split('$')
+                n, r, p = int(n), int(r), int(p)
+            except ValueError:
+                return False, False
+            derived = self._run(self._scrypt, password, bytes.fromhex(salt), n, r, p)
+            ok = hmac.compare_digest(derived.hex(), expected)
+            return ok, ok and (n, r, p) != (Config.SCRYPT_N, Config.SCRYPT_R, Config.SCRYPT_P)
+
+        if not stored:
+            return False, False
+        salt = seller.get('password_salt', '')
+        legacy = hashlib.sha256((password + salt).encode()).hexdigest()
+        ok = hmac.compare_digest(legacy, stored)
+        return ok, ok
+
+# Global instance
+credential_hasher = CredentialHasher()
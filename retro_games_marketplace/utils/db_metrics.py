@@ -0,0 +1,223 @@
+# utils/db_metrics.py
+import contextvars
+import inspect
+import queue
+import threading
+import time
+from collections import defaultdict
+from functools import wraps
+from pymongo import monitoring
+from config import Config
+
+# Upper bounds (seconds) of the latency histogram buckets
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+INF_LABEL = 'le="+Inf"'
+
+# Commands whose plan can be explained when they run slow
+EXPLAINABLE = {'find', 'aggregate', 'count', 'distinct'}
+
+# Session and cluster fields the server rejects inside an explain
+DRIVER_FIELDS = {'lsid', '$db', '$clusterTime', '$readPreference', 'txnNumber', 'readConcern'}
+
+_caller = contextvars.ContextVar('db_caller', default='other')
+_request_stats = contextvars.ContextVar('db_request_stats', default=None)
+
+def instrumented(cls):
+    """Class decorator: label every query a public method issues with Class.method"""
+    if not Config.DB_METRICS_ENABLED:
+        return cls
+    for name, method in list(vars(cls).items()):
+        if name.startswith('_') or not callable(method):
+            continue
+        setattr(cls, name, _label(method, f"{cls.__name__}.{name}"))
+    return cls
+
+def _label(method, label):
+    if inspect.iscoroutinefunction(method):
+        @wraps(method)
+        async def async_wrapper(*args, **kwargs):
+            token = _caller.set(label)
+            try:
+                return await method(*args, **kwargs)
+            finally:
+                _caller.reset(token)
+        return async_wrapper
+
+    @wraps(method)
+    def wrapper(*args, **kwargs):
+        token = _caller.set(label)
+        try:
+            return method(*args, **kwargs)
+        finally:
+            _caller.reset(token)
+    return wrapper
+
+class Histogram:
+    __slots__ = ('counts', 'total', 'count')
+
+    def __init__(self):
+        self.counts = [0] * len(BUCKETS)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        for i, bound in enumerate(BUCKETS):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        self.total += value
+        self.count += 1
+
+class RequestStats:
+    """Database work done while serving one Flask request"""
+    __slots__ = ('started', 'commands', 'db_seconds', 'documents')
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.commands = 0
+        self.db_seconds = 0.0
+        self.documents = 0
+
+class DBMetrics(monitoring.CommandListener):
+    """Records latency, documents returned and failures per (command, caller)"""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._inflight = {}
+        self.latency = defaultdict(Histogram)
+        self.documents = defaultdict(int)
+        self.failures = defaultdict(int)
+        self.requests = defaultdict(Histogram)
+        self.request_commands = defaultdict(int)
+        self._explain_queue = queue.Queue(maxsize=100)
+        self._explained = {}
+        self._explain_thread = None
+
+    # pymongo publishes these on the thread that ran the command
+    def started(self, event):
+        command = event.command if event.command_name in EXPLAINABLE else None
+        self._inflight[(event.connection_id, event.request_id)] = (
+            _caller.get(), event.database_name, command)
+
+    def succeeded(self, event):
+        self._record(event, self._count_documents(event.reply), failed=False)
+
+    def failed(self, event):
+        self._record(event, 0, failed=True)
+
+    def _record(self, event, documents, failed):
+        caller, database_name, command = self._inflight.pop(
+            (event.connection_id, event.request_id), ('other', None, None))
+        seconds = event.duration_micros / 1_000_000
+        key = (event.command_name, caller)
+        with self._lock:
+            self.latency[key].observe(seconds)
+            self.documents[key] += documents
+            if failed:
+                self.failures[key] += 1
+
+        stats = _request_stats.get()
+        if stats is not None:
+            stats.commands += 1
+            stats.db_seconds += seconds
+            stats.documents += documents
+
+        if command is not None and seconds * 1000 >= Config.SLOW_QUERY_MS:
+            self._queue_explain(key, seconds, database_name, command)
+
+    def _count_documents(self, reply):
+        cursor = reply.get('cursor') if isinstance(reply, dict) else None
+        if cursor:
+            return len(cursor.get('firstBatch') or cursor.get('nextBatch') or [])
+        return reply.get('n', 0) if isinstance(reply, dict) else 0
+
+    def _queue_explain(self, key, seconds, database_name, command):
+        # At most one explain per query shape per minute
+        now = time.monotonic()
+        if now - self._explained.get(key, -60) < 60:
+            return
+        self._explained[key] = now
+        explain = {field: value for field, value in command.items() if field not in DRIVER_FIELDS}
+        try:
+            self._explain_queue.put_nowait((key, seconds, database_name, explain))
+        except queue.Full:
+            return
+        if self._explain_thread is None or not self._explain_thread.is_alive():
+            self._explain_thread = threading.Thread(target=self._explain_worker, daemon=True)
+            self._explain_thread.start()
+
+    def _explain_worker(self):
+        # Runs outside the request; its own commands are labelled as explain and never re-explained
+        from models.database import db_instance
+        while True:
+            (command_name, caller), seconds, database_name, command = self._explain_queue.get()
+            token = _caller.set('explain')
+            try:
+                plan = db_instance.client[database_name].command(
+                    'explain', command, verbosity='queryPlanner')
+                winning = plan.get('queryPlanner', {}).get('winningPlan', plan)
+                print(f"🐢 Slow {command_name} in {caller}: {seconds * 1000:.1f} ms, plan: {winning}")
+            except Exception as e:
+                print(f"🐢 Slow {command_name} in {caller}: {seconds * 1000:.1f} ms (explain failed: {e})")
+            finally:
+                _caller.reset(token)
+
+    def start_request(self):
+        return _request_stats.set(RequestStats())
+
+    def finish_request(self, token, endpoint):
+        """Close the request's stats; returns them so the caller can set headers"""
+        stats = _request_stats.get()
+        _request_stats.reset(token)
+        if stats is None:
+            return None
+        elapsed = time.perf_counter() - stats.started
+        with self._lock:
+            self.requests[endpoint or 'unknown'].observe(elapsed)
+            self.request_commands[endpoint or 'unknown'] += stats.commands
+        return stats, elapsed
+
+    def render_prometheus(self):
+        """All metrics in the Prometheus text exposition format"""
+        with self._lock:
+            lines = self._histogram_lines(
+                'mongo_command_duration_seconds', 'MongoDB command latency by caller',
+                ('command', 'caller'), self.latency)
+            lines += self._counter_lines(
+                'mongo_command_documents_returned_total', 'Documents returned by MongoDB commands',
+                ('command', 'caller'), self.documents)
+            lines += self._counter_lines(
+                'mongo_command_failures_total', 'Failed MongoDB commands',
+                ('command', 'caller'), self.failures)
+            lines += self._histogram_lines(
+                'http_request_duration_seconds', 'Request latency by endpoint',
+                ('endpoint',), {(endpoint,): hist for endpoint, hist in self.requests.items()})
+            lines += self._counter_lines(
+                'http_request_mongo_commands_total', 'MongoDB commands issued by endpoint',
+                ('endpoint',), {(endpoint,): count for endpoint, count in self.request_commands.items()})
+        return '\n'.join(lines) + '\n'
+
+    def _labels(self, names, values, *extra):
+        pairs = [f'{name}="{value}"' for name, value in zip(names, values)]
+        return '{' + ','.join(pairs + list(extra)) + '}'
+
+    def _histogram_lines(self, metric, help_text, names, histograms):
+        lines = [f'# HELP {metric} {help_text}', f'# TYPE {metric} histogram']
+        for values, hist in sorted(histograms.items()):
+            cumulative = 0
+            for bound, count in zip(BUCKETS, hist.counts):
+                cumulative += count
+                le = f'le="{bound}"'
+                lines.append(f'{metric}_bucket{self._labels(names, values, le)} {cumulative}')
+            lines.append(f'{metric}_bucket{self._labels(names, values, INF_LABEL)} {hist.count}')
+            lines.append(f'{metric}_sum{self._labels(names, values)} {hist.total:.6f}')
+            lines.append(f'{metric}_count{self._labels(names, values)} {hist.count}')
+        return lines
+
+    def _counter_lines(self, metric, help_text, names, counters):
+        lines = [f'# HELP {metric} {help_text}', f'# TYPE {metric} counter']
+        for values, count in sorted(counters.items()):
+            lines.append(f'{metric}{self._labels(names, values)} {count}')
+        return lines
+
+# Global instance
+db_metrics = DBMetrics()
@@ -0,0 +1,220 @@
+# utils/image_pipeline.py
+import http.client
+import ipaddress
+import os
+import socket
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime, timedelta
+from urllib.parse import urlparse
+from urllib.request import (HTTPHandler, HTTPSHandler, HTTPRedirectHandler, ProxyHandler, Request,
+                            build_opener)
+from werkzeug.datastructures import FileStorage
+from config import Config
+from utils.image_utils import image_handler
+
+def _process_image(filename):
+    """Entry point in the worker processes"""
+    return image_handler.process_staged(filename)
+
+def _public_connection(address, timeout=socket._GLOBAL_DEFAULT_TIMEOUT, source_address=None, **kwargs):
+    """socket.create_connection that refuses hosts resolving to loopback, private or link-local addresses.
+
+    It connects to the address it checked, so the name cannot be re-resolved
+    to an internal one in between.
+    """
+    host, port = address
+    addresses = [info[4][0] for info in socket.getaddrinfo(host, port, type=socket.SOCK_STREAM)]
+    for resolved in addresses:
+        ip = ipaddress.ip_address(resolved.split('%')[0])
+        if not ip.is_global or ip.is_multicast:
+            raise ValueError(f"refusing to fetch from {host} ({ip}): not a public address")
+    return socket.create_connection((addresses[0], port), timeout, source_address)
+
+class _PublicHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._create_connection = _public_connection
+
+class _PublicHTTPSConnection(http.client.HTTPSConnection):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._create_connection = _public_connection
+
+class _PublicHTTPHandler(HTTPHandler):
+    def http_open(self, req):
+        return self.do_open(_PublicHTTPConnection, req)
+
+class _PublicHTTPSHandler(HTTPSHandler):
+    def https_open(self, req):
+        return self.do_open(_PublicHTTPSConnection, req, context=self._context)
+
+class _HTTPRedirectHandler(HTTPRedirectHandler):
+    def redirect_request(self, req, fp, code, msg, headers, newurl):
+        if urlparse(newurl).scheme not in ('http', 'https'):
+            raise ValueError(f"refusing redirect to {newurl}")
+        return super().redirect_request(req, fp, code, msg, headers, newurl)
+
+# Remote images come from user-supplied URLs: no proxies from the environment,
+# and every connection, redirects included, must reach a public address
+_remote_opener = build_opener(ProxyHandler({}), _PublicHTTPHandler, _PublicHTTPSHandler, _HTTPRedirectHandler)
+
+class ImagePipeline:
+    """Stores uploads by content hash and processes new ones on a process pool"""
+    def __init__(self, max_workers=None):
+        self.max_workers = max_workers or Config.IMAGE_WORKERS
+        self._executor = None
+        self._pid = None
+        self._fetcher = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self):
+        with self._lock:
+            # A pool inherited across fork() has no live workers in the child
+            if self._executor is None or self._pid != os.getpid():
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+                self._pid = os.getpid()
+            return self._executor
+
+    def accept_upload(self, image_file, budget=None):
+        """Stage an upload and take a reference on its blob, return (filename, error_message).
+
+        A byte-identical upload resolves to the existing blob and its staged
+        copy is discarded, so it is never processed twice.
+        """
+        from models.collections import image_blobs_db
+
+        filename, temp_path, error = image_handler.stage_upload(image_file, budget)
+        if error:
+            return None, error
+        try:
+            digest, _ = os.path.splitext(os.path.basename(filename))
+            filename, is_new = image_blobs_db.acquire(digest, filename)
+            if is_new:
+                os.replace(temp_path, image_handler.staged_path(filename))
+            else:
+                os.remove(temp_path)
+            return filename, None
+        except Exception as e:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            return None, f"Error storing upload: {str(e)}"
+
+    def reuse(self, filename):
+        """Take a reference on an already stored image by its content name, e.g. from an export.
+
+        Returns (filename, error_message) like accept_upload.
+        """
+        from models.collections import image_blobs_db
+
+        if not image_handler.is_content_filename(filename) or not image_blobs_db.reference(filename):
+            return None, "not a stored image"
+        return filename, None
+
+    def release(self, filenames):
+        """Drop references taken by accept_upload or reuse that did not end up on a game"""
+        from models.collections import image_blobs_db
+
+        for filename in filenames:
+            if image_blobs_db.release(filename):
+                image_handler.delete_files(filename)
+
+    def pending(self, filenames):
+        """The subset of filenames whose blobs are not processed yet"""
+        from models.collections import image_blobs_db
+
+        statuses = image_blobs_db.get_statuses(filenames)
+        return [filename for filename in filenames if statuses[filename] != 'ready']
+
+    def submit(self, filenames):
+        """Queue unclaimed blobs for processing, once the games referencing them are saved"""
+        from models.collections import games_db, image_blobs_db
+
+        executor = self._get_executor()
+        for filename in filenames:
+            if image_blobs_db.claim(filename):
+                future = executor.submit(_process_image, filename)
+                future.add_done_callback(lambda done, filename=filename: self._finish(filename, done))
+        # A blob can finish between pending() and the game write; settle those now
+        for filename, status in image_blobs_db.get_statuses(filenames).items():
+            if status == 'ready':
+                games_db.mark_image_ready(filename)
+
+    def queue_remote(self, game_id, url):
+        """Download an image URL in the background and attach it to a game"""
+        with self._lock:
+            if self._fetcher is None:
+                self._fetcher = ThreadPoolExecutor(max_workers=Config.IMAGE_FETCH_WORKERS)
+            fetcher = self._fetcher
+        fetcher.submit(self._fetch_remote, game_id, url)
+
+    def _fetch_remote(self, game_id, url):
+        from models.collections import games_db
+
+        try:
+            if urlparse(url).scheme not in ('http', 'https'):
+                raise ValueError("only http and https URLs are supported")
+            name = os.path.basename(urlparse(url).path)
+            if not image_handler.allowed_file(name):
+                # The stored type comes from the sniffed bytes, not the name
+                name = 'remote.jpg'
+            request = Request(url, headers={'User-Agent': 'RetroGamesMarketplace/1.0'})
+            with _remote_opener.open(request, timeout=Config.IMAGE_FETCH_TIMEOUT) as response:
+                filename, error = self.accept_upload(FileStorage(stream=response, filename=name))
+            if error:
+                raise ValueError(error)
+            if games_db.add_game_image(game_id, filename, pending=bool(self.pending([filename]))):
+                self.submit([filename])
+            else:
+                self.release([filename])
+        except Exception as e:
+            print(f"❌ Image {url} for game {game_id} failed: {e}")
+
+    def _finish(self, filename, future):
+        from models.collections import games_db, image_blobs_db
+
+        try:
+            _, error = future.result()
+        except Exception as e:
+            error = str(e)
+        if error:
+            print(f"❌ Image {filename} failed: {error}")
+            games_db.mark_image_failed(filename)
+            image_blobs_db.delete(filename)
+            image_handler.delete_files(filename)
+        else:
+            # Blob first, so a game saved after this sees it ready in submit()
+            image_blobs_db.set_status(filename, 'ready')
+            games_db.mark_image_ready(filename)
+
+    def resume_pending(self):
+        """Requeue blobs a previous process staged but never finished"""
+        from models.collections import image_blobs_db
+
+        stale_before = datetime.now() - timedelta(seconds=Config.IMAGE_PROCESSING_TIMEOUT)
+        for blob in image_blobs_db.get_unfinished():
+            if blob['status'] == 'processing' and blob['created_at'] > stale_before:
+                # Probably still being processed by another worker process
+                continue
+            image_blobs_db.set_status(blob['filename'], 'staged')
+            self.submit([blob['filename']])
+
+    def shutdown(self, wait=True):
+        """Stop the worker pools, by default after the queued fetches and images finish.
+
+        The pools are shut down outside the lock: a fetch still running
+        submits its image through _get_executor(), which takes it. The
+        fetcher goes first, so those images still reach the process pool.
+        """
+        with self._lock:
+            fetcher, self._fetcher = self._fetcher, None
+        if fetcher is not None:
+            fetcher.shutdown(wait=wait)
+        with self._lock:
+            executor, self._executor = self._executor, None
+            owned = self._pid == os.getpid()
+        if executor is not None and owned:
+            executor.shutdown(wait=wait)
+
+# Global instance
+image_pipeline = ImagePipeline()
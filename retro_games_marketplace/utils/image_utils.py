@@ -1,12 +1,67 @@
 # utils/image_utils.py
 import os
-from PIL import Image
+import hashlib
+from PIL import Image, ImageOps
+from config import Config
 import secrets
 
+try:
+    import pillow_avif  # noqa: F401 - registers the AVIF encoder on Pillow < 11.2
+except ImportError:
+    pass
+
+# Value of the <img sizes> attribute for each place an image is rendered
+IMAGE_SIZES = {
+    'card': '(min-width: 1200px) 25vw, (min-width: 768px) 50vw, 100vw',
+    'detail': '(min-width: 768px) 50vw, 100vw',
+    'thumb': '80px',
+}
+
+# Leading bytes of each accepted format, checked before anything is decoded
+IMAGE_SIGNATURES = (
+    (b'\x89PNG\r\n\x1a\n', 'png'),
+    (b'\xff\xd8\xff', 'jpg'),
+    (b'GIF87a', 'gif'),
+    (b'GIF89a', 'gif'),
+)
+
+# Pillow refuses to open anything much larger than this (decompression bombs)
+Image.MAX_IMAGE_PIXELS = Config.MAX_IMAGE_PIXELS
+
+def avif_supported():
+    Image.init()
+    return 'AVIF' in Image.SAVE
+
+def sniff_image_type(header):
+    """Return the image type from its magic bytes, or None if it is not one we accept"""
+    for signature, image_type in IMAGE_SIGNATURES:
+        if header.startswith(signature):
+            return image_type
+    if header[:4] == b'RIFF' and header[8:12] == b'WEBP':
+        return 'webp'
+    return None
+
+class UploadBudget:
+    """Byte allowance shared by every file uploaded in one request"""
+    def __init__(self, max_bytes=None):
+        self.remaining = max_bytes or Config.MAX_UPLOAD_REQUEST_SIZE
+
+    def consume(self, size):
+        self.remaining -= size
+        return self.remaining >= 0
+
 class ImageHandler:
     def __init__(self):
         self.allowed_extensions = {'png', 'jpg', 'jpeg', 'gif', 'webp'}
-        self.max_size_mb = 5  # Reduced for safety
+        self.max_size_mb = Config.MAX_UPLOAD_FILE_SIZE // (1024 * 1024)
+        self.chunk_size = 64 * 1024
+        self.staging_folder = Config.UPLOAD_STAGING_FOLDER
+        self.games_folder = 'static/uploads/games'
+        self.thumbnails_folder = 'static/uploads/thumbnails'
+        self.variants_folder = 'static/uploads/variants'
+        self.variant_widths = (160, 320, 640, 1280)
+        self.variant_formats = ('avif', 'webp') if avif_supported() else ('webp',)
+        self._variant_widths_seen = {}
     
     def allowed_file(self, filename):
         if not filename:
@@ -18,35 +73,163 @@ class ImageHandler:
         _, ext = os.path.splitext(original_filename)
         return random_hex + ext.lower()
     
-    def save_image(self, image_file):
-        """Save image and create thumbnail, return (filename, error_message)"""
+    def content_filename(self, digest, ext):
+        """Content-addressed name, sharded two levels deep: ab/cd/abcd....png"""
+        return f"{digest[:2]}/{digest[2:4]}/{digest}{ext}"
+
+    def is_content_filename(self, filename):
+        """True for a name content_filename() could have produced"""
+        shard, name = os.path.split(filename)
+        digest, ext = os.path.splitext(name)
+        return (len(digest) == 64 and all(c in '0123456789abcdef' for c in digest)
+                and shard == f"{digest[:2]}/{digest[2:4]}" and self.allowed_file(name))
+    
+    def staged_path(self, filename):
+        return os.path.join(self.staging_folder, os.path.basename(filename))
+    
+    def stage_upload(self, image_file, budget=None):
+        """Stream the raw upload into the staging folder in chunks while hashing it.
+
+        The file is rejected as soon as it exceeds the per-file size or the
+        request's UploadBudget, if its magic bytes are not an accepted
+        format, or if its header declares too many pixels. Nothing is
+        decoded here.
+
+        Returns (filename, temp_path, error_message). filename is the
+        content-addressed name; the caller either keeps the staged copy by
+        moving temp_path to staged_path(filename) or deletes it.
+        """
         if not image_file or not image_file.filename:
-            return None, "No file selected"
+            return None, None, "No file selected"
             
         if not self.allowed_file(image_file.filename):
-            return None, "File type not allowed. Use: PNG, JPG, GIF, WebP"
+            return None, None, "File type not allowed. Use: PNG, JPG, GIF, WebP"
         
+        temp_path = os.path.join(self.staging_folder, self.generate_filename(image_file.filename) + '.part')
         try:
-            # Generate secure filename
-            filename = self.generate_filename(image_file.filename)
-            
-            # Define paths
-            game_path = os.path.join('static/uploads/games', filename)
-            thumb_path = os.path.join('static/uploads/thumbnails', filename)
+            os.makedirs(self.staging_folder, exist_ok=True)
+            digest = hashlib.sha256()
+            image_type = None
+            size = 0
+            with open(temp_path, 'wb') as staged:
+                for chunk in iter(lambda: image_file.stream.read(self.chunk_size), b''):
+                    if image_type is None:
+                        image_type = sniff_image_type(chunk[:12])
+                        if image_type is None:
+                            raise ValueError("File is not a PNG, JPG, GIF or WebP image")
+                    size += len(chunk)
+                    if size > self.max_size_mb * 1024 * 1024:
+                        raise ValueError(f"File is larger than {self.max_size_mb} MB")
+                    if budget is not None and not budget.consume(len(chunk)):
+                        raise ValueError("Upload exceeds the total size allowed per request")
+                    digest.update(chunk)
+                    staged.write(chunk)
+            if image_type is None:
+                raise ValueError("File is empty")
             
-            # Save original image
-            image = Image.open(image_file)
-            image.save(game_path)
+            # Image.open only parses the header; the pixels are not decoded
+            try:
+                with Image.open(temp_path) as header:
+                    width, height = header.size
+            except Image.DecompressionBombError:
+                raise ValueError("Image has too many pixels")
+            if width * height > Config.MAX_IMAGE_PIXELS:
+                raise ValueError(f"Image is too large ({width}x{height} pixels)")
             
-            # Create thumbnail
-            thumb_size = (300, 300)
-            image.thumbnail(thumb_size)
-            image.save(thumb_path)
+            return self.content_filename(digest.hexdigest(), '.' + image_type), temp_path, None
+        except Exception as e:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            if isinstance(e, ValueError):
+                return None, None, str(e)
+            return None, None, f"Error saving upload: {str(e)}"
+    
+    def delete_files(self, filename):
+        """Remove an image, its variants and any staged copy"""
+        paths = [os.path.join(self.games_folder, filename), self.staged_path(filename)]
+        paths += [os.path.join(self.variants_folder, self.variant_path(filename, width, fmt))
+                  for width in self.variant_widths for fmt in self.variant_formats]
+        for path in paths:
+            if os.path.exists(path):
+                os.remove(path)
+        self._variant_widths_seen.pop(filename, None)
+    
+    def variant_path(self, filename, width, fmt):
+        stem, _ = os.path.splitext(filename)
+        return f"{stem}-{width}.{fmt}"
+    
+    def write_variants(self, image, filename):
+        """Write one resized copy per width bucket and output format"""
+        if image.mode not in ('RGB', 'RGBA'):
+            has_alpha = image.mode in ('LA', 'PA') or 'transparency' in image.info
+            image = image.convert('RGBA' if has_alpha else 'RGB')
+        
+        # Never upscale: buckets wider than the image are skipped, except the smallest
+        widths = [width for width in self.variant_widths if width <= image.width] or [self.variant_widths[0]]
+        # Resize largest first so each step downsamples the previous, smaller copy
+        resized = image
+        for width in sorted(widths, reverse=True):
+            target = min(width, image.width)
+            height = max(1, round(image.height * target / image.width))
+            resized = resized.resize((target, height), Image.LANCZOS)
+            for fmt in self.variant_formats:
+                path = os.path.join(self.variants_folder, self.variant_path(filename, width, fmt))
+                resized.save(path, fmt.upper(), quality=80)
+    
+    def available_widths(self, filename):
+        """Width buckets available for an image, empty for images without variants"""
+        widths = self._variant_widths_seen.get(filename)
+        if widths:
+            return widths
+        fmt = self.variant_formats[-1]
+        widths = [width for width in self.variant_widths
+                  if os.path.exists(os.path.join(self.variants_folder, self.variant_path(filename, width, fmt)))]
+        if widths:
+            # Variants are never rewritten once present, so only positive results are kept
+            if len(self._variant_widths_seen) > 10000:
+                self._variant_widths_seen.clear()
+            self._variant_widths_seen[filename] = widths
+        return widths
+    
+    def process_staged(self, filename):
+        """Decode a staged upload, strip its metadata and write the image and its variants.
+
+        Runs in the image pipeline's worker processes. Returns (filename, error_message).
+        """
+        raw_path = self.staged_path(filename)
+        game_path = os.path.join(self.games_folder, filename)
+        
+        if not os.path.exists(raw_path) and os.path.exists(game_path):
+            # Already finished by another worker
+            return filename, None
+        
+        try:
+            os.makedirs(os.path.dirname(game_path), exist_ok=True)
+            os.makedirs(os.path.dirname(os.path.join(self.variants_folder, filename)), exist_ok=True)
+            with Image.open(raw_path) as raw:
+                # JPEGs decode straight at 1/2..1/8 scale; the full bitmap is never built
+                master_box = (Config.IMAGE_MASTER_MAX_PX, Config.IMAGE_MASTER_MAX_PX)
+                raw.draft(None, master_box)
+                # Apply the EXIF rotation before the EXIF block is dropped
+                image = ImageOps.exif_transpose(raw)
+                image.thumbnail(master_box, Image.LANCZOS, reducing_gap=3.0)
+                image.info = {key: value for key, value in image.info.items() if key == 'transparency'}
+                image.save(game_path)
+                self.write_variants(image, filename)
             
+            os.remove(raw_path)
             return filename, None
             
         except Exception as e:
             return None, f"Error processing image: {str(e)}"
+    
+    def save_image(self, image_file, budget=None):
+        """Save image and create its variants synchronously, return (filename, error_message)"""
+        filename, temp_path, error = self.stage_upload(image_file, budget)
+        if error:
+            return None, error
+        os.replace(temp_path, self.staged_path(filename))
+        return self.process_staged(filename)
 
 # Global instance
-image_handler = ImageHandler()
\ No newline at end of file
+image_handler = ImageHandler()
@@ -0,0 +1,33 @@
+# utils/invalidation.py
+import threading
+from collections import defaultdict
+
+class InvalidationBus:
+    """In-process publish/subscribe for "a document in this collection changed".
+
+    The change watcher publishes every write it sees, whichever process or
+    script made it; caches subscribe to the collections they are built from.
+    Callbacks run on the publishing thread, get the changed document's _id
+    (None when the whole collection may have changed) and must be quick.
+    """
+    def __init__(self):
+        self._subscribers = defaultdict(list)
+        self._lock = threading.Lock()
+        self.published = defaultdict(int)
+
+    def subscribe(self, collection, callback):
+        with self._lock:
+            self._subscribers[collection].append(callback)
+
+    def publish(self, collection, document_id=None):
+        with self._lock:
+            callbacks = list(self._subscribers.get(collection, ()))
+            self.published[collection] += 1
+        for callback in callbacks:
+            try:
+                callback(document_id)
+            except Exception as e:
+                print(f"❌ Invalidation handler for {collection} failed: {e}")
+
+# Global instance
+invalidation_bus = InvalidationBus()
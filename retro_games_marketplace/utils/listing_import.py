@@ -0,0 +1,229 @@
+# utils/listing_import.py
+import csv
+import io
+import json
+import math
+import os
+import zipfile
+from datetime import datetime
+from bson.objectid import ObjectId
+from werkzeug.datastructures import FileStorage
+from config import Config
+from models.collections import games_db, sellers_db, consoles_db, CONDITIONS, RARITIES
+from utils.image_pipeline import image_pipeline
+
+# Columns written by the export, in order; the import reads the same names
+EXPORT_FIELDS = ("title", "console_id", "console", "condition", "rarity", "price",
+                 "description", "images", "date_listed")
+
+def console_lookup():
+    """Map console ids and lower-cased names to ObjectIds"""
+    lookup = {}
+    for console in consoles_db.get_all_consoles():
+        lookup[str(console["_id"])] = console["_id"]
+        lookup[console["name"].lower()] = console["_id"]
+    return lookup
+
+def validate_listing(data, consoles=None):
+    """Check a listing from the add-game form or an import row.
+
+    Returns (game_data, errors). game_data holds the validated listing
+    fields; the caller adds seller_id, date_listed and images.
+    """
+    consoles = consoles if consoles is not None else console_lookup()
+    errors = []
+
+    title = str(data.get("title") or "").strip()
+    if not title:
+        errors.append("title is required")
+
+    console_ref = str(data.get("console_id") or data.get("console") or "").strip()
+    console_id = consoles.get(console_ref) or consoles.get(console_ref.lower())
+    if console_id is None:
+        errors.append(f'unknown console "{console_ref}"' if console_ref else "console is required")
+
+    condition = str(data.get("condition") or "").strip()
+    if condition not in CONDITIONS:
+        errors.append(f"condition must be one of: {', '.join(CONDITIONS)}")
+
+    rarity = str(data.get("rarity") or "").strip()
+    if rarity not in RARITIES:
+        errors.append(f"rarity must be one of: {', '.join(RARITIES)}")
+
+    price = None
+    try:
+        price = float(str(data.get("price")).replace(",", ""))
+        if not math.isfinite(price):
+            errors.append("price must be a number")
+        elif price < 0:
+            errors.append("price cannot be negative")
+    except (TypeError, ValueError):
+        errors.append("price must be a number")
+
+    game_data = {
+        "title": title,
+        "console_id": console_id,
+        "condition": condition,
+        "rarity": rarity,
+        "price": price,
+        "description": str(data.get("description") or "").strip(),
+    }
+    return game_data, errors
+
+def read_rows(stream, fmt):
+    """Yield (row, error) from a CSV or JSON Lines byte stream without loading it whole"""
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+    if fmt == "csv":
+        for row in csv.DictReader(text):
+            yield row, None
+        return
+    for line in text:
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as e:
+            yield None, f"invalid JSON: {e}"
+            continue
+        yield (row, None) if isinstance(row, dict) else (None, "each line must be a JSON object")
+
+def detect_format(filename):
+    ext = os.path.splitext(filename or "")[1].lower()
+    if ext == ".csv":
+        return "csv"
+    if ext in (".jsonl", ".ndjson", ".json"):
+        return "jsonl"
+    return None
+
+def _image_refs(value):
+    """Images column: a JSON list, or URLs, zip member names or stored image names separated by | or ;"""
+    if not value:
+        return []
+    if isinstance(value, list):
+        return [str(ref).strip() for ref in value if str(ref).strip()]
+    return [ref.strip() for ref in str(value).replace(";", "|").split("|") if ref.strip()]
+
+class ListingImporter:
+    """Validates rows, inserts them in unordered batches and queues their images"""
+    def __init__(self, seller_id, batch_size=None, max_rows=None):
+        self.seller_id = ObjectId(seller_id)
+        self.batch_size = batch_size or Config.IMPORT_BATCH_SIZE
+        self.max_rows = max_rows or Config.IMPORT_MAX_ROWS
+
+    def run(self, stream, fmt, images_zip=None):
+        """Import every row; returns {"imported", "failed", "rows": [per-row result]}"""
+        self.consoles = console_lookup()
+        self.archive = zipfile.ZipFile(images_zip) if images_zip else None
+        self.results = []
+        batch = []
+        try:
+            for number, (row, error) in enumerate(read_rows(stream, fmt), start=1):
+                if number > self.max_rows:
+                    self.results.append({"row": number, "status": "error",
+                                         "errors": [f"import is limited to {self.max_rows} rows"]})
+                    break
+                if error:
+                    self.results.append({"row": number, "status": "error", "errors": [error]})
+                    continue
+                prepared = self._prepare(number, row)
+                if prepared:
+                    batch.append(prepared)
+                if len(batch) >= self.batch_size:
+                    self._flush(batch)
+                    batch = []
+            self._flush(batch)
+        finally:
+            if self.archive:
+                self.archive.close()
+
+        self.results.sort(key=lambda result: result["row"])
+        imported = sum(1 for result in self.results if result["status"] == "ok")
+        return {"imported": imported, "failed": len(self.results) - imported, "rows": self.results}
+
+    def _prepare(self, number, row):
+        game_data, errors = validate_listing(row, self.consoles)
+        refs = _image_refs(row.get("images"))
+        urls = [ref for ref in refs if ref.startswith(("http://", "https://"))]
+        filenames = []
+        if not errors:
+            # Zip members are staged now (hashing only); decoding happens on the pipeline.
+            # Stored image names, as written by the export, add a reference to the existing blob.
+            for member in refs:
+                if member in urls:
+                    continue
+                filename, error = image_pipeline.reuse(member)
+                if error:
+                    filename, error = self._stage_member(member)
+                if error:
+                    errors.append(f"{member}: {error}")
+                elif filename in filenames:
+                    image_pipeline.release([filename])
+                else:
+                    filenames.append(filename)
+        if errors:
+            image_pipeline.release(filenames)
+            self.results.append({"row": number, "status": "error", "errors": errors})
+            return None
+
+        game_data.update({
+            "seller_id": self.seller_id,
+            "date_listed": datetime.now(),
+            "images": filenames,
+            "pending_images": image_pipeline.pending(filenames)
+        })
+        return number, game_data, urls
+
+    def _stage_member(self, member):
+        if self.archive is None:
+            return None, "no image archive was uploaded"
+        try:
+            info = self.archive.getinfo(member)
+        except KeyError:
+            return None, "not found in the image archive"
+        with self.archive.open(info) as image:
+            return image_pipeline.accept_upload(FileStorage(stream=image, filename=os.path.basename(member)))
+
+    def _flush(self, batch):
+        if not batch:
+            return
+        errors = games_db.add_games([game for _, game, _ in batch])
+        for index, (number, game, urls) in enumerate(batch):
+            if index in errors:
+                image_pipeline.release(game["images"])
+                self.results.append({"row": number, "status": "error", "errors": [errors[index]]})
+                continue
+            if game["images"]:
+                image_pipeline.submit(game["images"])
+            for url in urls:
+                image_pipeline.queue_remote(game["_id"], url)
+            self.results.append({"row": number, "status": "ok", "game_id": str(game["_id"]),
+                                 "images_queued": len(game["images"]) + len(urls)})
+
+def export_rows(seller_id, fmt):
+    """Yield a seller's listings as CSV or JSON Lines text, one cursor batch at a time"""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=EXPORT_FIELDS, extrasaction="ignore")
+    if fmt == "csv":
+        writer.writeheader()
+    for game in sellers_db.iter_seller_games(seller_id):
+        row = {
+            "title": game.get("title"),
+            "console_id": str(game.get("console_id")),
+            "console": game.get("console", {}).get("name"),
+            "condition": game.get("condition"),
+            "rarity": game.get("rarity"),
+            "price": game.get("price"),
+            "description": game.get("description"),
+            "images": game.get("images", []),
+            "date_listed": game["date_listed"].isoformat() if game.get("date_listed") else None,
+        }
+        if fmt == "csv":
+            row["images"] = "|".join(row["images"])
+            writer.writerow(row)
+        else:
+            buffer.write(json.dumps(row) + "\n")
+        if buffer.tell() > 64 * 1024:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
@@ -0,0 +1,157 @@
+# utils/page_cache.py
+import os
+import hashlib
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from functools import wraps
+from flask import request, session, make_response, current_app
+from config import Config
+
+class MemoryBackend:
+    """Per-process LRU store; each worker keeps its own copy"""
+    def __init__(self, maxsize=None):
+        self.maxsize = maxsize or Config.CACHE_MAX_ENTRIES
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[0] < time.time():
+                self._data.pop(key, None)
+                return None
+            self._data.move_to_end(key)
+            return entry[1]
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._data[key] = (time.time() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+class DiskBackend:
+    """One pickle file per entry, shared by every worker on the host"""
+    def __init__(self, folder=None):
+        self.folder = folder or Config.PAGE_CACHE_DIR
+
+    def _path(self, key):
+        return os.path.join(self.folder, key + '.cache')
+
+    def get(self, key):
+        try:
+            with open(self._path(key), 'rb') as cached:
+                expires, value = pickle.load(cached)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return None
+        return value if expires >= time.time() else None
+
+    def set(self, key, value, ttl):
+        os.makedirs(self.folder, exist_ok=True)
+        temp_path = f"{self._path(key)}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temp_path, 'wb') as cached:
+            pickle.dump((time.time() + ttl, value), cached)
+        # Readers never see a half-written file
+        os.replace(temp_path, self._path(key))
+
+    def clear(self):
+        if not os.path.isdir(self.folder):
+            return
+        for name in os.listdir(self.folder):
+            try:
+                os.remove(os.path.join(self.folder, name))
+            except OSError:
+                pass
+
+BACKENDS = {'memory': MemoryBackend, 'disk': DiskBackend}
+
+class PageCache:
+    """Caches whole rendered pages for anonymous visitors.
+
+    Logged-in sessions (and any request with pending flash messages) bypass
+    the cache, since the navbar and flashes are rendered per session.
+    Responses carry an ETag and Last-Modified so browsers revalidate with a 304.
+    A page rendered within CATALOG_LAG_SECONDS of an invalidation may come
+    from a secondary that has not seen the write yet, so it is only kept
+    until that window ends.
+    """
+    def __init__(self, backend=None, ttl=None, settle=None):
+        if backend is None and Config.PAGE_CACHE_BACKEND in BACKENDS:
+            backend = BACKENDS[Config.PAGE_CACHE_BACKEND]()
+        self.backend = backend
+        self.ttl = ttl or Config.PAGE_CACHE_TTL_SECONDS
+        self.settle = Config.CATALOG_LAG_SECONDS if settle is None else settle
+        self._settle_until = 0
+
+    def cacheable(self):
+        return (self.backend is not None
+                and request.method == 'GET'
+                and 'seller_id' not in session
+                and '_flashes' not in session)
+
+    def make_key(self):
+        """Route plus query args, order-insensitive"""
+        args = sorted(request.args.items(multi=True))
+        raw = f"{request.path}?{args!r}"
+        return hashlib.sha1(raw.encode()).hexdigest()
+
+    def cached(self, view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            # Async views are run to completion here, as Flask would for an undecorated one
+            run = current_app.ensure_sync(view)
+            if not self.cacheable():
+                return run(*args, **kwargs)
+
+            key = self.make_key()
+            entry = self.backend.get(key)
+            if entry is None:
+                response = make_response(run(*args, **kwargs))
+                # Errors, redirects and pages that flashed a message are not shared
+                if response.status_code != 200 or session.modified or '_flashes' in session:
+                    return response
+                body = response.get_data()
+                entry = {
+                    'body': body,
+                    'mimetype': response.mimetype,
+                    'etag': hashlib.sha1(body).hexdigest(),
+                    'last_modified': datetime.now(timezone.utc).replace(microsecond=0),
+                }
+                try:
+                    self.backend.set(key, entry, self.entry_ttl())
+                except Exception as e:
+                    print(f"❌ Error writing page cache: {e}")
+
+            response = current_app.response_class(entry['body'], mimetype=entry['mimetype'])
+            response.set_etag(entry['etag'])
+            response.last_modified = entry['last_modified']
+            response.cache_control.no_cache = True
+            response.vary.add('Cookie')
+            return response.make_conditional(request)
+        return wrapper
+
+    def entry_ttl(self):
+        """Full ttl, or what is left of the lag window after the last invalidation"""
+        remaining = self._settle_until - time.time()
+        return min(self.ttl, remaining) if remaining > 0 else self.ttl
+
+    def invalidate(self):
+        """Drop every cached page; called whenever a listing or seller changes"""
+        if self.backend is None:
+            return
+        if self.settle:
+            self._settle_until = time.time() + self.settle
+        try:
+            self.backend.clear()
+        except Exception as e:
+            print(f"❌ Error clearing page cache: {e}")
+
+# Global instance
+page_cache = PageCache()
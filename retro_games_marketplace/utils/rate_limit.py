@@ -0,0 +1,61 @@
+# utils/rate_limit.py
+import threading
+import time
+from collections import OrderedDict
+from config import Config
+
+class TokenBucketLimiter:
+    """Per-key token buckets: bursts up to capacity, then one token every refill_seconds.
+
+    Buckets live in process memory and the least recently used are dropped
+    beyond max_keys, so a flood of distinct keys cannot grow it unbounded.
+    """
+    def __init__(self, capacity, refill_seconds, max_keys=None):
+        self.capacity = capacity
+        self.refill_seconds = refill_seconds
+        self.max_keys = max_keys or Config.CACHE_MAX_ENTRIES * 10
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _refill(self, key, now):
+        tokens, updated = self._buckets.get(key, (self.capacity, now))
+        tokens = min(self.capacity, tokens + (now - updated) / self.refill_seconds)
+        return tokens
+
+    def retry_after(self, key):
+        """Seconds until key has a token, 0 if it has one now"""
+        with self._lock:
+            tokens = self._refill(key, time.monotonic())
+            return 0 if tokens >= 1 else (1 - tokens) * self.refill_seconds
+
+    def consume(self, key):
+        """Take a token for key; False if its bucket is empty"""
+        now = time.monotonic()
+        with self._lock:
+            tokens = self._refill(key, now)
+            allowed = tokens >= 1
+            self._buckets[key] = (tokens - 1 if allowed else tokens, now)
+            self._buckets.move_to_end(key)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+            return allowed
+
+class LoginLimiter:
+    """Limits login attempts per username and per client IP"""
+    def __init__(self):
+        self.by_username = TokenBucketLimiter(Config.LOGIN_USER_BURST, Config.LOGIN_USER_REFILL_SECONDS)
+        self.by_ip = TokenBucketLimiter(Config.LOGIN_IP_BURST, Config.LOGIN_IP_REFILL_SECONDS)
+
+    def check(self, username, ip):
+        """Spend one attempt; returns 0 if allowed, else seconds to wait"""
+        username = (username or '').strip().lower()
+        # Check both before spending, so a blocked IP cannot drain a user's bucket
+        wait = max(self.by_username.retry_after(username), self.by_ip.retry_after(ip))
+        if wait:
+            return int(wait) + 1
+        if not self.by_ip.consume(ip) or not self.by_username.consume(username):
+            return int(max(self.by_username.retry_after(username), self.by_ip.retry_after(ip))) + 1
+        return 0
+
+# Global instance
+login_limiter = LoginLimiter()
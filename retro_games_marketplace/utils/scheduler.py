@@ -0,0 +1,56 @@
+# utils/scheduler.py
+import os
+import threading
+
+class PeriodicTask:
+    """Runs a function every `interval` seconds on a daemon thread.
+
+    start() is idempotent and per process: a forked worker starts its own
+    thread, since threads do not survive fork(). trigger() runs it early;
+    triggers that arrive while it runs coalesce into one more run. fn can
+    call wait() to hold off without missing stop().
+    """
+    def __init__(self, name, interval, fn):
+        self.name = name
+        self.interval = interval
+        self.fn = fn
+        self._thread = None
+        self._pid = None
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._lock = threading.Lock()
+
+    def start(self):
+        with self._lock:
+            if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._loop, name=self.name, daemon=True)
+            self._pid = os.getpid()
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+
+    def trigger(self):
+        """Run as soon as possible instead of waiting out the interval"""
+        self._wake.set()
+
+    def wait(self, seconds):
+        """Sleep on the task's thread; returns True if the task was stopped meanwhile"""
+        return self._stop.wait(seconds)
+
+    def run_now(self):
+        try:
+            self.fn()
+        except Exception as e:
+            print(f"❌ Periodic task {self.name} failed: {e}")
+
+    def _loop(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            if self._stop.is_set():
+                return
+            self.run_now()
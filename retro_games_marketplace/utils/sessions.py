@@ -0,0 +1,253 @@
+# utils/sessions.py
+import os
+import pickle
+import secrets
+import sqlite3
+import threading
+import time
+from flask.sessions import SecureCookieSession, SessionInterface
+from itsdangerous import BadSignature, Signer
+from config import Config
+from utils.invalidation import invalidation_bus
+
+# Seller fields cached in the session, enough to render any page's header
+PRINCIPAL_FIELDS = ("username", "rating")
+# Version key bumped when any seller may have changed (e.g. the collection was reset)
+ALL_SELLERS = '*'
+
+class MemorySessionBackend:
+    """Sessions in process memory: for a single process, e.g. the development server"""
+    def __init__(self):
+        self._sessions = {}
+        self._versions = {}
+        self._lock = threading.Lock()
+
+    def get(self, sid):
+        """(data, expires), or None when missing or expired"""
+        with self._lock:
+            entry = self._sessions.get(sid)
+            if entry is None or entry[0] < time.time():
+                self._sessions.pop(sid, None)
+                return None
+            return pickle.loads(entry[2]), entry[0]
+
+    def set(self, sid, data, seller_id, ttl):
+        with self._lock:
+            self._sessions[sid] = (time.time() + ttl, seller_id, pickle.dumps(data))
+
+    def touch(self, sid, ttl):
+        with self._lock:
+            entry = self._sessions.get(sid)
+            if entry is not None:
+                self._sessions[sid] = (time.time() + ttl,) + entry[1:]
+
+    def delete(self, sid):
+        with self._lock:
+            self._sessions.pop(sid, None)
+
+    def delete_for_seller(self, seller_id):
+        with self._lock:
+            sids = [sid for sid, entry in self._sessions.items() if entry[1] == seller_id]
+            for sid in sids:
+                del self._sessions[sid]
+            return len(sids)
+
+    def get_version(self, seller_id):
+        with self._lock:
+            return self._versions.get(seller_id, 0) + self._versions.get(ALL_SELLERS, 0)
+
+    def bump_version(self, seller_id):
+        with self._lock:
+            self._versions[seller_id] = self._versions.get(seller_id, 0) + 1
+
+    def purge_expired(self):
+        now = time.time()
+        with self._lock:
+            for sid in [sid for sid, entry in self._sessions.items() if entry[0] < now]:
+                del self._sessions[sid]
+
+class SQLiteSessionBackend:
+    """Sessions in a local SQLite file, shared by every worker on the host"""
+    def __init__(self, path=None):
+        self.path = path or Config.SESSION_SQLITE_PATH
+        self._local = threading.local()
+
+    def _connection(self):
+        # One connection per thread and process; sqlite3 connections must not cross either
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or getattr(self._local, 'pid', None) != os.getpid():
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("CREATE TABLE IF NOT EXISTS sessions ("
+                         "sid TEXT PRIMARY KEY, seller_id TEXT, data BLOB, expires REAL)")
+            conn.execute("CREATE INDEX IF NOT EXISTS sessions_seller ON sessions (seller_id)")
+            conn.execute("CREATE TABLE IF NOT EXISTS principal_versions ("
+                         "seller_id TEXT PRIMARY KEY, version INTEGER NOT NULL)")
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    def get(self, sid):
+        """(data, expires), or None when missing or expired"""
+        row = self._connection().execute(
+            "SELECT data, expires FROM sessions WHERE sid = ? AND expires >= ?", (sid, time.time())).fetchone()
+        return (pickle.loads(row[0]), row[1]) if row else None
+
+    def set(self, sid, data, seller_id, ttl):
+        self._connection().execute(
+            "INSERT OR REPLACE INTO sessions (sid, seller_id, data, expires) VALUES (?, ?, ?, ?)",
+            (sid, seller_id, pickle.dumps(data), time.time() + ttl))
+
+    def touch(self, sid, ttl):
+        self._connection().execute("UPDATE sessions SET expires = ? WHERE sid = ?", (time.time() + ttl, sid))
+
+    def delete(self, sid):
+        self._connection().execute("DELETE FROM sessions WHERE sid = ?", (sid,))
+
+    def delete_for_seller(self, seller_id):
+        return self._connection().execute("DELETE FROM sessions WHERE seller_id = ?", (seller_id,)).rowcount
+
+    def get_version(self, seller_id):
+        row = self._connection().execute(
+            "SELECT COALESCE(SUM(version), 0) FROM principal_versions WHERE seller_id IN (?, ?)",
+            (seller_id, ALL_SELLERS)).fetchone()
+        return row[0]
+
+    def bump_version(self, seller_id):
+        self._connection().execute(
+            "INSERT INTO principal_versions (seller_id, version) VALUES (?, 1) "
+            "ON CONFLICT (seller_id) DO UPDATE SET version = version + 1", (seller_id,))
+
+    def purge_expired(self):
+        self._connection().execute("DELETE FROM sessions WHERE expires < ?", (time.time(),))
+
+BACKENDS = {'memory': MemorySessionBackend, 'sqlite': SQLiteSessionBackend}
+
+class ServerSession(SecureCookieSession):
+    """Session dict whose contents live in the backend; the cookie only carries its signed id"""
+    def __init__(self, initial=None, sid=None, expires=None):
+        super().__init__(initial)
+        self.sid = sid or secrets.token_urlsafe(32)
+        # When the stored copy expires; None for a session not stored yet
+        self.expires = expires
+
+class ServerSessionInterface(SessionInterface):
+    """Server-side sessions with a cached seller principal.
+
+    The principal (seller id, username, rating) is stored in the session
+    with the seller's version stamp from the backend. Changing a seller
+    bumps the stamp, so every session holding the old principal reloads it
+    once; until then identity costs no database read. Logging out deletes
+    the session server-side, and revoke_seller() ends all of a seller's.
+
+    A logged-in session lasts SESSION_TTL_SECONDS from its last use: once
+    half of it has passed, the next request pushes the expiry out again.
+    Anonymous sessions, which only carry flash messages, are kept for
+    SESSION_ANONYMOUS_TTL_SECONDS.
+    """
+    def __init__(self, backend=None):
+        self.backend = backend or BACKENDS[Config.SESSION_BACKEND]()
+        self.ttl = Config.SESSION_TTL_SECONDS
+        self.anonymous_ttl = Config.SESSION_ANONYMOUS_TTL_SECONDS
+
+    def _signer(self, app):
+        return Signer(app.secret_key, salt='server-session')
+
+    def open_session(self, app, request):
+        cookie = request.cookies.get(self.get_cookie_name(app))
+        if cookie:
+            try:
+                sid = self._signer(app).unsign(cookie).decode()
+                stored = self.backend.get(sid)
+                if stored is not None:
+                    data, expires = stored
+                    return ServerSession(data, sid, expires)
+            except BadSignature:
+                pass
+            except Exception as e:
+                print(f"❌ Error loading session: {e}")
+        return ServerSession()
+
+    def save_session(self, app, session, response):
+        name = self.get_cookie_name(app)
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+        secure = self.get_cookie_secure(app)
+        samesite = self.get_cookie_samesite(app)
+        httponly = self.get_cookie_httponly(app)
+        if session.accessed:
+            response.vary.add('Cookie')
+
+        if not session:
+            if session.modified:
+                self.backend.delete(session.sid)
+                response.delete_cookie(name, domain=domain, path=path, secure=secure,
+                                       samesite=samesite, httponly=httponly)
+            return
+        ttl = self.ttl if session.get('seller_id') else self.anonymous_ttl
+        if not self.should_set_cookie(app, session):
+            if session.expires is not None and session.expires - time.time() < ttl / 2:
+                self._touch(session, ttl)
+            return
+        try:
+            self.backend.set(session.sid, dict(session), session.get('seller_id'), ttl)
+        except Exception as e:
+            print(f"❌ Error saving session: {e}")
+            return
+        response.set_cookie(name, self._signer(app).sign(session.sid).decode(),
+                            expires=self.get_expiration_time(app, session), httponly=httponly,
+                            domain=domain, path=path, secure=secure, samesite=samesite)
+
+    def _touch(self, session, ttl):
+        """Renew an unchanged session's expiry without rewriting its data"""
+        try:
+            self.backend.touch(session.sid, ttl)
+        except Exception as e:
+            print(f"❌ Error renewing session: {e}")
+
+    def regenerate(self, session):
+        """Give the session a new id, e.g. on login, so a planted id cannot be reused"""
+        self.backend.delete(session.sid)
+        session.sid = secrets.token_urlsafe(32)
+        session.modified = True
+
+    def principal(self, session):
+        """The cached principal if it is still current, else None"""
+        principal = session.get('principal')
+        if not principal or str(principal['_id']) != session.get('seller_id'):
+            return None
+        if principal.get('version') != self.backend.get_version(session['seller_id']):
+            return None
+        return principal
+
+    def set_principal(self, session, seller):
+        principal = {field: seller.get(field) for field in PRINCIPAL_FIELDS}
+        principal['_id'] = seller['_id']
+        principal['version'] = self.backend.get_version(str(seller['_id']))
+        session['principal'] = principal
+        return principal
+
+    def invalidate_principal(self, seller_id=None):
+        """Make every session of this seller (or of every seller) reload its principal"""
+        try:
+            self.backend.bump_version(str(seller_id) if seller_id is not None else ALL_SELLERS)
+        except Exception as e:
+            print(f"❌ Error invalidating sessions for seller {seller_id}: {e}")
+
+    def revoke_seller(self, seller_id):
+        """Log a seller out everywhere; returns the number of sessions ended"""
+        try:
+            return self.backend.delete_for_seller(str(seller_id))
+        except Exception as e:
+            print(f"❌ Error revoking sessions for seller {seller_id}: {e}")
+            return 0
+
+    def purge_expired(self):
+        self.backend.purge_expired()
+
+# Global instance
+session_store = ServerSessionInterface()
+
+# Seller writes from any process, seen by the change watcher
+invalidation_bus.subscribe("sellers", session_store.invalidate_principal)